@@ -0,0 +1,191 @@
+"""
+Shared runtime for the cron jobs: environment and lazily created, pooled clients.
+
+Heavy client libraries (weaviate, openai, google.generativeai) are only imported
+when a job first asks for their client, and every client is created once per
+process and reused, so a run that is answered from caches or uses the fake
+backends never pays for them. Jobs put this directory on `sys.path`:
+
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    import cron_runtime
+
+    client = cron_runtime.weaviate_client()
+
+Weaviate is reached in one of three modes, from `WEAVIATE_MODE` or the `mode` argument:
+"cloud" (WEAVIATE_CLUSTER_URL and WEAVIATE_API_KEY), "local" (a server on
+WEAVIATE_HOST:WEAVIATE_PORT, default localhost:8080) or "embedded" (a Weaviate
+binary started by the client itself, no Docker needed).
+
+    python cron_runtime.py check    # connect to everything configured and time it
+"""
+import atexit
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+ENV_PATH = Path(__file__).resolve().parents[1] / ".env"
+
+_lock = threading.RLock()
+_env_loaded = False
+_clients = {}
+
+
+def load_env():
+    """Load the repository's .env once per process; variables already set win."""
+    global _env_loaded
+    with _lock:
+        if _env_loaded:
+            return
+        from dotenv import load_dotenv
+
+        load_dotenv(dotenv_path=ENV_PATH, override=False)
+        _env_loaded = True
+
+
+def env(name: str, default: Optional[str] = None) -> Optional[str]:
+    load_env()
+    return os.getenv(name, default)
+
+
+def _singleton(name: str, create, is_healthy=None, close=None):
+    """
+    The process-wide client called `name`, created with `create()` on first use.
+
+    When `is_healthy(client)` is given and returns False (or raises), the client is
+    closed and created again, so a long-running batch recovers from dropped connections.
+    """
+    with _lock:
+        if name in _clients and is_healthy is not None:
+            try:
+                healthy = is_healthy(_clients[name][0])
+            except Exception:
+                healthy = False
+            if not healthy:
+                print(f"{name} client failed its health check, reconnecting")
+                _close(name)
+        if name not in _clients:
+            start = time.perf_counter()
+            _clients[name] = (create(), close)
+            print(f"{name} client ready in {time.perf_counter() - start:.2f} seconds")
+        return _clients[name][0]
+
+
+def _close(name: str):
+    client, close = _clients.pop(name)
+    if close is not None:
+        try:
+            close(client)
+        except Exception as e:
+            print(f"Closing {name} client failed: {e}")
+
+
+def weaviate_client(mode: Optional[str] = None):
+    """Shared Weaviate client, reconnected when it stops answering `is_ready()`."""
+    mode = mode or env("WEAVIATE_MODE", "cloud")
+
+    def create():
+        import weaviate
+
+        headers = {}
+        if env("OPENAI_API_KEY"):
+            # Used by the collection's server-side text2vec_openai vectorizer.
+            headers["X-OpenAI-Api-key"] = env("OPENAI_API_KEY")
+        if mode == "cloud":
+            from weaviate.classes.init import Auth
+
+            return weaviate.connect_to_weaviate_cloud(
+                cluster_url=env("WEAVIATE_CLUSTER_URL"),
+                auth_credentials=Auth.api_key(env("WEAVIATE_API_KEY")),
+                headers=headers,
+            )
+        if mode == "local":
+            return weaviate.connect_to_local(host=env("WEAVIATE_HOST", "localhost"),
+                                             port=int(env("WEAVIATE_PORT", "8080")), headers=headers)
+        if mode == "embedded":
+            return weaviate.connect_to_embedded(
+                persistence_data_path=env("WEAVIATE_EMBEDDED_PATH",
+                                          str(Path(__file__).resolve().parent / "weaviate_data")),
+                headers=headers,
+            )
+        raise ValueError(f"Unknown Weaviate mode {mode!r}, expected cloud, local or embedded")
+
+    return _singleton(f"weaviate-{mode}", create, is_healthy=lambda client: client.is_ready(),
+                      close=lambda client: client.close())
+
+
+def openai_client():
+    """Shared synchronous OpenAI client; its HTTP connection pool is reused by every call."""
+    def create():
+        from openai import OpenAI
+
+        return OpenAI(api_key=env("OPENAI_API_KEY"))
+
+    return _singleton("openai", create, close=lambda client: client.close())
+
+
+def gemini():
+    """The `google.generativeai` module, configured with GOOGLE_API_KEY on first use."""
+    def create():
+        import google.generativeai as genai
+
+        genai.configure(api_key=env("GOOGLE_API_KEY"))
+        return genai
+
+    return _singleton("gemini", create)
+
+
+def http_session():
+    """Shared `requests` session, keeping connections alive between requests to the same host."""
+    def create():
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    return _singleton("http", create, close=lambda session: session.close())
+
+
+def close_all():
+    """Close every client created so far; runs automatically at exit."""
+    with _lock:
+        for name in list(_clients):
+            _close(name)
+
+
+atexit.register(close_all)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["check"])
+    parser.add_argument("--weaviate-mode", choices=["cloud", "local", "embedded"])
+    args = parser.parse_args()
+
+    checks = [
+        ("weaviate", lambda: weaviate_client(args.weaviate_mode).is_ready()),
+        ("openai", lambda: openai_client().models.list() is not None),
+        ("gemini", lambda: gemini() is not None),
+    ]
+    failed = 0
+    for name, check in checks:
+        start = time.perf_counter()
+        try:
+            ok = bool(check())
+        except Exception as e:
+            ok = False
+            print(f"{name}: {e}")
+        failed += not ok
+        print(f"{name:<10} {'ok' if ok else 'FAILED':<7} {time.perf_counter() - start:.2f}s")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Generate reports for every pending helmet-cam video in a directory.
+
+Videos are processed by a pool of workers sharing one Gemini client and model.
+Per-video status is kept in a small SQLite file, so an interrupted cron run picks
+up where it stopped and videos that already have a report are skipped.
+
+    python batch_reports.py --video-dir /data/helmet_cams/2025-05-02 --workers 4
+"""
+import argparse
+import datetime
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import metrics
+
+from fake_genai import FakeGenAI
+from generate_reports import (ConstructionVideoAnalyzer, add_preprocess_args, add_report_cache_args,
+                              add_report_index_args, add_retry_args, preprocess_options_from_args,
+                              report_cache_from_args, report_index_from_args, retry_policy_from_args, save_report)
+from prisma_reports import add_prisma_args, prisma_store_from_args
+
+VIDEO_EXTENSIONS = (".mp4", ".mov")
+
+
+class BatchStatus:
+    """Per-video status table: pending, running, done or failed."""
+
+    def __init__(self, path: Path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS video_status (
+                    video_path TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    report_path TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    elapsed_seconds REAL,
+                    updated_at TEXT NOT NULL
+                )
+                """
+            )
+            # Anything still marked running was interrupted by a crash or a kill.
+            self.conn.execute("UPDATE video_status SET status = 'pending' WHERE status = 'running'")
+            self.conn.commit()
+
+    def _set(self, video_path: str, **fields):
+        fields["updated_at"] = datetime.datetime.now().isoformat()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO video_status (video_path, status, updated_at) VALUES (?, 'pending', ?)",
+                (video_path, fields["updated_at"]),
+            )
+            self.conn.execute(f"UPDATE video_status SET {columns} WHERE video_path = ?",
+                              (*fields.values(), video_path))
+            self.conn.commit()
+
+    def get(self, video_path: str):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT status, attempts FROM video_status WHERE video_path = ?", (video_path,)
+            ).fetchone()
+        return row if row else ("pending", 0)
+
+    def mark_running(self, video_path: str, attempts: int):
+        self._set(video_path, status="running", attempts=attempts, error=None)
+
+    def mark_done(self, video_path: str, report_path: str, elapsed: float):
+        self._set(video_path, status="done", report_path=report_path, elapsed_seconds=elapsed)
+
+    def mark_failed(self, video_path: str, error: str, elapsed: float):
+        self._set(video_path, status="failed", error=error, elapsed_seconds=elapsed)
+
+    def done_reports(self) -> list[str]:
+        """Report paths of the videos marked done."""
+        with self._lock:
+            return [path for (path,) in self.conn.execute(
+                "SELECT report_path FROM video_status WHERE status = 'done' AND report_path IS NOT NULL"
+            )]
+
+    def counts(self) -> dict:
+        with self._lock:
+            return dict(self.conn.execute("SELECT status, COUNT(*) FROM video_status GROUP BY status").fetchall())
+
+
+def existing_report(video_path: str, output_dir: str) -> bool:
+    """Whether a construction_report_<video>_<YYYYMMDD_HHMMSS>.md for exactly this video stem is in the output directory."""
+    report_re = re.compile(rf"construction_report_{re.escape(Path(video_path).stem)}_\d{{8}}_\d{{6}}\.md")
+    return any(report_re.fullmatch(name) for name in os.listdir(output_dir))
+
+
+def discover_videos(video_dir: str, status: BatchStatus, output_dir: str, max_attempts: int) -> list[str]:
+    """Videos in `video_dir` that still need a report, oldest first."""
+    entries = [entry for entry in os.scandir(video_dir)
+               if entry.is_file() and entry.name.lower().endswith(VIDEO_EXTENSIONS)]
+    stem_counts = Counter(Path(entry.name).stem for entry in entries)
+    pending = []
+    for entry in sorted(entries, key=lambda entry: entry.stat().st_mtime):
+        video_path = os.path.abspath(entry.path)
+        state, attempts = status.get(video_path)
+        if state == "done":
+            continue
+        # Reports are named after the stem, so x.mp4 and x.mov cannot be told apart by
+        # report name; for those only the status table, keyed on the full path, counts.
+        if stem_counts[Path(entry.name).stem] == 1 and existing_report(video_path, output_dir):
+            continue
+        if state == "failed" and attempts >= max_attempts:
+            continue
+        pending.append(video_path)
+    return pending
+
+
+def process_video(analyzer: ConstructionVideoAnalyzer, status: BatchStatus, video_path: str, output_dir: str,
+                  segment_seconds: float, segment_workers: int, report_index=None, project_id=None,
+                  worker_id=None, prisma_store=None) -> Optional[str]:
+    """
+    Report on one video; returns the saved report's path, None when it failed.
+
+    The report is recorded in `prisma_store` once the video is marked done. A failed
+    insert leaves the video done and is retried by the next run's `record_done_reports`.
+    """
+    _, attempts = status.get(video_path)
+    status.mark_running(video_path, attempts + 1)
+    start_time = time.time()
+    try:
+        report = analyzer.generate_report(video_path, segment_seconds, segment_workers)
+        report_path = save_report(report, video_path, output_dir)
+        if report_index is not None:
+            report_index.add(report_path, report, os.path.basename(video_path), project_id, worker_id)
+    except Exception as e:
+        status.mark_failed(video_path, str(e), time.time() - start_time)
+        metrics.count("videos_failed")
+        print(f"Failed {video_path}: {e}")
+        return None
+    elapsed = time.time() - start_time
+    status.mark_done(video_path, report_path, elapsed)
+    metrics.observe("video", elapsed)
+    metrics.count("videos_reported")
+    print(f"Report for {video_path} saved to {report_path}")
+    if prisma_store is not None:
+        try:
+            prisma_store.add_report_files([report_path], project_id, worker_id)
+        except Exception as e:
+            metrics.count("reports_unrecorded")
+            print(f"Recording {report_path} in {prisma_store.path} failed, retried next run: {e}")
+            return None
+    return report_path
+
+
+def record_done_reports(status: BatchStatus, prisma_store, project_id: str, worker_id: str) -> int:
+    """
+    Record the reports of every video marked done that is not in the Prisma database yet.
+
+    Covers runs interrupted between marking a video done and recording its report;
+    reports already recorded are skipped by filePath.
+    """
+    report_paths = [path for path in status.done_reports() if os.path.exists(path)]
+    return prisma_store.add_report_files(report_paths, project_id, worker_id) if report_paths else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video-dir", required=True, help="Directory scanned for videos")
+    parser.add_argument("--output-dir", help="Where reports are written, defaults to the video directory")
+    parser.add_argument("--status-db", help="Status database, defaults to batch_status.sqlite in the output directory")
+    parser.add_argument("--workers", type=int, default=4, help="Videos processed concurrently")
+    parser.add_argument("--max-attempts", type=int, default=3, help="Give up on a video after this many failures")
+    parser.add_argument("--upload-mode", choices=["files", "inline"], default="files")
+    parser.add_argument("--segment-seconds", type=float, default=0,
+                        help="Analyze each video in segments of about this many seconds (0 = single request)")
+    parser.add_argument("--segment-workers", type=int, default=4)
+    parser.add_argument("--fake", action="store_true", help="Use the offline fake Gemini client")
+    parser.add_argument("--upload-store",
+                        help="JSON record of uploaded videos, defaults to uploaded_videos.json next to this script")
+    add_preprocess_args(parser)
+    add_report_cache_args(parser)
+    add_report_index_args(parser)
+    add_prisma_args(parser)
+    add_retry_args(parser)
+    metrics.add_metrics_args(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None, client=None):
+    """
+    Args:
+        argv: Command line arguments, defaults to sys.argv
+        client: Gemini client to use instead of the real or --fake one (e.g. a FakeGenAI
+            with chosen latencies, as pipeline_bench.py does)
+    """
+    args = parse_args(argv)
+    output_dir = args.output_dir or args.video_dir
+    os.makedirs(output_dir, exist_ok=True)
+    status = BatchStatus(args.status_db or os.path.join(output_dir, "batch_status.sqlite"))
+    prisma_store = prisma_store_from_args(args)
+    backfilled = 0
+    if prisma_store is not None:
+        backfilled = record_done_reports(status, prisma_store, args.project_id, args.worker_id)
+        if backfilled:
+            print(f"Recorded {backfilled} reports left unrecorded by an earlier run")
+
+    videos = discover_videos(args.video_dir, status, output_dir, args.max_attempts)
+    print(f"{len(videos)} videos pending in {args.video_dir}")
+    if not videos:
+        if backfilled:
+            prisma_store.aggregate()
+        return
+
+    # One client and model shared by every worker.
+    client = client or (FakeGenAI() if args.fake else None)
+    analyzer = ConstructionVideoAnalyzer(client=client, upload_mode=args.upload_mode,
+                                         upload_store_path=args.upload_store,
+                                         preprocess_options=preprocess_options_from_args(args),
+                                         report_cache=report_cache_from_args(args), structured=args.structured,
+                                         retry_policy=retry_policy_from_args(args))
+    report_index = report_index_from_args(args, output_dir)
+    start_time = time.time()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = [
+            pool.submit(process_video, analyzer, status, video_path, output_dir,
+                        args.segment_seconds, args.segment_workers, report_index, args.project_id, args.worker_id,
+                        prisma_store)
+            for video_path in videos
+        ]
+        report_paths = [path for path in (future.result() for future in as_completed(futures)) if path]
+    succeeded = len(report_paths)
+    if prisma_store is not None and (report_paths or backfilled):
+        # Reports were recorded as they finished; one incremental pass over the new rows.
+        counts = prisma_store.aggregate()
+        print(f"Recorded {len(report_paths)} reports in {prisma_store.path}, "
+              f"{counts['summaries']} daily summaries updated")
+
+    print(f"\n----- Batch Summary -----")
+    print(f"{succeeded} of {len(videos)} videos reported in {time.time() - start_time:.2f} seconds")
+    print(f"Status totals: {status.counts()}")
+    metrics.write_from_args(args, "batch_reports", "ok" if succeeded == len(videos) else "failed")
+    if succeeded < len(videos):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
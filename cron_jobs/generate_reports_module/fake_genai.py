@@ -0,0 +1,195 @@
+"""
+Offline stand-in for the parts of `google.generativeai` the report generator uses.
+
+    analyzer = ConstructionVideoAnalyzer(client=FakeGenAI(latency=2.0))
+
+Uploads are "processed" after a configurable delay, and `generate_content` sleeps
+for `latency` seconds (plus `seconds_per_video_second` for every second of the
+attached video, when its duration is registered in `video_durations`) and returns
+a canned report, as JSON when a response schema is requested, so the upload,
+polling, segmenting and retry flows can be exercised without network access or an
+API key. With `stream=True` the answer comes back in line-sized chunks, and the
+first `transient_failures` calls fail with a 503, half of them midway through the
+stream. Responses carry `usage_metadata` token counts estimated like the API's.
+"""
+import datetime
+import itertools
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+FAKE_REPORT = """# SITE PROGRESS REPORT
+
+## Date and Time
+{now}
+
+## Site Overview
+Fake analysis of {source}.
+
+## Work Completed
+- Framing of interior partition wall
+
+## Work In Progress
+- Sheathing installation
+
+## Materials On Site Visible By This Worker's Camera
+- Dimensional lumber, OSB sheathing
+
+## Safety Observations
+- Worker wearing hard hat and safety glasses
+
+## Recommendations
+- Keep walkways clear of offcuts
+
+## Weather Conditions
+Indoors, not visible
+
+## Second by Second Video Analysis
+- [Second 0-5]: Positions stud against top plate. Materials used: 2x4 stud. Tools used: nail gun (2 times)
+- [Second 5-10]: Measures next stud location. Materials used: none. Tools used: tape measure (1 time)
+"""
+
+
+def fake_structured_report(source, duration=None):
+    """Canned answer matching structured_report.REPORT_SCHEMA."""
+    intervals = [
+        {"start_s": start, "end_s": min(start + 5, int(duration or 10)), "action": "Installs stud",
+         "materials": ["2x4 stud"], "tools": [{"name": "nail gun", "count": 1}]}
+        for start in range(0, int(duration or 10), 5)
+    ]
+    return {
+        "date_time": datetime.datetime.now().isoformat(),
+        "site_overview": f"Fake analysis of {source}.",
+        "work_completed": ["Framing of interior partition wall"],
+        "work_in_progress": ["Sheathing installation"],
+        "materials_on_site": ["Dimensional lumber", "OSB sheathing"],
+        "safety_observations": ["Worker wearing hard hat and safety glasses"],
+        "recommendations": ["Keep walkways clear of offcuts"],
+        "weather_conditions": "Indoors, not visible",
+        "intervals": intervals,
+    }
+
+
+# Gemini bills video at about this many tokens per second of footage (frames plus audio).
+VIDEO_TOKENS_PER_SECOND = 263
+
+
+def fake_usage(contents, duration, answer):
+    """usage_metadata for a request, at about 4 characters per text token."""
+    prompt_chars = sum(len(part["text"]) for part in contents if isinstance(part, dict) and "text" in part)
+    return SimpleNamespace(prompt_token_count=prompt_chars // 4 + int(VIDEO_TOKENS_PER_SECOND * (duration or 0)),
+                           candidates_token_count=len(answer) // 4)
+
+
+class FakeServiceUnavailable(Exception):
+    """Stands in for google.api_core.exceptions.ServiceUnavailable."""
+    code = 503
+
+
+class FakeGenerativeModel:
+    def __init__(self, client, model_name):
+        self.client = client
+        self.model_name = model_name
+
+    def generate_content(self, contents, generation_config=None, stream=False, **kwargs):
+        with self.client._lock:
+            self.client.generate_calls += 1
+            failure = self.client.transient_failures > 0
+            mid_stream = False
+            if failure:
+                self.client.transient_failures -= 1
+                mid_stream = stream and self.client.transient_failures % 2 == 1
+        if failure and not mid_stream:
+            raise FakeServiceUnavailable("503 The model is overloaded. Please try again later.")
+        source = "inline video"
+        duration = None
+        for part in contents:
+            if hasattr(part, "uri"):
+                source = part.uri
+                duration = self.client.files[part.name]["duration"]
+        time.sleep(self.client.latency + self.client.seconds_per_video_second * (duration or 0))
+        if (generation_config or {}).get("response_mime_type") == "application/json":
+            report = json.dumps(fake_structured_report(source, duration), indent=1)
+        else:
+            report = self._markdown_report(source, duration)
+        usage = fake_usage(contents, duration, report)
+        if not stream:
+            return SimpleNamespace(text=report, usage_metadata=usage)
+        return self._stream(report, usage, fail_midway=failure)
+
+    @staticmethod
+    def _stream(text, usage, fail_midway=False):
+        lines = text.splitlines(keepends=True)
+        for index, line in enumerate(lines):
+            if fail_midway and index == len(lines) // 2:
+                raise FakeServiceUnavailable("503 Stream closed by the server.")
+            # Like the API, the token counts come with the last chunk.
+            yield SimpleNamespace(text=line, usage_metadata=usage if index == len(lines) - 1 else None)
+
+    @staticmethod
+    def _markdown_report(source, duration):
+        report = FAKE_REPORT.format(now=datetime.datetime.now().isoformat(), source=source)
+        if duration:
+            # Replace the canned timeline with one covering the whole attached video.
+            report = report[:report.index("- [Second 0-5]")] + "".join(
+                f"- [Second {start}-{min(start + 5, int(duration))}]: Installs stud. "
+                f"Materials used: 2x4 stud. Tools used: nail gun (1 time)\n"
+                for start in range(0, int(duration), 5)
+            )
+        return report
+
+
+class FakeGenAI:
+    """Module-like fake exposing `GenerativeModel`, `upload_file`, `get_file` and `delete_file`."""
+
+    def __init__(self, latency: float = 0.5, processing_seconds: float = 0.2, seconds_per_video_second: float = 0.0,
+                 transient_failures: int = 0):
+        self.latency = latency
+        self.transient_failures = transient_failures
+        self.processing_seconds = processing_seconds
+        self.seconds_per_video_second = seconds_per_video_second
+        # Absolute video path -> duration in seconds, for duration-dependent latency.
+        self.video_durations = {}
+        self.files = {}
+        self.uploaded_bytes = 0
+        self.upload_calls = 0
+        self.generate_calls = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def GenerativeModel(self, model_name, **kwargs):
+        return FakeGenerativeModel(self, model_name)
+
+    def upload_file(self, path, mime_type=None, display_name=None, resumable=True, **kwargs):
+        # Read in chunks like the resumable upload does, never holding the whole file.
+        size = 0
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(8 * 1024 * 1024), b""):
+                size += len(chunk)
+        with self._lock:
+            self.upload_calls += 1
+            self.uploaded_bytes += size
+            name = f"files/fake-{next(self._ids)}"
+            self.files[name] = {
+                "uri": f"https://fake.local/v1beta/{name}",
+                "display_name": display_name or os.path.basename(path),
+                "mime_type": mime_type,
+                "ready_at": time.monotonic() + self.processing_seconds,
+                "duration": self.video_durations.get(os.path.abspath(path)),
+                "expiration_time": datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=48),
+            }
+        return self.get_file(name)
+
+    def get_file(self, name):
+        entry = self.files.get(name)
+        if entry is None:
+            raise KeyError(f"{name} not found")
+        state = "ACTIVE" if time.monotonic() >= entry["ready_at"] else "PROCESSING"
+        return SimpleNamespace(name=name, uri=entry["uri"], mime_type=entry["mime_type"],
+                               display_name=entry["display_name"], state=SimpleNamespace(name=state),
+                               expiration_time=entry["expiration_time"])
+
+    def delete_file(self, name):
+        self.files.pop(name, None)
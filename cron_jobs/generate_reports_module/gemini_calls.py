@@ -0,0 +1,153 @@
+import random
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import metrics
+
+# HTTP statuses worth retrying: timeouts, rate limiting and server-side failures.
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class GeminiCallError(Exception):
+    """
+    A Gemini call that failed for good, after retries when the error was transient.
+
+    `partial_text` holds whatever the streamed response produced before the last failure.
+    """
+
+    def __init__(self, message: str, retryable: bool = False, partial_text: str = "", attempts: int = 1):
+        super().__init__(message)
+        self.retryable = retryable
+        self.partial_text = partial_text
+        self.attempts = attempts
+
+
+class ResponseBlockedError(Exception):
+    """Raised when a streamed chunk has no text, e.g. because the response was blocked."""
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 4
+    # Exponential backoff: base_delay * 2**attempt, capped at max_delay, with full jitter.
+    base_delay: float = 2.0
+    max_delay: float = 60.0
+    # Deadline of a single request, passed to the client as its timeout.
+    call_timeout: float = 900.0
+    # No new attempt is started once this many seconds have passed since the first one.
+    total_deadline: float = 3600.0
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Whether an error is transient.
+
+    `google.api_core` exceptions carry their HTTP status in `code`; timeouts and
+    dropped connections are transient too. Anything else (bad request, permission,
+    blocked content) fails the same way on every attempt.
+    """
+    if isinstance(error, GeminiCallError):
+        return error.retryable
+    if isinstance(error, _StreamInterrupted):
+        return is_retryable(error.error)
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    code = getattr(error, "code", None)
+    return isinstance(code, int) and code in RETRYABLE_STATUS_CODES
+
+
+def with_retry(call: Callable, policy: RetryPolicy, description: str):
+    """
+    Run `call()` until it succeeds, retrying transient errors with backoff.
+
+    Raises:
+        GeminiCallError: The call failed with a permanent error, or kept failing until
+            the attempts or the total deadline ran out
+    """
+    start = time.monotonic()
+    partial_text = ""
+    for attempt in range(policy.max_attempts):
+        try:
+            return call()
+        except Exception as e:
+            partial_text = getattr(e, "partial_text", "") or partial_text
+            retryable = is_retryable(e)
+            attempts = attempt + 1
+            if not retryable:
+                raise GeminiCallError(f"{description} failed: {e}", False, partial_text, attempts) from e
+            delay = policy.backoff(attempt)
+            if attempts == policy.max_attempts or time.monotonic() - start + delay > policy.total_deadline:
+                raise GeminiCallError(f"{description} failed after {attempts} attempts: {e}", True,
+                                      partial_text, attempts) from e
+            metrics.count("api_retries")
+            print(f"{description} failed ({e}), retrying in {delay:.1f} seconds "
+                  f"(attempt {attempts + 1}/{policy.max_attempts})")
+            time.sleep(delay)
+
+
+class _StreamInterrupted(Exception):
+    """A streamed response failed after producing some text."""
+
+    def __init__(self, error: BaseException, partial_text: str):
+        super().__init__(str(error))
+        self.error = error
+        self.partial_text = partial_text
+
+
+def _stream_text(model, contents, generation_config: dict, timeout: float) -> str:
+    """One streamed request; the text received so far is kept on the error if it fails midway."""
+    parts = []
+    usage = None
+    try:
+        with metrics.timer("model_call"):
+            response = model.generate_content(contents, generation_config=generation_config, stream=True,
+                                              request_options={"timeout": timeout})
+            for chunk in response:
+                # Token counts are cumulative; the last chunk carrying them has the totals.
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                try:
+                    parts.append(chunk.text)
+                except ValueError as e:
+                    raise ResponseBlockedError(f"response has no text: {e}") from e
+    except Exception as e:
+        metrics.count("model_call_failures")
+        if not parts:
+            raise
+        raise _StreamInterrupted(e, "".join(parts)) from e
+    metrics.count("model_calls")
+    if usage is not None:
+        metrics.count("tokens_in", getattr(usage, "prompt_token_count", 0) or 0)
+        metrics.count("tokens_out", getattr(usage, "candidates_token_count", 0) or 0)
+    return "".join(parts)
+
+
+def generate_with_retry(model, contents: list, generation_config: dict, policy: Optional[RetryPolicy] = None,
+                        description: str = "Gemini request") -> str:
+    """
+    Text of a `generate_content` call, streamed, with a per-call deadline and retries.
+
+    Raises:
+        GeminiCallError: See `with_retry`; `partial_text` holds the longest partial answer received
+    """
+    policy = policy or RetryPolicy()
+    longest_partial = ""
+
+    def attempt():
+        nonlocal longest_partial
+        try:
+            return _stream_text(model, contents, generation_config, policy.call_timeout)
+        except _StreamInterrupted as e:
+            if len(e.partial_text) > len(longest_partial):
+                longest_partial = e.partial_text
+            print(f"{description} interrupted after {len(e.partial_text)} characters: {e.error}")
+            e.partial_text = longest_partial
+            raise
+
+    return with_retry(attempt, policy, description)
@@ -0,0 +1,145 @@
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import metrics
+
+
+class VideoProcessingError(Exception):
+    """Raised when the Files API fails to process an uploaded video."""
+
+
+class UploadedVideoStore:
+    """
+    Remembers which local videos are already uploaded to the Gemini Files API.
+
+    Handles are keyed by absolute path, size and modification time, so a retry or a
+    rerun of the same video reuses the uploaded file instead of sending it again.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        # Shared by the batch runner's worker threads.
+        self._lock = threading.RLock()
+        if self.path.exists():
+            with open(self.path) as f:
+                self.entries = json.load(f)
+        else:
+            self.entries = {}
+
+    @staticmethod
+    def key(video_path: str) -> str:
+        stat = os.stat(video_path)
+        return f"{os.path.abspath(video_path)}:{stat.st_size}:{int(stat.st_mtime)}"
+
+    def get(self, video_path: str):
+        return self.entries.get(self.key(video_path))
+
+    def put(self, video_path: str, file_name: str, expiration_time=None):
+        with self._lock:
+            self.entries[self.key(video_path)] = {
+                "name": file_name,
+                "expiration_time": expiration_time.isoformat() if expiration_time else None,
+            }
+            self.save()
+
+    def forget(self, video_path: str):
+        with self._lock:
+            if self.entries.pop(self.key(video_path), None) is not None:
+                self.save()
+
+    def save(self):
+        with self._lock:
+            tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(self.entries, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+def wait_until_active(client, video_file, poll_interval: float = 5.0, timeout: float = 1800.0):
+    """
+    Poll the Files API until an uploaded video has been processed.
+
+    Args:
+        client: The `google.generativeai` module or a stand-in exposing `get_file`
+        video_file: File handle returned by `upload_file`
+        poll_interval: Seconds between status checks
+        timeout: Seconds to wait before giving up
+
+    Returns:
+        The refreshed, ACTIVE file handle
+    """
+    deadline = time.monotonic() + timeout
+    while video_file.state.name == "PROCESSING":
+        if time.monotonic() > deadline:
+            raise VideoProcessingError(f"{video_file.name} still processing after {timeout:.0f} seconds")
+        time.sleep(poll_interval)
+        video_file = client.get_file(video_file.name)
+    if video_file.state.name != "ACTIVE":
+        raise VideoProcessingError(f"{video_file.name} ended in state {video_file.state.name}")
+    return video_file
+
+
+def _reusable_handle(client, store: UploadedVideoStore, video_path: str):
+    entry = store.get(video_path)
+    if entry is None:
+        return None
+    expiration = entry.get("expiration_time")
+    # Leave an hour of margin so the handle does not expire mid-analysis.
+    if expiration and datetime.datetime.fromisoformat(expiration) < (
+            datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=1)):
+        store.forget(video_path)
+        return None
+    try:
+        video_file = client.get_file(entry["name"])
+    except Exception:
+        store.forget(video_path)
+        return None
+    if video_file.state.name not in ("PROCESSING", "ACTIVE"):
+        store.forget(video_path)
+        return None
+    return video_file
+
+
+def upload_video(client, video_path: str, store: UploadedVideoStore = None, mime_type: str = "video/mp4",
+                 poll_interval: float = 5.0, timeout: float = 1800.0):
+    """
+    Upload a video to the Files API, or reuse an earlier upload of the same file.
+
+    The upload uses the resumable protocol, which streams the file from disk in
+    chunks instead of holding it in memory.
+
+    Args:
+        client: The `google.generativeai` module or a stand-in with `upload_file`/`get_file`
+        video_path: Path to the video file
+        store: Optional record of earlier uploads to reuse
+        mime_type: MIME type of the video
+        poll_interval: Seconds between processing status checks
+        timeout: Seconds to wait for processing
+
+    Returns:
+        An ACTIVE file handle that can be passed to `generate_content`
+    """
+    video_file = _reusable_handle(client, store, video_path) if store is not None else None
+    if video_file is not None:
+        metrics.count("upload_reuses")
+        print(f"Reusing uploaded file {video_file.name} for {video_path}")
+    else:
+        print(f"Uploading {video_path} to the Files API...")
+        with metrics.timer("upload") as upload:
+            video_file = client.upload_file(video_path, mime_type=mime_type,
+                                            display_name=os.path.basename(video_path), resumable=True)
+        metrics.count("uploads")
+        metrics.count("uploaded_bytes", os.path.getsize(video_path))
+        print(f"Upload completed in {upload.seconds:.2f} seconds.")
+        if store is not None:
+            store.put(video_path, video_file.name, getattr(video_file, "expiration_time", None))
+
+    print("Waiting for the Files API to process the video...")
+    with metrics.timer("upload_processing"):
+        return wait_until_active(client, video_file, poll_interval=poll_interval, timeout=timeout)
@@ -1,14 +1,26 @@
 import os
+import json
 import time
-from dotenv import load_dotenv
-import google.generativeai as genai
+import argparse
 import datetime
+import sys
+import tempfile
+from dataclasses import asdict
+from pathlib import Path
 
-# Load environment variables
-load_dotenv()
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import cron_runtime
+import metrics
 
-# Set up Google Gemini API
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+from gemini_calls import GeminiCallError, RetryPolicy, generate_with_retry, with_retry
+from gemini_files import UploadedVideoStore, upload_video
+from fake_genai import FakeGenAI
+from segments import UNAVAILABLE_DESCRIPTION, analyze_segments, split_video, stitch_report
+from preprocess import PreprocessOptions, preprocess_video, remap_report
+from prisma_reports import add_prisma_args, prisma_store_from_args
+from report_cache import DEFAULT_CACHE_PATH, ReportCache, report_key
+from report_index import ReportIndex
+from structured_report import report_from_json, structured_generation_config, structured_instructions
 
     # Define the format template for construction reports
 construction_report_format = """
@@ -61,70 +73,348 @@ Your report will follow this format:
 Maintain a professional tone throughout the report using construction industry specific terminology.
 """
 
+# Configure generation parameters
+generation_config = {
+    "temperature": 0.1,
+    "top_p": 0.1,
+    "top_k": 15,
+    "max_output_tokens": 10000000,
+}
+
+class ReportGenerationError(Exception):
+    """Raised when no usable report could be generated for a video."""
+
 class ConstructionVideoAnalyzer:
-    def __init__(self, model_name="gemini-2.5-pro-exp-03-25"):
-        """Initialize the analyzer with the specified model."""
-        self.model = genai.GenerativeModel(model_name)
+    def __init__(self, model_name="gemini-2.5-pro-exp-03-25", client=None, upload_mode="files",
+                 upload_store_path=None, preprocess_options=None, report_cache=None, structured=False,
+                 retry_policy=None):
+        """
+        Initialize the analyzer with the specified model.
+        
+        Args:
+            model_name: Gemini model to use
+            client: The google.generativeai module, or a stand-in such as FakeGenAI;
+                defaults to the shared, configured module from cron_runtime.gemini()
+            upload_mode: "files" to upload through the Files API, "inline" to send the bytes in the request
+            upload_store_path: JSON file remembering uploaded videos so they are not sent twice
+            preprocess_options: PreprocessOptions to downsample and trim idle footage before analysis,
+                or None to send the original video
+            report_cache: ReportCache returning stored reports for videos analyzed before, or None
+            structured: Ask for JSON matching structured_report.REPORT_SCHEMA and render the report from it
+            retry_policy: RetryPolicy for uploads and model calls, see gemini_calls.py
+        """
+        self.client = client if client is not None else cron_runtime.gemini()
+        self.model_name = model_name
+        self.model = self.client.GenerativeModel(model_name)
+        self.upload_mode = upload_mode
+        if upload_store_path is None:
+            upload_store_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "uploaded_videos.json")
+        self.upload_store = UploadedVideoStore(upload_store_path)
+        self.preprocess_options = preprocess_options
+        self.report_cache = report_cache
+        self.structured = structured
+        self.retry_policy = retry_policy or RetryPolicy()
+        
+    def _report_prompt(self) -> str:
+        if self.structured:
+            return construction_report_format + structured_instructions
+        return construction_report_format
+        
+    def _video_part(self, video_path: str, remember_upload=True):
+        """Build the video part of the request for the configured upload mode."""
+        if self.upload_mode == "files":
+            return with_retry(
+                lambda: upload_video(self.client, video_path, self.upload_store if remember_upload else None),
+                self.retry_policy, f"Upload of {os.path.basename(video_path)}",
+            )
         
-    def analyze_video(self, video_path: str) -> str:
+        # Read the video file
+        print("Reading video file...")
+        with metrics.timer("read_video") as read:
+            with open(video_path, "rb") as f:
+                video_data = f.read()
+        metrics.count("inlined_bytes", len(video_data))
+        print(f"Video file read in {read.seconds:.2f} seconds.")
+        return {
+            "mime_type": "video/mp4",
+            "data": video_data
+        }
+        
+    def analyze_video(self, video_path: str, remember_upload=True) -> str:
         """
         Analyze a construction video and generate a report.
         
         Args:
             video_path: Path to the video file
+            remember_upload: Record the upload so a rerun of the same file reuses it
             
         Returns:
             Generated report as a string
+            
+        Raises:
+            ReportGenerationError: The upload or the model call failed after retries
         """
         print(f"Analyzing video: {video_path}")
         
         try:
-            # Read the video file
-            print("Reading video file...")
-            read_start_time = time.time()
-            
-            with open(video_path, "rb") as f:
-                video_data = f.read()
-                
-            read_elapsed = time.time() - read_start_time
-            print(f"Video file read in {read_elapsed:.2f} seconds.")
+            video_part = self._video_part(video_path, remember_upload)
             
             # Generate the report
             print("Sending video to Gemini API for analysis...")
-            api_start_time = time.time()
+            with metrics.timer("analysis") as analysis:
+                # Use Gemini 2.5 Pro for enhanced video understanding
+                text = generate_with_retry(
+                    self.model,
+                    [
+                        {
+                            "text": self._report_prompt() + "\n\nThe video file has been provided. Please analyze the construction site footage as instructed."
+                        },
+                        video_part
+                    ],
+                    structured_generation_config(generation_config) if self.structured else generation_config,
+                    self.retry_policy,
+                    "Video analysis",
+                )
+            print(f"API analysis completed in {analysis.seconds:.2f} seconds.")
             
-            # Configure generation parameters
-            generation_config = {
-                "temperature": 0.1,
-                "top_p": 0.1,
-                "top_k": 15,
-                "max_output_tokens": 10000000,
-            }
+            if self.structured:
+                return report_from_json(text)
+            return text
             
-            # Use Gemini 2.5 Pro for enhanced video understanding
-            response = self.model.generate_content(
-                [
-                    {
-                        "text": construction_report_format + "\n\nThe video file has been provided. Please analyze the construction site footage as instructed."
-                    },
-                    {
-                        "mime_type": "video/mp4",
-                        "data": video_data
-                    }
-                ],
-                generation_config=generation_config
-            )
+        except GeminiCallError as e:
+            if e.partial_text:
+                print(f"Discarding {len(e.partial_text)} characters of incomplete report.")
+            raise ReportGenerationError(str(e)) from e
+        except ValueError as e:
+            # A structured answer that is not valid JSON.
+            raise ReportGenerationError(f"Unreadable structured report: {e}") from e
+
+    def analyze_video_segmented(self, video_path: str, segment_seconds: float = 120, max_workers: int = 4,
+                                splitter=split_video) -> str:
+        """
+        Analyze a construction video in parallel segments and stitch the report together.
+        
+        Args:
+            video_path: Path to the video file
+            segment_seconds: Target segment length; cuts land on the nearest keyframe
+            max_workers: Number of segments analyzed at the same time
+            splitter: Function cutting the video into segments, see segments.split_video
             
-            api_elapsed = time.time() - api_start_time
-            print(f"API analysis completed in {api_elapsed:.2f} seconds.")
+        Returns:
+            Generated report as a string
             
-            return response.text
+        Raises:
+            ReportGenerationError: Splitting, every segment or the summary call failed
+        """
+        print(f"Analyzing video in {segment_seconds:g} second segments: {video_path}")
+        
+        try:
+            with tempfile.TemporaryDirectory() as segment_dir:
+                with metrics.timer("split") as split:
+                    segments = splitter(video_path, segment_seconds, segment_dir)
+                if not segments:
+                    raise ReportGenerationError(f"Splitting {video_path} produced no segments "
+                                                f"(empty, zero-length or unreadable video)")
+                metrics.count("segments", len(segments))
+                print(f"Split into {len(segments)} segments in {split.seconds:.2f} seconds.")
+                
+                with metrics.timer("analysis") as analysis:
+                    results = analyze_segments(
+                        self.model,
+                        # Segment files are temporary, so their uploads are not worth remembering.
+                        lambda segment_path: self._video_part(segment_path, remember_upload=False),
+                        segments,
+                        generation_config,
+                        max_workers=max_workers,
+                        policy=self.retry_policy,
+                    )
+                    failed = [result for result in results if result.error is not None]
+                    metrics.count("segments_failed", len(failed))
+                    if all(result.error is not None and not result.timeline for result in results):
+                        raise failed[0].error
+                    
+                    report = stitch_report(self.model, construction_report_format, results, generation_config,
+                                           self.retry_policy)
+                print(f"API analysis completed in {analysis.seconds:.2f} seconds "
+                      f"({len(failed)} of {len(results)} segments failed).")
+                return report
             
+        except ReportGenerationError:
+            raise
         except Exception as e:
-            print(f"Error during analysis: {e}")
-            return f"Error during analysis: {str(e)}"
+            raise ReportGenerationError(str(e)) from e
+
+    def generate_report(self, video_path: str, segment_seconds: float = 0, segment_workers: int = 4) -> str:
+        """
+        Analyze a video, pre-processing it first when preprocess_options are set.
+        
+        Timeline entries of a pre-processed video are mapped back to times in the original video.
+        With a report cache, a video whose content was analyzed before with the same prompt,
+        model and settings gets the stored report back without calling the API.
+        
+        Args:
+            video_path: Path to the video file
+            segment_seconds: Analyze in segments of about this many seconds (0 = single request)
+            segment_workers: Number of segments analyzed at the same time
+            
+        Returns:
+            Generated report as a string
+            
+        Raises:
+            ReportGenerationError: No usable report could be generated
+        """
+        if self.report_cache is None:
+            return self._generate_report(video_path, segment_seconds, segment_workers)
+        
+        video_sha256 = self.report_cache.digest(video_path)
+        variant = json.dumps({
+            "segment_seconds": segment_seconds,
+            "preprocess": asdict(self.preprocess_options) if self.preprocess_options else None,
+        }, sort_keys=True)
+        key = report_key(video_sha256, self._report_prompt(), self.model_name, generation_config, variant)
+        report = self.report_cache.get(key)
+        if report is not None:
+            metrics.count("report_cache_hits")
+            print(f"Using cached report for {video_path} (video sha256 {video_sha256[:12]}).")
+            return report
+        
+        report = self._generate_report(video_path, segment_seconds, segment_workers)
+        # Partial analyses are retried next time instead of being served from the cache.
+        if UNAVAILABLE_DESCRIPTION not in report:
+            self.report_cache.set(key, report, video_sha256, os.path.basename(video_path), self.model_name)
+        return report
+
+    def _generate_report(self, video_path: str, segment_seconds: float, segment_workers: int) -> str:
+        if self.preprocess_options is None:
+            return self._analyze(video_path, segment_seconds, segment_workers)
+        
+        with tempfile.TemporaryDirectory() as preprocess_dir:
+            processed_path = os.path.join(preprocess_dir, os.path.basename(os.path.splitext(video_path)[0]) + ".mp4")
+            try:
+                with metrics.timer("preprocess") as preprocess:
+                    timestamp_map = preprocess_video(video_path, processed_path, self.preprocess_options)
+            except Exception as e:
+                raise ReportGenerationError(f"Pre-processing failed: {e}") from e
+            print(f"Pre-processing completed in {preprocess.seconds:.2f} seconds.")
+            # The pre-processed copy is temporary, so its upload is not worth remembering.
+            report = self._analyze(processed_path, segment_seconds, segment_workers, remember_upload=False)
+        return remap_report(report, timestamp_map)
+
+    def _analyze(self, video_path: str, segment_seconds: float, segment_workers: int, remember_upload=True) -> str:
+        if segment_seconds > 0:
+            return self.analyze_video_segmented(video_path, segment_seconds, segment_workers)
+        return self.analyze_video(video_path, remember_upload)
+
+def save_report(report: str, video_path: str, output_dir: str) -> str:
+    """
+    Write a report next to the others as construction_report_<video>_<timestamp>.md.
+    
+    Returns:
+        Path of the written report
+    """
+    # Get current date and time for the report filename
+    current_datetime = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    
+    # Save the report to a file
+    video_name = os.path.splitext(os.path.basename(video_path))[0]
+    report_filename = f"construction_report_{video_name}_{current_datetime}.md"
+    report_path = os.path.join(output_dir, report_filename)
+    
+    with open(report_path, 'w') as f:
+        f.write(report)
+    return report_path
+
+def add_preprocess_args(parser: argparse.ArgumentParser):
+    parser.add_argument("--preprocess", action="store_true",
+                        help="Transcode to a low frame rate and resolution and trim idle footage before analysis")
+    parser.add_argument("--preprocess-fps", type=float, default=PreprocessOptions.fps,
+                        help="Frame rate of the pre-processed video")
+    parser.add_argument("--preprocess-height", type=int, default=PreprocessOptions.height,
+                        help="Height in pixels of the pre-processed video")
+    parser.add_argument("--idle-threshold", type=float, default=PreprocessOptions.idle_threshold,
+                        help="Mean grey-level change between sampled frames below which footage counts as idle")
+    parser.add_argument("--min-idle-seconds", type=float, default=PreprocessOptions.min_idle_seconds,
+                        help="Only idle stretches at least this long are trimmed")
+    parser.add_argument("--keep-idle-seconds", type=float, default=PreprocessOptions.keep_idle_seconds,
+                        help="Seconds kept from the start of each trimmed idle stretch")
+
+def add_report_cache_args(parser: argparse.ArgumentParser):
+    parser.add_argument("--report-cache", default=DEFAULT_CACHE_PATH,
+                        help="Cache of finished reports keyed by video content, see report_cache.py")
+    parser.add_argument("--no-report-cache", action="store_true",
+                        help="Always analyze the video, ignoring cached reports")
+    parser.add_argument("--report-cache-max-mb", type=float, default=64,
+                        help="Evict least recently used cached reports above this size")
+    parser.add_argument("--report-cache-max-days", type=float, default=90,
+                        help="Cached reports older than this many days are analyzed again")
+
+def add_report_index_args(parser: argparse.ArgumentParser):
+    parser.add_argument("--structured", action="store_true",
+                        help="Ask Gemini for JSON matching a response schema and render the report from it "
+                             "(single-request analysis; segmented timelines are indexed from their text)")
+    parser.add_argument("--report-index",
+                        help="Per-interval index of tools and materials, see report_index.py "
+                             "(defaults to report_index.sqlite in the output directory)")
+    parser.add_argument("--no-report-index", action="store_true", help="Do not index saved reports")
+    parser.add_argument("--project-id", help="Prisma Project id recorded with the indexed reports")
+    parser.add_argument("--worker-id", help="Prisma Worker id recorded with the indexed reports")
+
+def add_retry_args(parser: argparse.ArgumentParser):
+    parser.add_argument("--api-attempts", type=int, default=RetryPolicy.max_attempts,
+                        help="Attempts per upload or model call before giving up on transient errors")
+    parser.add_argument("--api-timeout", type=float, default=RetryPolicy.call_timeout,
+                        help="Deadline in seconds of a single model call")
+    parser.add_argument("--api-deadline", type=float, default=RetryPolicy.total_deadline,
+                        help="No retry is started this many seconds after the first attempt of a call")
+
+def retry_policy_from_args(args):
+    return RetryPolicy(max_attempts=args.api_attempts, call_timeout=args.api_timeout,
+                       total_deadline=args.api_deadline)
+
+def report_index_from_args(args, output_dir: str):
+    """ReportIndex for the --report-index flags, or None when indexing is off."""
+    if args.no_report_index:
+        return None
+    return ReportIndex(args.report_index or os.path.join(output_dir, "report_index.sqlite"))
+
+def report_cache_from_args(args):
+    """ReportCache for the --report-cache flags, or None when caching is off."""
+    if args.no_report_cache:
+        return None
+    return ReportCache(args.report_cache, max_bytes=int(args.report_cache_max_mb * 1024 * 1024),
+                       max_age_seconds=args.report_cache_max_days * 86400)
+
+def preprocess_options_from_args(args):
+    """PreprocessOptions for the --preprocess flags, or None when pre-processing is off."""
+    if not args.preprocess:
+        return None
+    return PreprocessOptions(fps=args.preprocess_fps, height=args.preprocess_height,
+                             idle_threshold=args.idle_threshold, min_idle_seconds=args.min_idle_seconds,
+                             keep_idle_seconds=args.keep_idle_seconds)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate a construction site report from a helmet-cam video.")
+    parser.add_argument("--video", default="video3.mp4",
+                        help="Video file to analyze, relative to this directory")
+    parser.add_argument("--upload-mode", choices=["files", "inline"], default="files",
+                        help="Upload through the Gemini Files API or inline the video bytes in the request")
+    parser.add_argument("--fake", action="store_true",
+                        help="Use the offline fake Gemini client instead of the real API")
+    parser.add_argument("--segment-seconds", type=float, default=0,
+                        help="Analyze the video in segments of about this many seconds in parallel (0 = single request)")
+    parser.add_argument("--segment-workers", type=int, default=4,
+                        help="Number of segments analyzed concurrently")
+    add_preprocess_args(parser)
+    add_report_cache_args(parser)
+    add_report_index_args(parser)
+    add_prisma_args(parser)
+    add_retry_args(parser)
+    metrics.add_metrics_args(parser)
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
+    
     # Start timing the entire process
     total_start_time = time.time()
     
@@ -132,32 +422,46 @@ def main():
     current_dir = os.path.dirname(os.path.abspath(__file__))
     
     # Specific video file to analyze
-    video_filename = "video3.mp4"
+    video_filename = args.video
     video_path = os.path.join(current_dir, video_filename)
     
     # Check if the specified video file exists
     if not os.path.exists(video_path):
         print(f"Error: The specified video file '{video_filename}' does not exist in the current directory.")
-        return
+        metrics.write_from_args(args, "generate_reports", "failed")
+        sys.exit(1)
     
     print(f"Using video file: {video_filename}")
+    # Opened up front, so a missing migration fails before the video is analyzed.
+    prisma_store = prisma_store_from_args(args)
     
     # Create analyzer and analyze the video
-    analyzer = ConstructionVideoAnalyzer()
-    report = analyzer.analyze_video(video_path)
-    
-    # Get current date and time for the report filename
-    current_datetime = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    analyzer = ConstructionVideoAnalyzer(client=FakeGenAI() if args.fake else None, upload_mode=args.upload_mode,
+                                         preprocess_options=preprocess_options_from_args(args),
+                                         report_cache=report_cache_from_args(args), structured=args.structured,
+                                         retry_policy=retry_policy_from_args(args))
+    try:
+        report = analyzer.generate_report(video_path, args.segment_seconds, args.segment_workers)
+    except ReportGenerationError as e:
+        # No report file: a cron run must see the failure instead of a garbage report.
+        print(f"Error during analysis: {e}")
+        metrics.write_from_args(args, "generate_reports", "failed")
+        sys.exit(1)
     
-    # Save the report to a file
-    report_filename = f"construction_report_{os.path.splitext(video_filename)[0]}_{current_datetime}.md"
-    report_path = os.path.join(current_dir, report_filename)
-    
-    with open(report_path, 'w') as f:
-        f.write(report)
+    report_path = save_report(report, video_path, current_dir)
+    report_index = report_index_from_args(args, current_dir)
+    if report_index is not None:
+        intervals = report_index.add(report_path, report, os.path.basename(video_path), args.project_id, args.worker_id)
+        print(f"Indexed {intervals} timeline intervals in {report_index.path}")
+    if prisma_store is not None:
+        prisma_store.add_report_files([report_path], args.project_id, args.worker_id)
+        counts = prisma_store.aggregate()
+        print(f"Recorded the report in {prisma_store.path}, {counts['summaries']} daily summaries updated")
     
     # Calculate and display total execution time
     total_elapsed = time.time() - total_start_time
+    metrics.observe("run", total_elapsed)
+    metrics.write_from_args(args, "generate_reports", "ok")
     
     # Format the time nicely
     hours, remainder = divmod(int(total_elapsed), 3600)
@@ -0,0 +1,171 @@
+"""
+Optional pre-processing of helmet-cam videos before analysis.
+
+Raw GoPro footage is transcoded to an analysis-grade profile (low frame rate and
+resolution), and long stretches where the camera barely changes (a worker standing
+idle, the helmet set down) are cut down to a few seconds. A `TimestampMap` keeps
+track of what was cut so report times can be mapped back to the original recording.
+"""
+import re
+import subprocess
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+
+import numpy as np
+
+from segments import TIMELINE_LINE_RE, format_seconds, probe_duration
+
+
+@dataclass
+class PreprocessOptions:
+    fps: float = 2.0
+    height: int = 480
+    # Mean absolute difference (0-255 grey levels) between sampled frames below
+    # which the camera is considered idle.
+    idle_threshold: float = 3.0
+    # Idle stretches shorter than this are kept untouched.
+    min_idle_seconds: float = 20.0
+    # How much of each long idle stretch is kept so the model still sees it.
+    keep_idle_seconds: float = 3.0
+    sample_fps: float = 2.0
+
+
+class TimestampMap:
+    """Maps times in the pre-processed video back to times in the original recording."""
+
+    def __init__(self, ranges: list[tuple[float, float]]):
+        """
+        Args:
+            ranges: Kept (start, end) ranges of the original video, in order
+        """
+        self.original_starts = [start for start, _ in ranges]
+        self.durations = [end - start for start, end in ranges]
+        self.output_starts = []
+        position = 0.0
+        for duration in self.durations:
+            self.output_starts.append(position)
+            position += duration
+        self.output_duration = position
+
+    def to_original(self, seconds: float, end: bool = False) -> float:
+        """
+        Args:
+            seconds: Time in the pre-processed video
+            end: Whether this is the end of an interval; a time on a cut then maps to
+                the end of the range before the cut instead of the start of the next one
+        """
+        index = bisect_left(self.output_starts, seconds) if end else bisect_right(self.output_starts, seconds)
+        index = max(index - 1, 0)
+        offset = min(seconds - self.output_starts[index], self.durations[index])
+        return self.original_starts[index] + offset
+
+    def dropped_seconds(self) -> float:
+        if not self.original_starts:
+            return 0.0
+        return self.original_starts[-1] + self.durations[-1] - self.original_starts[0] - self.output_duration
+
+
+def frame_activity(video_path: str, sample_fps: float = 2.0, width: int = 64, height: int = 36) -> np.ndarray:
+    """
+    Mean absolute grey-level difference between consecutive sampled frames.
+
+    ffmpeg decodes the video straight to tiny greyscale frames, so this costs a
+    fraction of a real-time decode and stays small in memory.
+
+    Returns:
+        One value per sampled frame (the first is 0), at `sample_fps` samples per second
+    """
+    raw = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", video_path, "-an",
+         "-vf", f"fps={sample_fps},scale={width}:{height}", "-pix_fmt", "gray", "-f", "rawvideo", "pipe:1"],
+        check=True, capture_output=True,
+    ).stdout
+    frames = np.frombuffer(raw, dtype=np.uint8).reshape(-1, height * width).astype(np.int16)
+    activity = np.zeros(len(frames), dtype=np.float32)
+    if len(frames) > 1:
+        activity[1:] = np.abs(np.diff(frames, axis=0)).mean(axis=1)
+    return activity
+
+
+def active_ranges(activity: np.ndarray, sample_fps: float, duration: float,
+                  options: PreprocessOptions) -> list[tuple[float, float]]:
+    """
+    Ranges of the original video to keep.
+
+    Runs of idle samples longer than `min_idle_seconds` are cut down to their
+    first `keep_idle_seconds`; everything else is kept.
+    """
+    idle = activity < options.idle_threshold
+    if len(idle):
+        idle[0] = idle[1] if len(idle) > 1 else False
+    # Start and end sample indices of every idle run.
+    edges = np.diff(np.concatenate(([0], idle.astype(np.int8), [0])))
+    run_starts = np.flatnonzero(edges == 1)
+    run_ends = np.flatnonzero(edges == -1)
+
+    ranges = []
+    position = 0.0
+    for run_start, run_end in zip(run_starts, run_ends):
+        idle_start = run_start / sample_fps
+        idle_end = min(run_end / sample_fps, duration)
+        if idle_end - idle_start < options.min_idle_seconds:
+            continue
+        cut_start = idle_start + options.keep_idle_seconds
+        if cut_start > position:
+            ranges.append((position, cut_start))
+        position = idle_end
+    if position < duration:
+        ranges.append((position, duration))
+    return ranges
+
+
+def _select_expression(ranges: list[tuple[float, float]]) -> str:
+    return "+".join(f"between(t,{start:.3f},{end:.3f})" for start, end in ranges)
+
+
+def transcode(video_path: str, output_path: str, ranges: list[tuple[float, float]], options: PreprocessOptions):
+    """Re-encode the kept ranges at the analysis frame rate and resolution, in one ffmpeg pass."""
+    select = _select_expression(ranges)
+    subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-y", "-i", video_path,
+            "-vf", f"select='{select}',setpts=N/FRAME_RATE/TB,fps={options.fps},scale=-2:{options.height}",
+            "-af", f"aselect='{select}',asetpts=N/SR/TB",
+            "-c:v", "libx264", "-preset", "veryfast", "-crf", "28",
+            "-c:a", "aac", "-b:a", "64k", "-movflags", "+faststart",
+            output_path,
+        ],
+        check=True,
+    )
+
+
+def preprocess_video(video_path: str, output_path: str, options: PreprocessOptions) -> TimestampMap:
+    """
+    Produce an analysis-grade copy of a video with long idle stretches trimmed.
+
+    Returns:
+        Map from times in `output_path` back to times in `video_path`
+    """
+    duration = probe_duration(video_path)
+    activity = frame_activity(video_path, options.sample_fps)
+    ranges = active_ranges(activity, options.sample_fps, duration, options) or [(0.0, duration)]
+    transcode(video_path, output_path, ranges, options)
+    timestamp_map = TimestampMap(ranges)
+    print(f"Pre-processed video: kept {timestamp_map.output_duration:.0f}s of {duration:.0f}s "
+          f"({timestamp_map.dropped_seconds():.0f}s of idle footage trimmed) at {options.fps:g} fps, "
+          f"{options.height}p.")
+    return timestamp_map
+
+
+def remap_report(report: str, timestamp_map: TimestampMap) -> str:
+    """Rewrite the `[Second a-b]` entries of a report from pre-processed to original video times."""
+    def remap_line(line: str) -> str:
+        match = TIMELINE_LINE_RE.match(line)
+        if not match:
+            return line
+        start = timestamp_map.to_original(float(match.group(1)))
+        end = timestamp_map.to_original(float(match.group(2)), end=True)
+        return re.sub(r"\[Second\s+[\d.]+\s*-\s*[\d.]+\]",
+                      f"[Second {format_seconds(round(start, 1))}-{format_seconds(round(end, 1))}]",
+                      line, count=1, flags=re.IGNORECASE)
+    return "\n".join(remap_line(line) for line in report.split("\n"))
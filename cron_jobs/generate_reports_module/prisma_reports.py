@@ -0,0 +1,357 @@
+"""
+Generated reports in the web app's Prisma database, and daily rollups of them.
+
+`import` records report files as `Report` rows (fileSize, reportDate, projectId,
+workerId) in one transaction per call, skipping files that are already recorded.
+`aggregate` maintains `ReportDailySummary`, one row per project, subcontractor and
+day, incrementally: only reports created since the last run's watermark are read,
+and just the (project, day) pairs they fall on are recomputed, through the
+(projectId, reportDate) index, so the cost follows the new reports rather than the
+size of the table. The tables come from the `report_daily_summaries` migration:
+
+    npx prisma migrate deploy
+    python prisma_reports.py import --project-id clx123 --worker-id clx456 reports/*.md
+    python prisma_reports.py aggregate --timezone America/Los_Angeles
+    python prisma_reports.py summary --project-id clx123 --since 2025-04-28
+
+The database is DATABASE_URL's (`file:./dev.db` is relative to the prisma
+directory, as for Prisma itself), or --prisma-db. Prisma keeps DateTime columns
+in SQLite as epoch milliseconds, so that is what is written here too.
+"""
+import argparse
+import datetime
+import os
+import random
+import sqlite3
+import string
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Optional
+from zoneinfo import ZoneInfo
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import cron_runtime
+import metrics
+
+PRISMA_DIR = Path(__file__).resolve().parents[2] / "prisma"
+REPORT_NAME_PREFIX = "construction_report_"
+WATERMARK_NAME = "report_daily_summary"
+# SQLite builds before 3.32 allow at most 999 bound parameters per statement.
+MAX_PARAMETERS = 900
+
+_id_lock = threading.Lock()
+_id_counter = random.randrange(36 ** 4)
+
+
+def _base36(number: int, width: int) -> str:
+    digits = string.digits + string.ascii_lowercase
+    text = ""
+    while number:
+        number, remainder = divmod(number, 36)
+        text = digits[remainder] + text
+    return text.rjust(width, "0")[-width:]
+
+
+def new_id() -> str:
+    """A 25 character, time-ordered id shaped like the cuid() Prisma generates."""
+    global _id_counter
+    with _id_lock:
+        _id_counter = (_id_counter + 1) % 36 ** 4
+        counter = _id_counter
+    random_part = "".join(random.choices(string.digits + string.ascii_lowercase, k=12))
+    return "c" + _base36(int(time.time() * 1000), 8) + _base36(counter, 4) + random_part
+
+
+def to_millis(moment: datetime.datetime) -> int:
+    """Epoch milliseconds of a datetime, naive ones being local time."""
+    return int(moment.timestamp() * 1000)
+
+
+def from_millis(millis: int, tz: Optional[datetime.tzinfo] = None) -> datetime.datetime:
+    return datetime.datetime.fromtimestamp(millis / 1000, tz)
+
+
+def default_database_path() -> Path:
+    """The SQLite file of DATABASE_URL, defaulting to prisma/dev.db."""
+    url = cron_runtime.env("DATABASE_URL") or "file:./dev.db"
+    if not url.startswith("file:"):
+        raise ValueError(f"DATABASE_URL {url!r} is not a SQLite database")
+    path = Path(url[len("file:"):].split("?", 1)[0])
+    return path if path.is_absolute() else PRISMA_DIR / path
+
+
+def report_file_details(report_path: str) -> tuple[str, datetime.datetime]:
+    """
+    Title and report date of a saved report.
+
+    The date is the timestamp save_report puts in construction_report_<video>_<YYYYMMDD_HHMMSS>.md,
+    or the file's modification time for other names.
+    """
+    stem = Path(report_path).stem
+    if stem.startswith(REPORT_NAME_PREFIX):
+        video_name, _, stamp = stem[len(REPORT_NAME_PREFIX):].rpartition("_")
+        video_name, _, day = video_name.rpartition("_")
+        try:
+            return (f"Construction report: {video_name}",
+                    datetime.datetime.strptime(f"{day}_{stamp}", "%Y%m%d_%H%M%S"))
+        except ValueError:
+            pass
+    return stem, datetime.datetime.fromtimestamp(os.path.getmtime(report_path))
+
+
+class PrismaReportStore:
+    """`Report` rows and their daily summaries in the Prisma SQLite database."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        if not self.path.exists():
+            raise FileNotFoundError(f"No Prisma database at {self.path}")
+        # Shared by the batch runner's worker threads; writes take the database lock up front.
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        tables = {name for (name,) in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        missing = {"Report", "ReportDailySummary", "AggregationWatermark"} - tables
+        if missing:
+            raise RuntimeError(f"{self.path} has no {', '.join(sorted(missing))} table; "
+                               f"apply the Prisma migrations first (npx prisma migrate deploy)")
+
+    @contextmanager
+    def _transaction(self):
+        """BEGIN IMMEDIATE, so a concurrent writer waits here rather than failing mid-transaction."""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def _recorded_paths(self, conn, file_paths: list[str]) -> set[str]:
+        recorded = set()
+        for start in range(0, len(file_paths), MAX_PARAMETERS):
+            batch = file_paths[start:start + MAX_PARAMETERS]
+            recorded.update(path for (path,) in conn.execute(
+                f"SELECT filePath FROM Report WHERE filePath IN ({', '.join('?' * len(batch))})", batch
+            ))
+        return recorded
+
+    def add_reports(self, reports: Iterable[dict]) -> int:
+        """
+        Insert reports in one transaction; those whose filePath is already recorded are skipped.
+
+        Args:
+            reports: Dicts with file_path, project_id and worker_id, and optionally title,
+                report_date (datetime), file_size and file_type
+
+        Returns:
+            Number of rows inserted
+        """
+        reports = list(reports)
+        now = to_millis(datetime.datetime.now())
+        with metrics.timer("prisma_insert"), self._transaction() as conn:
+            recorded = self._recorded_paths(conn, list({report["file_path"] for report in reports}))
+            rows = []
+            for report in reports:
+                if report["file_path"] in recorded:
+                    continue
+                recorded.add(report["file_path"])
+                rows.append((
+                    new_id(), report.get("title"), report["file_path"], report.get("file_type", "md"),
+                    report.get("file_size"), to_millis(report.get("report_date") or datetime.datetime.now()),
+                    now, now, report["project_id"], report["worker_id"],
+                ))
+            conn.executemany(
+                'INSERT INTO Report (id, title, filePath, fileType, fileSize, reportDate, createdAt, updatedAt, '
+                'projectId, workerId) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows
+            )
+        metrics.count("reports_recorded", len(rows))
+        return len(rows)
+
+    def add_report_files(self, report_paths: Iterable[str], project_id: str, worker_id: str) -> int:
+        """Record saved report files for one project and worker, see `add_reports`."""
+        reports = []
+        for report_path in report_paths:
+            title, report_date = report_file_details(report_path)
+            reports.append(dict(file_path=str(report_path), title=title, report_date=report_date,
+                                file_size=os.path.getsize(report_path), project_id=project_id,
+                                worker_id=worker_id))
+        return self.add_reports(reports)
+
+    def watermark(self, name: str = WATERMARK_NAME) -> tuple[int, str]:
+        """(createdAt, id) of the last report aggregated under `name`, (-1, "") before the first run."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT lastCreatedAt, lastReportId FROM AggregationWatermark WHERE name = ?", (name,)
+            ).fetchone()
+        return tuple(row) if row else (-1, "")
+
+    def aggregate(self, tz: Optional[datetime.tzinfo] = None, name: str = WATERMARK_NAME,
+                  settle_seconds: float = 0) -> dict:
+        """
+        Bring the daily summaries up to date with the reports created since the last run.
+
+        Every (project, day) a new report falls on is recomputed exactly from its
+        reports, so re-running is harmless and reports dated in the past land in
+        the right day. Summaries and the watermark are written in one transaction.
+
+        Args:
+            tz: Time zone the days are counted in, None for local time
+            name: Watermark name, one per independently maintained rollup
+            settle_seconds: Leave reports created this recently for the next run, when
+                other writers' createdAt can be older than their commit
+
+        Returns:
+            Counts of the reports read and the days and summary rows rewritten
+        """
+        cutoff = to_millis(datetime.datetime.now()) - int(settle_seconds * 1000)
+        with metrics.timer("aggregate"), self._transaction() as conn:
+            row = conn.execute(
+                "SELECT lastCreatedAt, lastReportId FROM AggregationWatermark WHERE name = ?", (name,)
+            ).fetchone()
+            last_created_at, last_id = row if row else (-1, "")
+            # Walks the (createdAt, id) index from the watermark on.
+            new_reports = conn.execute(
+                'SELECT createdAt, id, projectId, reportDate FROM Report '
+                'WHERE (createdAt, id) > (?, ?) AND createdAt <= ? ORDER BY createdAt, id',
+                (last_created_at, last_id, cutoff),
+            ).fetchall()
+            touched = {(project_id, from_millis(report_date, tz).date())
+                       for _, _, project_id, report_date in new_reports}
+
+            summaries = 0
+            now = to_millis(datetime.datetime.now())
+            for project_id, day in sorted(touched):
+                start = datetime.datetime.combine(day, datetime.time(), tz)
+                end = datetime.datetime.combine(day + datetime.timedelta(days=1), datetime.time(), tz)
+                rows = conn.execute(
+                    'SELECT w.subcontractorId, COUNT(*), COUNT(DISTINCT r.workerId), '
+                    'COALESCE(SUM(r.fileSize), 0), MIN(r.reportDate), MAX(r.reportDate) '
+                    'FROM Report r JOIN Worker w ON w.id = r.workerId '
+                    'WHERE r.projectId = ? AND r.reportDate >= ? AND r.reportDate < ? '
+                    'GROUP BY w.subcontractorId',
+                    (project_id, to_millis(start), to_millis(end)),
+                ).fetchall()
+                conn.execute('DELETE FROM ReportDailySummary WHERE projectId = ? AND day = ?',
+                             (project_id, day.isoformat()))
+                conn.executemany(
+                    'INSERT INTO ReportDailySummary (projectId, day, subcontractorId, reportCount, workerCount, '
+                    'totalFileSize, firstReportAt, lastReportAt, updatedAt) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    [(project_id, day.isoformat(), *row, now) for row in rows],
+                )
+                summaries += len(rows)
+
+            if new_reports:
+                last_created_at, last_id = new_reports[-1][:2]
+                conn.execute(
+                    'INSERT INTO AggregationWatermark (name, lastCreatedAt, lastReportId, updatedAt) '
+                    'VALUES (?, ?, ?, ?) ON CONFLICT (name) DO UPDATE SET lastCreatedAt = excluded.lastCreatedAt, '
+                    'lastReportId = excluded.lastReportId, updatedAt = excluded.updatedAt',
+                    (name, last_created_at, last_id, now),
+                )
+        metrics.count("reports_aggregated", len(new_reports))
+        metrics.count("summary_days_recomputed", len(touched))
+        return {"reports": len(new_reports), "days": len(touched), "summaries": summaries}
+
+    def rebuild(self, tz: Optional[datetime.tzinfo] = None, name: str = WATERMARK_NAME,
+                settle_seconds: float = 0) -> dict:
+        """Drop every summary and the watermark and aggregate all reports again, e.g. after a time zone change."""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM ReportDailySummary")
+            conn.execute("DELETE FROM AggregationWatermark WHERE name = ?", (name,))
+        return self.aggregate(tz, name, settle_seconds)
+
+    def daily_summaries(self, project_id: Optional[str] = None, subcontractor_id: Optional[str] = None,
+                        since: Optional[datetime.date] = None, until: Optional[datetime.date] = None) -> list[tuple]:
+        """(day, projectId, subcontractorId, reportCount, workerCount, totalFileSize) rows, oldest first."""
+        conditions, params = [], []
+        for column, value in (("projectId", project_id), ("subcontractorId", subcontractor_id)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            conditions.append("day >= ?")
+            params.append(since.isoformat())
+        if until is not None:
+            conditions.append("day < ?")
+            params.append(until.isoformat())
+        with self._lock:
+            return self.conn.execute(
+                "SELECT day, projectId, subcontractorId, reportCount, workerCount, totalFileSize "
+                f"FROM ReportDailySummary WHERE {' AND '.join(conditions) or '1'} "
+                "ORDER BY day, projectId, subcontractorId", params
+            ).fetchall()
+
+    def close(self):
+        self.conn.close()
+
+
+def add_prisma_args(parser: argparse.ArgumentParser):
+    parser.add_argument("--record-reports", action="store_true",
+                        help="Record saved reports as Prisma Report rows of --project-id and --worker-id, "
+                             "and update the daily summaries, see prisma_reports.py")
+    parser.add_argument("--prisma-db", type=Path, help="Prisma SQLite database, defaults to DATABASE_URL's")
+
+
+def prisma_store_from_args(args) -> Optional[PrismaReportStore]:
+    """PrismaReportStore for the --record-reports flags, or None when recording is off."""
+    if not args.record_reports:
+        return None
+    if not (args.project_id and args.worker_id):
+        sys.exit("--record-reports needs --project-id and --worker-id")
+    return PrismaReportStore(args.prisma_db or default_database_path())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prisma-db", type=Path, help="Prisma SQLite database, defaults to DATABASE_URL's")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="Record report files as Report rows")
+    import_parser.add_argument("reports", nargs="*", type=Path,
+                               help="Report files, defaults to every construction_report_*.md next to this script")
+    import_parser.add_argument("--project-id", required=True, help="Prisma Project id of the reports")
+    import_parser.add_argument("--worker-id", required=True, help="Prisma Worker id of the reports")
+
+    for command, help_text in (("aggregate", "Update the daily summaries with the reports created since the last run"),
+                               ("rebuild", "Recompute every daily summary from scratch")):
+        aggregate_parser = commands.add_parser(command, help=help_text)
+        aggregate_parser.add_argument("--timezone", type=ZoneInfo, default=os.getenv("REPORT_TIMEZONE") or None,
+                                      help="IANA time zone the days are counted in "
+                                           "(REPORT_TIMEZONE, defaults to the local one)")
+        aggregate_parser.add_argument("--settle-seconds", type=float, default=0,
+                                      help="Leave reports created this recently for the next run")
+        metrics.add_metrics_args(aggregate_parser)
+
+    summary_parser = commands.add_parser("summary", help="Print the daily summaries")
+    summary_parser.add_argument("--project-id", help="Prisma Project id")
+    summary_parser.add_argument("--subcontractor-id", help="Prisma Subcontractor id")
+    summary_parser.add_argument("--since", type=datetime.date.fromisoformat, help="First day")
+    summary_parser.add_argument("--until", type=datetime.date.fromisoformat, help="Day after the last one")
+    args = parser.parse_args()
+
+    store = PrismaReportStore(args.prisma_db or default_database_path())
+    if args.command == "import":
+        report_paths = args.reports or sorted(Path(__file__).resolve().parent.glob("construction_report_*.md"))
+        inserted = store.add_report_files(report_paths, args.project_id, args.worker_id)
+        print(f"Recorded {inserted} of {len(report_paths)} reports in {store.path}")
+    elif args.command in ("aggregate", "rebuild"):
+        update = store.aggregate if args.command == "aggregate" else store.rebuild
+        counts = update(args.timezone, settle_seconds=args.settle_seconds)
+        print(f"Aggregated {counts['reports']} new reports into {counts['summaries']} summaries "
+              f"over {counts['days']} project days")
+        metrics.write_from_args(args, "report_aggregation", "ok")
+    else:
+        for day, project_id, subcontractor_id, reports, workers, size in store.daily_summaries(
+                args.project_id, args.subcontractor_id, args.since, args.until):
+            print(f"{day}  {project_id}  {subcontractor_id}  {reports:>5} reports  {workers:>4} workers  "
+                  f"{size / 1024:>10.1f} KiB")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
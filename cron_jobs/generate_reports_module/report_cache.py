@@ -0,0 +1,220 @@
+"""
+Cache of finished reports keyed by the content of the analyzed video.
+
+The key combines a streaming SHA-256 of the video bytes with everything else that
+shapes the answer: the prompt template, the model name, the generation config and
+how the video was sent (segmenting, pre-processing). Re-running a video, e.g. after
+the report file could not be written, returns the stored report without calling Gemini.
+
+    python report_cache.py stats
+    python report_cache.py list --limit 20
+    python report_cache.py purge --older-than-days 30
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parent / "report_cache.sqlite"
+
+
+def video_digest(video_path: str, chunk_size: int = 8 * 1024 * 1024) -> str:
+    """SHA-256 of a video file, read in chunks so the whole file is never held in memory."""
+    digest = hashlib.sha256()
+    with open(video_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def report_key(video_sha256: str, prompt: str, model_name: str, generation_config: dict, variant: str = "") -> str:
+    """Cache key of a report; `variant` describes how the video was sent, e.g. its segment length."""
+    digest = hashlib.sha256()
+    for part in (video_sha256, prompt, model_name, json.dumps(generation_config, sort_keys=True), variant):
+        encoded = part.encode("utf-8")
+        # Length-prefix each part so ("ab", "c") and ("a", "bc") never collide.
+        digest.update(len(encoded).to_bytes(8, "big"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+class ReportCache:
+    """
+    SQLite-backed report cache shared by the batch runner's worker threads.
+
+    Entries older than `max_age_seconds` are dropped, then the least recently used
+    ones until the stored reports fit in `max_bytes`. Video digests are remembered by
+    path, size and modification time, so an unchanged video is only hashed once.
+    """
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH, max_bytes: int = 64 * 1024 * 1024,
+                 max_age_seconds: float = 90 * 86400):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS reports (
+                    key TEXT PRIMARY KEY,
+                    video_sha256 TEXT NOT NULL,
+                    video_name TEXT NOT NULL,
+                    model_name TEXT NOT NULL,
+                    report TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS video_digests (
+                    file_key TEXT PRIMARY KEY,
+                    sha256 TEXT NOT NULL
+                )
+                """
+            )
+            self.conn.commit()
+        self.evict()
+
+    def digest(self, video_path: str) -> str:
+        """Content hash of a video, reused while its path, size and modification time are unchanged."""
+        stat = os.stat(video_path)
+        file_key = f"{os.path.abspath(video_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+        with self._lock:
+            row = self.conn.execute("SELECT sha256 FROM video_digests WHERE file_key = ?", (file_key,)).fetchone()
+        if row:
+            return row[0]
+        sha256 = video_digest(video_path)
+        with self._lock:
+            self.conn.execute("INSERT OR REPLACE INTO video_digests (file_key, sha256) VALUES (?, ?)",
+                              (file_key, sha256))
+            self.conn.commit()
+        return sha256
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT report FROM reports WHERE key = ? AND created_at > ?", (key, now - self.max_age_seconds)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.conn.execute("UPDATE reports SET accessed_at = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            self.hits += 1
+        return row[0]
+
+    def set(self, key: str, report: str, video_sha256: str, video_name: str, model_name: str):
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO reports "
+                "(key, video_sha256, video_name, model_name, report, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, video_sha256, video_name, model_name, report, len(report.encode("utf-8")), now, now),
+            )
+            self.conn.commit()
+        self.evict()
+
+    def evict(self):
+        """Drop entries older than `max_age_seconds`, then least recently used ones until under `max_bytes`."""
+        with self._lock:
+            self.conn.execute("DELETE FROM reports WHERE created_at <= ?", (time.time() - self.max_age_seconds,))
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM reports").fetchone()[0]
+            if total > self.max_bytes:
+                rows = self.conn.execute("SELECT key, size FROM reports ORDER BY accessed_at").fetchall()
+                doomed = []
+                for key, size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    doomed.append((key,))
+                    total -= size
+                self.conn.executemany("DELETE FROM reports WHERE key = ?", doomed)
+            self.conn.commit()
+
+    def purge(self, older_than_seconds: Optional[float] = None, video_name: Optional[str] = None) -> int:
+        """Delete entries, all of them or only those matching the filters. Returns the number deleted."""
+        conditions, params = [], []
+        if older_than_seconds is not None:
+            conditions.append("created_at <= ?")
+            params.append(time.time() - older_than_seconds)
+        if video_name is not None:
+            conditions.append("video_name = ?")
+            params.append(video_name)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            deleted = self.conn.execute(f"DELETE FROM reports{where}", params).rowcount
+            # Digests are cheap to recompute; drop them with a full purge.
+            if not conditions:
+                self.conn.execute("DELETE FROM video_digests")
+            self.conn.commit()
+        return deleted
+
+    def entries(self, limit: int = 50) -> list:
+        with self._lock:
+            return self.conn.execute(
+                "SELECT key, video_name, model_name, size, created_at, accessed_at FROM reports "
+                "ORDER BY accessed_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, total, oldest = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), MIN(created_at) FROM reports"
+            ).fetchone()
+        return {"entries": count, "bytes": total, "oldest": oldest}
+
+    def close(self):
+        self.conn.close()
+
+
+def _format_time(timestamp: Optional[float]) -> str:
+    if timestamp is None:
+        return "-"
+    return datetime.datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cache", type=Path, default=DEFAULT_CACHE_PATH, help="Report cache database")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="Number, total size and age of the cached reports")
+    list_parser = commands.add_parser("list", help="Most recently used entries")
+    list_parser.add_argument("--limit", type=int, default=50)
+    purge_parser = commands.add_parser("purge", help="Delete entries (all of them without filters)")
+    purge_parser.add_argument("--older-than-days", type=float, help="Only entries created more than this long ago")
+    purge_parser.add_argument("--video", help="Only entries for this video file name")
+    args = parser.parse_args()
+
+    # No eviction on open: inspecting the cache should not change it.
+    cache = ReportCache(args.cache, max_bytes=float("inf"), max_age_seconds=float("inf"))
+    if args.command == "stats":
+        stats = cache.stats()
+        print(f"{stats['entries']} reports, {stats['bytes'] / 1024:.1f} KiB, oldest {_format_time(stats['oldest'])}")
+    elif args.command == "list":
+        for key, video_name, model_name, size, created_at, accessed_at in cache.entries(args.limit):
+            print(f"{key[:12]}  {video_name}  {model_name}  {size / 1024:.1f} KiB  "
+                  f"created {_format_time(created_at)}  used {_format_time(accessed_at)}")
+    elif args.command == "purge":
+        older_than = args.older_than_days * 86400 if args.older_than_days is not None else None
+        print(f"Deleted {cache.purge(older_than, args.video)} cached reports")
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
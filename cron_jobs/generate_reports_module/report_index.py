@@ -0,0 +1,181 @@
+"""
+Per-interval index of generated reports, for aggregate queries without re-reading reports.
+
+Every saved report gets a row keyed by its file path (the `filePath` of its Prisma
+`Report` row), with its summary sections as JSON, and one row per 5-second interval
+with the materials and tool uses split out into indexed tables:
+
+    python report_index.py tools --since 2025-04-28 --project clx123
+    python report_index.py tools --tool "nail gun" --since 2025-04-28
+    python report_index.py materials --report construction_report_video3_20250502_101500.md
+"""
+import argparse
+import datetime
+import json
+import os
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+from typing import Optional
+
+# structured_report's imports need the shared cron_jobs modules when this runs as a script.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from structured_report import SECTIONS, parse_report
+
+
+class ReportIndex:
+    """SQLite tables of reports, their intervals, materials and tool uses."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Shared by the batch runner's worker threads.
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock:
+            self.conn.execute("PRAGMA foreign_keys=ON")
+            self.conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS reports (
+                    id INTEGER PRIMARY KEY,
+                    report_path TEXT NOT NULL UNIQUE,
+                    video_name TEXT NOT NULL,
+                    project_id TEXT,
+                    worker_id TEXT,
+                    recorded_at TEXT NOT NULL,
+                    sections TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS intervals (
+                    id INTEGER PRIMARY KEY,
+                    report_id INTEGER NOT NULL REFERENCES reports (id) ON DELETE CASCADE,
+                    start_s REAL NOT NULL,
+                    end_s REAL NOT NULL,
+                    action TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS interval_materials (
+                    interval_id INTEGER NOT NULL REFERENCES intervals (id) ON DELETE CASCADE,
+                    report_id INTEGER NOT NULL REFERENCES reports (id) ON DELETE CASCADE,
+                    material TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS tool_uses (
+                    interval_id INTEGER NOT NULL REFERENCES intervals (id) ON DELETE CASCADE,
+                    report_id INTEGER NOT NULL REFERENCES reports (id) ON DELETE CASCADE,
+                    tool TEXT NOT NULL,
+                    count INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS reports_project_recorded_idx ON reports (project_id, recorded_at);
+                CREATE INDEX IF NOT EXISTS reports_worker_recorded_idx ON reports (worker_id, recorded_at);
+                CREATE INDEX IF NOT EXISTS reports_recorded_idx ON reports (recorded_at);
+                CREATE INDEX IF NOT EXISTS intervals_report_idx ON intervals (report_id, start_s);
+                CREATE INDEX IF NOT EXISTS interval_materials_report_idx ON interval_materials (report_id, material);
+                CREATE INDEX IF NOT EXISTS interval_materials_interval_idx ON interval_materials (interval_id);
+                CREATE INDEX IF NOT EXISTS tool_uses_report_idx ON tool_uses (report_id, tool);
+                CREATE INDEX IF NOT EXISTS tool_uses_tool_idx ON tool_uses (tool, report_id);
+                CREATE INDEX IF NOT EXISTS tool_uses_interval_idx ON tool_uses (interval_id);
+                """
+            )
+            self.conn.commit()
+
+    def add(self, report_path: str, report: str, video_name: str, project_id: Optional[str] = None,
+            worker_id: Optional[str] = None, recorded_at: Optional[datetime.datetime] = None) -> int:
+        """
+        Index a markdown report, replacing any earlier index of the same report file.
+
+        Returns:
+            Number of intervals indexed
+        """
+        # Stored absolute, so lookups do not depend on the directory the report was saved from.
+        report_path = str(Path(report_path).resolve())
+        data = parse_report(report)
+        sections = {field: data[field] for field, _ in SECTIONS}
+        recorded_at = (recorded_at or datetime.datetime.now()).isoformat(timespec="seconds")
+        with self._lock:
+            self.conn.execute("DELETE FROM reports WHERE report_path = ?", (report_path,))
+            report_id = self.conn.execute(
+                "INSERT INTO reports (report_path, video_name, project_id, worker_id, recorded_at, sections) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (report_path, video_name, project_id, worker_id, recorded_at, json.dumps(sections)),
+            ).lastrowid
+            for interval in data["intervals"]:
+                interval_id = self.conn.execute(
+                    "INSERT INTO intervals (report_id, start_s, end_s, action) VALUES (?, ?, ?, ?)",
+                    (report_id, interval["start_s"], interval["end_s"], interval["action"]),
+                ).lastrowid
+                self.conn.executemany(
+                    "INSERT INTO interval_materials (interval_id, report_id, material) VALUES (?, ?, ?)",
+                    [(interval_id, report_id, material) for material in interval["materials"]],
+                )
+                self.conn.executemany(
+                    "INSERT INTO tool_uses (interval_id, report_id, tool, count) VALUES (?, ?, ?, ?)",
+                    [(interval_id, report_id, tool["name"], tool["count"]) for tool in interval["tools"]],
+                )
+            self.conn.commit()
+        return len(data["intervals"])
+
+    def _report_filter(self, project_id=None, worker_id=None, since=None, until=None, report_path=None):
+        conditions, params = [], []
+        for column, value in (("project_id", project_id), ("worker_id", worker_id), ("report_path", report_path)):
+            if value is not None:
+                conditions.append(f"r.{column} = ?")
+                params.append(value)
+        if since is not None:
+            conditions.append("r.recorded_at >= ?")
+            params.append(since.isoformat(timespec="seconds"))
+        if until is not None:
+            conditions.append("r.recorded_at < ?")
+            params.append(until.isoformat(timespec="seconds"))
+        return (" AND ".join(conditions) or "1"), params
+
+    def tool_usage(self, tool: Optional[str] = None, **filters) -> list[tuple[str, int]]:
+        """Total uses per tool over the matching reports, most used first."""
+        where, params = self._report_filter(**filters)
+        if tool is not None:
+            where += " AND t.tool = ?"
+            params.append(tool.lower())
+        with self._lock:
+            return self.conn.execute(
+                f"SELECT t.tool, SUM(t.count) FROM tool_uses t JOIN reports r ON r.id = t.report_id "
+                f"WHERE {where} GROUP BY t.tool ORDER BY SUM(t.count) DESC", params
+            ).fetchall()
+
+    def material_usage(self, **filters) -> list[tuple[str, int]]:
+        """Number of intervals each material was used in over the matching reports."""
+        where, params = self._report_filter(**filters)
+        with self._lock:
+            return self.conn.execute(
+                f"SELECT m.material, COUNT(*) FROM interval_materials m JOIN reports r ON r.id = m.report_id "
+                f"WHERE {where} GROUP BY m.material ORDER BY COUNT(*) DESC", params
+            ).fetchall()
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index", type=Path,
+                        default=Path(os.path.dirname(os.path.abspath(__file__))) / "report_index.sqlite",
+                        help="Report index database")
+    parser.add_argument("query", choices=["tools", "materials"])
+    parser.add_argument("--tool", help="Only this tool (tools query)")
+    parser.add_argument("--project", help="Prisma Project id")
+    parser.add_argument("--worker", help="Prisma Worker id")
+    parser.add_argument("--report", type=lambda path: str(Path(path).resolve()),
+                        help="Report file path, relative to the current directory")
+    parser.add_argument("--since", type=datetime.datetime.fromisoformat, help="Reports recorded at or after this time")
+    parser.add_argument("--until", type=datetime.datetime.fromisoformat, help="Reports recorded before this time")
+    args = parser.parse_args()
+
+    index = ReportIndex(args.index)
+    filters = dict(project_id=args.project, worker_id=args.worker, since=args.since, until=args.until,
+                   report_path=args.report)
+    rows = index.tool_usage(args.tool, **filters) if args.query == "tools" else index.material_usage(**filters)
+    for name, total in rows:
+        print(f"{total:>8}  {name}")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+End-to-end latency of single-shot vs segmented video analysis against the fake Gemini client.
+
+The fake model's latency grows linearly with the duration of the attached video
+(`--seconds-per-video-second`), which is how the real model behaves for long
+recordings. Videos are stand-in files, so neither ffmpeg nor the network is needed.
+
+    python segment_bench.py --video-minutes 30 --segment-seconds 120 --workers 1 4 8
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from fake_genai import FakeGenAI
+from generate_reports import ConstructionVideoAnalyzer
+from segments import Segment, parse_timeline
+
+
+def make_fake_splitter(client: FakeGenAI, duration: float):
+    """Splitter producing stand-in segment files, with durations registered on the fake client."""
+    def splitter(video_path, segment_seconds, output_dir):
+        segments = []
+        start = 0.0
+        index = 0
+        while start < duration:
+            end = min(start + segment_seconds, duration)
+            path = os.path.join(output_dir, f"segment_{index:04d}.mp4")
+            with open(path, "wb") as f:
+                f.write(b"\0" * 1024)
+            client.video_durations[os.path.abspath(path)] = end - start
+            segments.append(Segment(path, start, end))
+            start = end
+            index += 1
+        return segments
+    return splitter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video-minutes", type=float, default=20)
+    parser.add_argument("--segment-seconds", type=float, default=120)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--latency", type=float, default=0.5, help="Fixed fake model latency per call")
+    parser.add_argument("--seconds-per-video-second", type=float, default=0.005,
+                        help="Extra fake model latency per second of attached video")
+    args = parser.parse_args()
+
+    duration = args.video_minutes * 60
+    with tempfile.TemporaryDirectory() as work_dir:
+        video_path = os.path.join(work_dir, "bench.mp4")
+        with open(video_path, "wb") as f:
+            f.write(b"\0" * 1024)
+
+        def new_analyzer():
+            client = FakeGenAI(latency=args.latency, processing_seconds=0,
+                               seconds_per_video_second=args.seconds_per_video_second)
+            client.video_durations[os.path.abspath(video_path)] = duration
+            analyzer = ConstructionVideoAnalyzer(client=client, upload_store_path=os.path.join(work_dir, "uploads.json"))
+            return client, analyzer
+
+        _, analyzer = new_analyzer()
+        start = time.perf_counter()
+        analyzer.analyze_video(video_path)
+        single = time.perf_counter() - start
+
+        rows = [("single-shot", single, None)]
+        for workers in args.workers:
+            client, analyzer = new_analyzer()
+            start = time.perf_counter()
+            report = analyzer.analyze_video_segmented(video_path, args.segment_seconds, workers,
+                                                      splitter=make_fake_splitter(client, duration))
+            elapsed = time.perf_counter() - start
+            timeline = parse_timeline(report)
+            covered = timeline[-1][1] if timeline else 0
+            rows.append((f"segmented, {workers} workers", elapsed, covered))
+
+    print(f"\n{args.video_minutes:g} minute video, {args.segment_seconds:g}s segments")
+    for label, elapsed, covered in rows:
+        coverage = f", timeline to {covered:g}s" if covered is not None else ""
+        print(f"{label:<24} {elapsed:>8.2f}s  ({single / elapsed:.1f}x{coverage})")
+
+
+if __name__ == "__main__":
+    main()
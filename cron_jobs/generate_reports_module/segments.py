@@ -0,0 +1,222 @@
+import csv
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import metrics
+from gemini_calls import GeminiCallError, RetryPolicy, generate_with_retry
+
+# Per-segment request: only the timeline and raw observations, the summary
+# sections are written once from the merged timeline.
+segment_analysis_format = """
+You are a specialized AI assistant for construction managers and project managers.
+
+You will be given a segment of a video where a construction worker is wearing a helmet with a GoPro camera attached to it, recorded in a POV (point of view) format.
+
+For the per five second analysis, group your observations in 5-second increments, with seconds counted from the start of this segment.
+For each five seconds, describe what the construction worker is doing, what materials they used in that moment if any, and what tools they used in that moment, if any, along with the action of the tool that was taken.
+
+For instance, when they shoot a nail with a nail gun into a piece of wood, you will report: "Tool used: nail gun (1 time)" or if the nail gun was used 3 times in 5 seconds it will say "Tool used: nail gun (3 times)", etc.
+
+Your answer will follow this format and contain nothing else:
+
+## Segment Notes
+- Site: [What is visible on the site]
+- Work completed: [Observable completed work]
+- Work in progress: [Observable ongoing work]
+- Materials: [Visible materials and equipment]
+- Safety: [Visible safety measures or concerns]
+- Weather: [Visible weather conditions]
+
+## Second by Second Video Analysis
+- [Second 0-5]: [Description of action, materials used, tools used]
+- [Second 5-10]: [Description of action, materials used, tools used]
+...
+
+Use construction industry specific terminology.
+"""
+
+summary_instructions = """
+The video was analyzed in consecutive segments. Below are the notes from every segment and the merged second by second timeline, with seconds counted from the start of the full video.
+
+Write the report in the format above from these notes. Copy the "Second by Second Video Analysis" section exactly as given, do not renumber or shorten it.
+"""
+
+TIMELINE_LINE_RE = re.compile(r"^\s*[-*]\s*\[Second\s+(\d+(?:\.\d+)?)\s*-\s*(\d+(?:\.\d+)?)\]\s*:?\s*(.*)$",
+                              re.IGNORECASE)
+
+# Timeline description of a segment whose analysis failed.
+UNAVAILABLE_DESCRIPTION = "Analysis unavailable for this part of the video"
+
+
+@dataclass
+class Segment:
+    path: str
+    start_s: float
+    end_s: float
+
+
+@dataclass
+class SegmentResult:
+    segment: Segment
+    notes: str = ""
+    timeline: list = None
+    error: Optional[BaseException] = None
+    elapsed: float = 0.0
+
+
+def probe_duration(video_path: str) -> float:
+    """Duration of a video in seconds, read with ffprobe."""
+    output = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "default=nw=1:nk=1", video_path],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return float(output.strip())
+
+
+def split_video(video_path: str, segment_seconds: float, output_dir: str) -> list[Segment]:
+    """
+    Cut a video into roughly `segment_seconds` long pieces without re-encoding.
+
+    ffmpeg can only cut on keyframes when stream copying, so segments are not
+    exactly `segment_seconds` long; the real start and end of each piece are taken
+    from the segment list ffmpeg writes.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    segment_list = os.path.join(output_dir, "segments.csv")
+    subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-y", "-i", video_path,
+            "-map", "0", "-c", "copy", "-f", "segment", "-segment_time", str(segment_seconds),
+            "-reset_timestamps", "1", "-segment_list", segment_list, "-segment_list_type", "csv",
+            os.path.join(output_dir, "segment_%04d.mp4"),
+        ],
+        check=True,
+    )
+    segments = []
+    with open(segment_list, newline="") as f:
+        for filename, start, end in csv.reader(f):
+            segments.append(Segment(os.path.join(output_dir, filename), float(start), float(end)))
+    return segments
+
+
+def parse_timeline(text: str) -> list[tuple[float, float, str]]:
+    """Pull the `- [Second a-b]: ...` entries out of a model answer."""
+    entries = []
+    for line in text.splitlines():
+        match = TIMELINE_LINE_RE.match(line)
+        if match:
+            entries.append((float(match.group(1)), float(match.group(2)), match.group(3).strip()))
+    return entries
+
+
+def complete_lines(text: str) -> str:
+    """Drop the last line of a cut-off answer, unless it ended with a newline."""
+    return text if text.endswith("\n") else text[:text.rfind("\n") + 1]
+
+
+def format_seconds(seconds: float) -> str:
+    return f"{seconds:g}" if seconds != int(seconds) else str(int(seconds))
+
+
+def format_timeline(entries: list[tuple[float, float, str]]) -> str:
+    return "\n".join(f"- [Second {format_seconds(start)}-{format_seconds(end)}]: {description}"
+                     for start, end, description in entries)
+
+
+def segment_notes(text: str) -> str:
+    """The notes section of a segment answer (everything before the timeline)."""
+    match = re.search(r"^##\s*Second by Second", text, re.MULTILINE | re.IGNORECASE)
+    notes = text[:match.start()] if match else text
+    return re.sub(r"^##\s*Segment Notes\s*", "", notes.strip(), flags=re.IGNORECASE).strip()
+
+
+def merge_timelines(results: list[SegmentResult]) -> list[tuple[float, float, str]]:
+    """
+    Shift every segment's timeline by the segment start and concatenate them in order.
+
+    A failed segment keeps the entries it produced before failing, followed by a gap
+    entry up to the segment end.
+    """
+    merged = []
+    for result in sorted(results, key=lambda result: result.segment.start_s):
+        offset = result.segment.start_s
+        covered = offset
+        for start, end, description in result.timeline or []:
+            end = min(end + offset, result.segment.end_s)
+            merged.append((round(start + offset, 1), round(end, 1), description))
+            covered = max(covered, end)
+        if result.error is not None and covered < result.segment.end_s:
+            merged.append((round(covered, 1), round(result.segment.end_s, 1),
+                           f"{UNAVAILABLE_DESCRIPTION} ({result.error})"))
+    return merged
+
+
+def analyze_segments(model, video_part_for: Callable, segments: list[Segment], generation_config: dict,
+                     max_workers: int = 4, policy: Optional[RetryPolicy] = None) -> list[SegmentResult]:
+    """
+    Analyze segments concurrently with a bounded thread pool.
+
+    A failing segment is recorded on its result instead of failing the whole video;
+    the complete timeline lines it streamed before failing are kept.
+    """
+    def analyze(segment: Segment) -> SegmentResult:
+        result = SegmentResult(segment)
+        start_time = time.time()
+        try:
+            text = generate_with_retry(
+                model,
+                [{"text": segment_analysis_format}, video_part_for(segment.path)],
+                generation_config,
+                policy,
+                f"Segment {segment.start_s:.0f}-{segment.end_s:.0f}s",
+            )
+            result.notes = segment_notes(text)
+            result.timeline = parse_timeline(text)
+        except GeminiCallError as e:
+            print(f"Segment {segment.start_s:.0f}-{segment.end_s:.0f}s failed: {e}")
+            result.error = e
+            partial = complete_lines(e.partial_text)
+            result.notes = segment_notes(partial)
+            result.timeline = parse_timeline(partial)
+        except Exception as e:
+            print(f"Segment {segment.start_s:.0f}-{segment.end_s:.0f}s failed: {e}")
+            result.error = e
+        result.elapsed = time.time() - start_time
+        metrics.observe("segment", result.elapsed)
+        print(f"Segment {segment.start_s:.0f}-{segment.end_s:.0f}s analyzed in {result.elapsed:.2f} seconds.")
+        return result
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(analyze, segments))
+
+
+def stitch_report(model, report_format: str, results: list[SegmentResult], generation_config: dict,
+                  policy: Optional[RetryPolicy] = None) -> str:
+    """Write the summary sections from the merged timeline and attach the timeline itself."""
+    timeline = format_timeline(merge_timelines(results))
+    notes = "\n\n".join(
+        f"### Segment {format_seconds(round(result.segment.start_s, 1))}-"
+        f"{format_seconds(round(result.segment.end_s, 1))}s\n{result.notes}"
+        for result in sorted(results, key=lambda result: result.segment.start_s) if result.notes
+    )
+    report = generate_with_retry(
+        model,
+        [{"text": report_format + summary_instructions + "\n\n## Segment Notes\n" + notes
+                  + "\n\n## Second by Second Video Analysis\n" + timeline}],
+        generation_config,
+        policy,
+        "Report summary",
+    )
+    # Keep the exact merged timeline even if the model rewrote or truncated it.
+    heading = re.search(r"^##\s*Second by Second Video Analysis.*$", report, re.MULTILINE | re.IGNORECASE)
+    if heading:
+        report = report[:heading.start()].rstrip()
+    return report + "\n\n## Second by Second Video Analysis\n" + timeline + "\n"
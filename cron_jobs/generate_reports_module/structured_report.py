@@ -0,0 +1,175 @@
+"""
+Structured (JSON) report output and its conversion to and from the markdown report.
+
+In structured mode Gemini answers with JSON matching `REPORT_SCHEMA`: typed summary
+sections plus one record per 5-second interval with the action, the materials and
+the tools used with their counts. The JSON is rendered into the usual markdown
+report, in a canonical timeline format that `parse_report` reads back losslessly,
+so caching, segment stitching and timestamp remapping keep working on markdown.
+`parse_report` also reads free-form model timelines on a best-effort basis.
+"""
+import json
+import re
+
+from segments import TIMELINE_LINE_RE, format_seconds
+
+_STRING = {"type": "STRING"}
+_STRING_LIST = {"type": "ARRAY", "items": _STRING}
+
+REPORT_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "date_time": _STRING,
+        "site_overview": _STRING,
+        "work_completed": _STRING_LIST,
+        "work_in_progress": _STRING_LIST,
+        "materials_on_site": _STRING_LIST,
+        "safety_observations": _STRING_LIST,
+        "recommendations": _STRING_LIST,
+        "weather_conditions": _STRING,
+        "intervals": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "start_s": {"type": "NUMBER"},
+                    "end_s": {"type": "NUMBER"},
+                    "action": _STRING,
+                    "materials": _STRING_LIST,
+                    "tools": {
+                        "type": "ARRAY",
+                        "items": {
+                            "type": "OBJECT",
+                            "properties": {"name": _STRING, "count": {"type": "INTEGER"}},
+                            "required": ["name", "count"],
+                        },
+                    },
+                },
+                "required": ["start_s", "end_s", "action", "materials", "tools"],
+            },
+        },
+    },
+    "required": ["date_time", "site_overview", "work_completed", "work_in_progress", "materials_on_site",
+                 "safety_observations", "recommendations", "weather_conditions", "intervals"],
+}
+
+structured_instructions = """
+Answer with JSON only, matching the response schema, instead of markdown. Each report section is a field,
+and "intervals" holds one record per 5 seconds of video: "start_s" and "end_s" in seconds, "action" describing
+what the worker is doing, "materials" with the materials used in that interval and "tools" with every tool used
+and how many times it was used, e.g. {"name": "nail gun", "count": 3}. Use lowercase tool and material names.
+"""
+
+# Markdown heading of every summary section, in report order.
+SECTIONS = [
+    ("date_time", "Date and Time"),
+    ("site_overview", "Site Overview"),
+    ("work_completed", "Work Completed"),
+    ("work_in_progress", "Work In Progress"),
+    ("materials_on_site", "Materials On Site Visible By This Worker's Camera"),
+    ("safety_observations", "Safety Observations"),
+    ("recommendations", "Recommendations"),
+    ("weather_conditions", "Weather Conditions"),
+]
+
+TIMELINE_HEADING = "Second by Second Video Analysis"
+
+_MATERIALS_RE = re.compile(r"Materials?(?: used)?\s*:\s*(.*?)(?=\.?\s*Tools?(?: used)?\s*:|$)", re.IGNORECASE)
+_TOOLS_RE = re.compile(r"Tools?(?: used)?\s*:\s*(.*)$", re.IGNORECASE)
+_TOOL_COUNT_RE = re.compile(r"^(.*?)\s*\((\d+)\s*times?\)$", re.IGNORECASE)
+_NONE_VALUES = {"", "none", "n/a", "none visible", "no tools", "no materials"}
+
+
+def structured_generation_config(generation_config: dict) -> dict:
+    """`generation_config` asking for JSON that matches `REPORT_SCHEMA`."""
+    return {**generation_config, "response_mime_type": "application/json", "response_schema": REPORT_SCHEMA}
+
+
+def _items(value: str) -> list[str]:
+    items = [item.strip().rstrip(".").strip() for item in re.split(r",|;", value)]
+    return [item for item in items if item.lower() not in _NONE_VALUES]
+
+
+def _tools(value: str) -> list[dict]:
+    tools = []
+    for item in _items(value):
+        match = _TOOL_COUNT_RE.match(item)
+        if match:
+            tools.append({"name": match.group(1).strip().lower(), "count": int(match.group(2))})
+        else:
+            tools.append({"name": item.lower(), "count": 1})
+    return tools
+
+
+def format_interval(interval: dict) -> str:
+    """Canonical timeline line, e.g. `- [Second 0-5]: Frames wall. Materials used: 2x4 stud. Tools used: nail gun (2 times)`."""
+    materials = ", ".join(interval["materials"]) or "none"
+    tools = ", ".join(f"{tool['name']} ({tool['count']} {'time' if tool['count'] == 1 else 'times'})"
+                      for tool in interval["tools"]) or "none"
+    action = interval["action"].strip().rstrip(".")
+    return (f"- [Second {format_seconds(interval['start_s'])}-{format_seconds(interval['end_s'])}]: "
+            f"{action}. Materials used: {materials}. Tools used: {tools}")
+
+
+def parse_interval(line: str):
+    """Interval record of a `- [Second a-b]: ...` line, or None for any other line."""
+    match = TIMELINE_LINE_RE.match(line)
+    if not match:
+        return None
+    description = match.group(3).strip()
+    materials = _MATERIALS_RE.search(description)
+    tools = _TOOLS_RE.search(description)
+    cut = min(m.start() for m in (materials, tools) if m) if (materials or tools) else len(description)
+    return {
+        "start_s": float(match.group(1)),
+        "end_s": float(match.group(2)),
+        "action": description[:cut].strip().rstrip(".").strip(),
+        "materials": [item.lower() for item in _items(materials.group(1))] if materials else [],
+        "tools": _tools(tools.group(1)) if tools else [],
+    }
+
+
+def render_markdown(data: dict) -> str:
+    """Markdown report in the usual SITE PROGRESS REPORT layout from a structured answer."""
+    lines = ["# SITE PROGRESS REPORT", ""]
+    for field, heading in SECTIONS:
+        lines.append(f"## {heading}")
+        value = data.get(field) or ""
+        if isinstance(value, list):
+            lines.extend(f"- {item}" for item in value)
+        else:
+            lines.append(str(value))
+        lines.append("")
+    lines.append(f"## {TIMELINE_HEADING}")
+    lines.extend(format_interval(interval) for interval in data.get("intervals", []))
+    return "\n".join(lines) + "\n"
+
+
+def parse_report(report: str) -> dict:
+    """Structured form of a markdown report: the summary sections plus the interval records."""
+    fields = {heading.lower(): field for field, heading in SECTIONS}
+    data = {field: [] for field, _ in SECTIONS}
+    data["intervals"] = []
+    field = None
+    for line in report.splitlines():
+        heading = re.match(r"^##\s+(.*?)\s*$", line)
+        if heading:
+            field = fields.get(heading.group(1).lower())
+            if heading.group(1).lower().startswith(TIMELINE_HEADING.lower()):
+                field = "intervals"
+            continue
+        if field == "intervals":
+            interval = parse_interval(line)
+            if interval:
+                data["intervals"].append(interval)
+        elif field and line.strip():
+            data[field].append(re.sub(r"^\s*[-*]\s+", "", line).strip())
+    for field, _ in SECTIONS:
+        if field in ("date_time", "site_overview", "weather_conditions"):
+            data[field] = " ".join(data[field])
+    return data
+
+
+def report_from_json(text: str) -> str:
+    """Markdown report from a structured JSON answer."""
+    return render_markdown(json.loads(text))
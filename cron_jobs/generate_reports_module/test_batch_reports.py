@@ -0,0 +1,76 @@
+import os
+import sqlite3
+from pathlib import Path
+
+from batch_reports import BatchStatus, discover_videos, existing_report, process_video, record_done_reports
+from prisma_reports import PRISMA_DIR, PrismaReportStore
+
+
+def touch(directory, *names):
+    for name in names:
+        (directory / name).write_bytes(b"")
+
+
+def prisma_store(path):
+    """A migrated Prisma database with project "p1" and worker "w1"."""
+    conn = sqlite3.connect(path)
+    for migration in sorted((PRISMA_DIR / "migrations").glob("*/migration.sql")):
+        conn.executescript(migration.read_text())
+    conn.execute("INSERT INTO Subcontractor (id, name, updatedAt) VALUES ('s1', 'Framing Co', 0)")
+    conn.execute("INSERT INTO Project (id, name, updatedAt, clerkOrgId) VALUES ('p1', 'Tower', 0, 'org')")
+    conn.execute("INSERT INTO Worker (id, firstName, lastName, updatedAt, subcontractorId) "
+                 "VALUES ('w1', 'Ana', 'Ruiz', 0, 's1')")
+    conn.commit()
+    conn.close()
+    return PrismaReportStore(path)
+
+
+def recorded_paths(store):
+    return [path for (path,) in store.conn.execute("SELECT filePath FROM Report")]
+
+
+class StubAnalyzer:
+    def generate_report(self, video_path, segment_seconds, segment_workers):
+        return "# Report\n"
+
+
+def pending_names(video_dir, status):
+    return sorted(os.path.basename(path) for path in discover_videos(str(video_dir), status, str(video_dir), 3))
+
+
+def test_report_of_longer_stem_does_not_cover_prefix(tmp_path):
+    touch(tmp_path, "site_a.mp4", "site_a_b.mp4", "construction_report_site_a_b_20250502_101500.md")
+    status = BatchStatus(tmp_path / "batch_status.sqlite")
+
+    assert not existing_report(str(tmp_path / "site_a.mp4"), str(tmp_path))
+    assert existing_report(str(tmp_path / "site_a_b.mp4"), str(tmp_path))
+    assert pending_names(tmp_path, status) == ["site_a.mp4"]
+
+
+def test_report_name_must_end_in_timestamp(tmp_path):
+    touch(tmp_path, "site.mp4", "construction_report_site_notes.md", "construction_report_site_2025.md")
+    assert not existing_report(str(tmp_path / "site.mp4"), str(tmp_path))
+
+
+def test_videos_sharing_a_stem_are_tracked_separately(tmp_path):
+    touch(tmp_path, "x.mp4", "x.mov", "construction_report_x_20250502_101500.md")
+    status = BatchStatus(tmp_path / "batch_status.sqlite")
+    status.mark_done(str(tmp_path / "x.mp4"), str(tmp_path / "construction_report_x_20250502_101500.md"), 1.0)
+
+    assert pending_names(tmp_path, status) == ["x.mov"]
+
+
+def test_report_left_unrecorded_is_recorded_next_run(tmp_path):
+    touch(tmp_path, "site.mp4")
+    status = BatchStatus(tmp_path / "batch_status.sqlite")
+    store = prisma_store(tmp_path / "dev.db")
+
+    # An unknown project fails the insert after the video is marked done.
+    assert process_video(StubAnalyzer(), status, str(tmp_path / "site.mp4"), str(tmp_path), 0, 1,
+                         project_id="missing", worker_id="w1", prisma_store=store) is None
+    assert status.get(str(tmp_path / "site.mp4"))[0] == "done"
+    assert recorded_paths(store) == []
+
+    assert record_done_reports(status, store, "p1", "w1") == 1
+    assert [Path(path).parent for path in recorded_paths(store)] == [tmp_path]
+    assert record_done_reports(status, store, "p1", "w1") == 0
@@ -0,0 +1,178 @@
+"""
+Per-stage timers and counters for the cron jobs.
+
+Stages (fetch, extract, chunk, embed, insert, upload, model calls, ...) are timed
+with `timer` and quantities (pages, objects, tokens in and out, bytes) added up
+with `count`, all in one thread-safe, process-wide registry:
+
+    import metrics
+
+    with metrics.timer("fetch"):
+        page = await fetch(url)
+    metrics.count("tokens_in", usage.prompt_token_count)
+
+At the end of a run the jobs write the totals with `write_from_args`: appended as
+one JSON line per run (--metrics-json), and/or in the Prometheus text exposition
+format (--metrics-prom) for node_exporter's textfile collector. Stage timings are
+histograms, so p50/p95 can be read off the exported buckets.
+
+    python osha.py --metrics-json osha_metrics.jsonl --metrics-prom /var/lib/node_exporter/osha.prom
+"""
+import argparse
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+# Upper bounds in seconds of the stage duration histogram buckets; the last bucket is +Inf.
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+
+class Timer:
+    """Handed out by `Metrics.timer`; `seconds` is set when the block exits."""
+
+    def __init__(self):
+        self.seconds = 0.0
+
+
+class StageStats:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def quantile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the `fraction` quantile (the max for the +Inf bucket)."""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank and count:
+                return min(BUCKETS[index], self.max) if index < len(BUCKETS) else self.max
+        return self.max
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "seconds": round(self.total, 6),
+            "max_seconds": round(self.max, 6),
+            "p50_seconds": round(self.quantile(0.5), 6),
+            "p95_seconds": round(self.quantile(0.95), 6),
+        }
+
+
+class Metrics:
+    """Thread-safe registry of stage timings and counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}
+        self.counters = {}
+        self.started_at = time.time()
+
+    @contextmanager
+    def timer(self, stage: str):
+        """Time the block as one observation of `stage`, also when it raises."""
+        timed = Timer()
+        start = time.perf_counter()
+        try:
+            yield timed
+        finally:
+            timed.seconds = time.perf_counter() - start
+            self.observe(stage, timed.seconds)
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            self.stages.setdefault(stage, StageStats()).observe(seconds)
+
+    def count(self, name: str, value: float = 1):
+        if not value:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def reset(self):
+        with self._lock:
+            self.stages.clear()
+            self.counters.clear()
+            self.started_at = time.time()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "started_at": self.started_at,
+                "elapsed_seconds": round(time.time() - self.started_at, 6),
+                "stages": {name: stats.as_dict() for name, stats in sorted(self.stages.items())},
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    def to_prometheus(self, job: str) -> str:
+        """The registry in the Prometheus text exposition format, labelled with `job`."""
+        job = job.replace("\\", "\\\\").replace('"', '\\"')
+        lines = [
+            "# HELP cron_stage_seconds Duration of a pipeline stage.",
+            "# TYPE cron_stage_seconds histogram",
+        ]
+        with self._lock:
+            for stage, stats in sorted(self.stages.items()):
+                labels = f'job="{job}",stage="{stage}"'
+                cumulative = 0
+                for bound, count in zip(list(BUCKETS) + ["+Inf"], stats.buckets):
+                    cumulative += count
+                    lines.append(f'cron_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"cron_stage_seconds_sum{{{labels}}} {stats.total:.6f}")
+                lines.append(f"cron_stage_seconds_count{{{labels}}} {stats.count}")
+            for name, value in sorted(self.counters.items()):
+                metric = f"cron_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines.append(f'{metric}{{job="{job}"}} {value}')
+        lines.append("# TYPE cron_last_run_timestamp_seconds gauge")
+        lines.append(f'cron_last_run_timestamp_seconds{{job="{job}"}} {time.time():.0f}')
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path: Path, job: str, **fields):
+        """Append the registry as one JSON line, with `job` and any extra `fields` (e.g. status)."""
+        record = {"job": job, "finished_at": time.time(), **fields, **self.snapshot()}
+        with open(path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def write_prometheus(self, path: Path, job: str):
+        """Write the registry for the textfile collector, replacing the file atomically."""
+        path = Path(path)
+        temporary = path.with_name(path.name + f".{os.getpid()}.tmp")
+        temporary.write_text(self.to_prometheus(job))
+        os.replace(temporary, path)
+
+
+registry = Metrics()
+timer = registry.timer
+observe = registry.observe
+count = registry.count
+
+
+def add_metrics_args(parser: argparse.ArgumentParser):
+    parser.add_argument("--metrics-json", type=Path,
+                        help="Append this run's stage timings and counters as one JSON line to this file")
+    parser.add_argument("--metrics-prom", type=Path,
+                        help="Write this run's stage timings and counters in the Prometheus text format")
+
+
+def write_from_args(args, job: str, status: Optional[str] = None):
+    """Export the process-wide registry to the --metrics-json/--metrics-prom files, when given."""
+    if args.metrics_json is not None:
+        registry.write_json(args.metrics_json, job, **({"status": status} if status else {}))
+    if args.metrics_prom is not None:
+        registry.write_prometheus(args.metrics_prom, job)
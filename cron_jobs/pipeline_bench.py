@@ -0,0 +1,262 @@
+"""
+Offline end-to-end throughput benchmark of both cron jobs.
+
+scraper: osha.py crawls a local stub of the Jina reader, extracts with the
+rule-based parser, chunks, embeds with the fake embedder and ingests into an
+in-memory fake Weaviate. The stub serves the parser regression fixtures
+(parser_regression.py), topped up with synthetic standard pages.
+
+reports: batch_reports.py reports on a directory of generated videos through
+FakeGenAI, with the Files API upload flow and the report index.
+
+Fake latencies default to zero, so the numbers measure the pipelines' own
+overhead. Like pytest-benchmark, every benchmark runs --rounds times and the
+min/mean/stddev of the round times are reported, along with throughput and the
+per-stage timings and counters (metrics.py) of the fastest round. Results can be
+saved as a baseline and later runs compared against it, failing when a benchmark
+got slower by more than --tolerance:
+
+    python pipeline_bench.py --rounds 5 --save bench_baseline.json
+    python pipeline_bench.py --rounds 5 --compare bench_baseline.json --tolerance 0.2
+    python pipeline_bench.py --only reports --videos 40 --model-latency 0.05
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+CRON_JOBS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(CRON_JOBS_DIR / "safety_requirement_scrapers"))
+sys.path.insert(0, str(CRON_JOBS_DIR / "generate_reports_module"))
+sys.path.insert(0, str(CRON_JOBS_DIR))
+import metrics
+
+OSHA_INDEX_URL = "https://www.osha.gov/laws-regs/regulations/standardnumber/1926"
+SUBPARTS = ("C", "E", "L", "M", "P", "X")
+WORDS = ("employer shall ensure employees protective equipment scaffold guardrail excavation "
+         "competent person inspection hazard ladder fall protection system").split()
+
+
+def synthetic_page(number: str, rng: random.Random) -> str:
+    """A standard page shaped like the Jina reader output for osha.gov."""
+    paragraphs = []
+    # Most standards are short, a few run to tens of thousands of tokens and get chunked.
+    for index in range(rng.choice([5, 10, 20, 40, 400])):
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 80)))
+        paragraphs.append(f"**{number}({chr(97 + index % 26)})({index % 9 + 1})** {sentence}.")
+    return (
+        f"Title: {number} - Synthetic standard. | Occupational Safety and Health Administration\n\n"
+        f"URL Source: {OSHA_INDEX_URL}/{number}\n\n"
+        "Markdown Content:\n"
+        "*   **Part Number:** 1926\n"
+        "*   **Part Number Title:** Safety and Health Regulations for Construction\n"
+        f"*   **Subpart:** 1926 Subpart {rng.choice(SUBPARTS)}\n"
+        "*   **Subpart Title:** Synthetic\n"
+        f"*   **Standard Number:** [{number}]({OSHA_INDEX_URL}/{number})\n"
+        "*   **Title:** Synthetic standard.\n"
+        "*   **GPO Source:** [e-CFR](https://www.ecfr.gov)\n\n"
+        + "\n\n".join(paragraphs)
+        + "\n\n[Next Standard (1926.x)](https://www.osha.gov)\n"
+    )
+
+
+def scraper_pages(documents: int, seed: int = 0) -> dict[str, str]:
+    """standard number -> page text: the parser fixtures, topped up with synthetic pages."""
+    from parser_regression import FIXTURES_DIR
+
+    pages = {path.stem: path.read_text() for path in sorted(FIXTURES_DIR.glob("1926.*.md"))}
+    pages = dict(list(pages.items())[:documents])
+    rng = random.Random(seed)
+    number = 0
+    while len(pages) < documents:
+        if f"1926.{number}" not in pages:
+            pages[f"1926.{number}"] = synthetic_page(f"1926.{number}", rng)
+        number += 1
+    return pages
+
+
+def start_reader_stub(pages: dict[str, str], latency: float) -> ThreadingHTTPServer:
+    """Serve the index page and the standard pages the way the Jina reader addresses them."""
+    index_page = "Markdown Content:\n" + "\n".join(
+        f"*   [{number}]({OSHA_INDEX_URL}/{number})" for number in pages
+    )
+
+    class ReaderStubHandler(BaseHTTPRequestHandler):
+        # Keep-alive, like the real reader, so the crawler's connection pool is exercised.
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes; without this, delayed ACKs add ~40ms per page.
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            time.sleep(latency)
+            target = self.path.lstrip("/")
+            body = index_page if target == OSHA_INDEX_URL else pages.get(target.rsplit("/", 1)[-1])
+            if body is None:
+                self.send_error(404)
+                return
+            encoded = body.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; charset=utf-8")
+            self.send_header("Content-Length", str(len(encoded)))
+            self.end_headers()
+            self.wfile.write(encoded)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ReaderStubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_scraper(args, reader_url: str, work_dir: Path) -> int:
+    """One full scrape into a fresh fake Weaviate; returns the number of standards ingested."""
+    import osha
+    from fake_weaviate import FakeWeaviateClient
+
+    client = FakeWeaviateClient(insert_latency=args.insert_latency)
+    osha.main([
+        "--reader-url", reader_url, "--embedder", "fake", "--no-cache", "--full-rebuild",
+        "--concurrency", str(args.concurrency), "--fetch-rate", "1e6", "--fetch-burst", "1e6",
+        "--extract-rate", "1e6", "--manifest", str(work_dir / "manifest.json"),
+        "--embedding-cache", str(work_dir / "embedding_cache"), "--dead-letter", str(work_dir / "dead_letter.jsonl"),
+    ], weaviate_client=client)
+    return int(metrics.registry.counters.get("standards_extracted", 0))
+
+
+def run_reports(args, video_dir: Path, work_dir: Path) -> int:
+    """One batch over every video; returns the number of reports written."""
+    import batch_reports
+    from fake_genai import FakeGenAI
+
+    client = FakeGenAI(latency=args.model_latency, processing_seconds=0)
+    try:
+        batch_reports.main([
+            "--video-dir", str(video_dir), "--output-dir", str(work_dir), "--workers", str(args.workers),
+            "--upload-store", str(work_dir / "uploaded_videos.json"), "--no-report-cache",
+        ], client=client)
+    except SystemExit as e:
+        if e.code:
+            raise RuntimeError("Some videos failed") from e
+    return int(metrics.registry.counters.get("videos_reported", 0))
+
+
+def benchmark(name: str, run, rounds: int, verbose: bool) -> dict:
+    """Run `run(work_dir)` `rounds` times, each in a fresh directory with fresh metrics."""
+    times = []
+    fastest = None
+    for _ in range(rounds):
+        metrics.registry.reset()
+        with tempfile.TemporaryDirectory() as work_dir:
+            output = io.StringIO()
+            with contextlib.redirect_stdout(sys.stdout if verbose else output):
+                start = time.perf_counter()
+                items = run(Path(work_dir))
+                elapsed = time.perf_counter() - start
+        times.append(elapsed)
+        if fastest is None or elapsed < fastest[0]:
+            fastest = (elapsed, items, metrics.registry.snapshot())
+    elapsed, items, snapshot = fastest
+    return {
+        "name": name,
+        "rounds": rounds,
+        "min_seconds": min(times),
+        "mean_seconds": statistics.mean(times),
+        "stddev_seconds": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "items": items,
+        "items_per_second": items / elapsed if elapsed else 0.0,
+        "stages": snapshot["stages"],
+        "counters": snapshot["counters"],
+    }
+
+
+def print_result(result: dict):
+    print(f"\n{result['name']}: {result['items']} items, {result['items_per_second']:.1f}/s "
+          f"(min {result['min_seconds']:.3f}s, mean {result['mean_seconds']:.3f}s, "
+          f"stddev {result['stddev_seconds']:.3f}s over {result['rounds']} rounds)")
+    print(f"  {'stage':<18} {'count':>7} {'total s':>9} {'p50 s':>8} {'p95 s':>8}")
+    for stage, stats in result["stages"].items():
+        print(f"  {stage:<18} {stats['count']:>7} {stats['seconds']:>9.3f} "
+              f"{stats['p50_seconds']:>8.3f} {stats['p95_seconds']:>8.3f}")
+    print("  " + ", ".join(f"{name}={value:,}" for name, value in result["counters"].items()))
+
+
+def compare(results: list[dict], baseline_path: Path, tolerance: float) -> bool:
+    """Print the change against a saved baseline; False when a benchmark's min time regressed."""
+    with open(baseline_path) as f:
+        baseline = {result["name"]: result for result in json.load(f)["results"]}
+    ok = True
+    print(f"\nCompared with {baseline_path} (tolerance {tolerance:.0%}):")
+    for result in results:
+        before = baseline.get(result["name"])
+        if before is None:
+            print(f"  {result['name']}: not in the baseline")
+            continue
+        change = result["min_seconds"] / before["min_seconds"] - 1
+        regressed = change > tolerance
+        ok = ok and not regressed
+        print(f"  {result['name']}: min {before['min_seconds']:.3f}s -> {result['min_seconds']:.3f}s "
+              f"({change:+.1%}){'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", choices=["scraper", "reports"], help="Run a single benchmark")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--documents", type=int, default=60, help="Standards crawled by the scraper benchmark")
+    parser.add_argument("--concurrency", type=int, default=8, help="Scraper crawl concurrency")
+    parser.add_argument("--fetch-latency", type=float, default=0.0, help="Seconds the reader stub takes per page")
+    parser.add_argument("--insert-latency", type=float, default=0.0, help="Seconds per fake Weaviate batch request")
+    parser.add_argument("--videos", type=int, default=20, help="Videos reported by the reports benchmark")
+    parser.add_argument("--video-mb", type=float, default=4, help="Size of each generated video")
+    parser.add_argument("--workers", type=int, default=4, help="Videos reported concurrently")
+    parser.add_argument("--model-latency", type=float, default=0.0, help="Seconds FakeGenAI takes per call")
+    parser.add_argument("--save", type=Path, help="Write the results to this JSON file, e.g. as a baseline")
+    parser.add_argument("--compare", type=Path, help="Baseline written by --save to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Fail when a benchmark's min time grew by more than this fraction of the baseline")
+    parser.add_argument("--verbose", action="store_true", help="Show the jobs' own output")
+    args = parser.parse_args()
+
+    results = []
+    if args.only in (None, "scraper"):
+        pages = scraper_pages(args.documents)
+        server = start_reader_stub(pages, args.fetch_latency)
+        try:
+            reader_url = f"http://127.0.0.1:{server.server_address[1]}/"
+            results.append(benchmark("scraper", lambda work_dir: run_scraper(args, reader_url, work_dir),
+                                     args.rounds, args.verbose))
+        finally:
+            server.shutdown()
+            server.server_close()
+    if args.only in (None, "reports"):
+        with tempfile.TemporaryDirectory() as video_dir:
+            for index in range(args.videos):
+                with open(os.path.join(video_dir, f"helmet_cam_{index:03d}.mp4"), "wb") as f:
+                    f.write(os.urandom(int(args.video_mb * 1024 * 1024)))
+            results.append(benchmark("reports", lambda work_dir: run_reports(args, Path(video_dir), work_dir),
+                                     args.rounds, args.verbose))
+
+    for result in results:
+        print_result(result)
+    if args.save is not None:
+        with open(args.save, "w") as f:
+            json.dump({"created_at": time.time(), "arguments": {key: str(value) for key, value in vars(args).items()},
+                       "results": results}, f, indent=2)
+        print(f"\nResults written to {args.save}")
+    if args.compare is not None and not compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
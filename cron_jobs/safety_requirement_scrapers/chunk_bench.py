@@ -0,0 +1,112 @@
+"""
+Micro-benchmark of the chunker over the Part 1926 corpus.
+
+The corpus is every standard page the scraper has cached (osha_cache.sqlite),
+plus any recorded parser fixtures; with neither available a synthetic corpus of
+regulation-shaped text is generated. The legacy chunker (new encoder per call,
+two encodes per document, token-by-token loop) is timed against the Chunker.
+
+    python chunk_bench.py --repeat 3
+"""
+import argparse
+import random
+import sqlite3
+import time
+from pathlib import Path
+
+import tiktoken
+
+from chunking import Chunker
+from osha_parser import parse_standard_page
+from parser_regression import FIXTURES_DIR
+
+DEFAULT_CACHE = Path(__file__).resolve().parent / "osha_cache.sqlite"
+
+
+def load_corpus(cache_path: Path) -> list[str]:
+    documents = []
+    if cache_path.exists():
+        conn = sqlite3.connect(cache_path)
+        for (value,) in conn.execute("SELECT value FROM cache"):
+            parsed = parse_standard_page(value)
+            if parsed is not None:
+                documents.append(parsed["content"])
+        conn.close()
+    for page_path in sorted(FIXTURES_DIR.glob("1926.*.md")):
+        parsed = parse_standard_page(page_path.read_text())
+        if parsed is not None:
+            documents.append(parsed["content"])
+    return documents
+
+
+def synthetic_corpus(documents: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    words = ("employer shall ensure employees protective equipment scaffold guardrail excavation "
+             "competent person inspection hazard ladder fall protection system").split()
+    corpus = []
+    for number in range(documents):
+        paragraphs = []
+        # Most standards are short, a few (e.g. 1926.1101 asbestos) run to tens of thousands of tokens.
+        for index in range(rng.choice([5, 10, 20, 40, 400])):
+            sentence = " ".join(rng.choice(words) for _ in range(rng.randint(20, 80)))
+            paragraphs.append(f"**1926.{number}({chr(97 + index % 26)})({index % 9 + 1})** {sentence}.")
+        corpus.append("\n\n".join(paragraphs))
+    return corpus
+
+
+def legacy_chunk(document, max_tokens=6000):
+    """The chunking previously done in osha.py, kept here as the baseline."""
+    encoder = tiktoken.get_encoding("cl100k_base")
+    if len(encoder.encode(document)) < max_tokens:
+        return [document]
+    encoder = tiktoken.get_encoding("cl100k_base")
+    tokens = encoder.encode(document)
+    chunks = []
+    current_chunk = []
+    for token in tokens:
+        current_chunk.append(token)
+        if len(current_chunk) >= max_tokens:
+            chunks.append(encoder.decode(current_chunk))
+            current_chunk = []
+    if current_chunk:
+        chunks.append(encoder.decode(current_chunk))
+    return chunks
+
+
+def timed(label, function, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chunks = function()
+        best = min(best, time.perf_counter() - start)
+    total_chunks = sum(len(document_chunks) for document_chunks in chunks)
+    print(f"{label:<28} {best * 1000:>10.1f} ms  ({total_chunks} chunks)")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cache", type=Path, default=DEFAULT_CACHE)
+    parser.add_argument("--synthetic", type=int, default=500,
+                        help="Documents to generate when no scraped corpus is available")
+    parser.add_argument("--max-tokens", type=int, default=6000)
+    parser.add_argument("--overlap", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.cache)
+    source = "scraped"
+    if not corpus:
+        corpus = synthetic_corpus(args.synthetic)
+        source = "synthetic"
+    print(f"{len(corpus)} {source} documents, {sum(map(len, corpus)) / 1e6:.1f} MB of text")
+
+    chunker = Chunker(max_tokens=args.max_tokens, overlap_tokens=args.overlap)
+    legacy = timed("legacy", lambda: [legacy_chunk(document, args.max_tokens) for document in corpus], args.repeat)
+    single = timed("Chunker.chunk", lambda: [chunker.chunk(document) for document in corpus], args.repeat)
+    batch = timed("Chunker.chunk_many", lambda: chunker.chunk_many(corpus), args.repeat)
+    print(f"speedup: {legacy / single:.1f}x per document, {legacy / batch:.1f}x batched")
+
+
+if __name__ == "__main__":
+    main()
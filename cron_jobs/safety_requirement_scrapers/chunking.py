@@ -0,0 +1,119 @@
+import functools
+import re
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Optional
+
+import tiktoken
+
+# Boundaries to snap chunk ends to, best first: a regulation paragraph marker at
+# the start of a line ("(a)", "(b)(1)", "**1926.95(c)**"), a blank line, the end
+# of a sentence.
+PARAGRAPH_MARKER_RE = re.compile(
+    rb"\n(?=[ \t>*+-]*(?:\*\*)?(?:\d{4}\.\d+[A-Za-z]*)?\((?:[a-z]{1,3}|\d{1,3}|[ivxlc]{1,6})\))"
+)
+BLANK_LINE_RE = re.compile(rb"\n[ \t]*\n")
+SENTENCE_END_RE = re.compile(rb"[.;:](?=\s)")
+BOUNDARY_PATTERNS = (PARAGRAPH_MARKER_RE, BLANK_LINE_RE, SENTENCE_END_RE)
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoder(encoding_name: str = "cl100k_base") -> tiktoken.Encoding:
+    """Load a tiktoken encoding once per process."""
+    return tiktoken.get_encoding(encoding_name)
+
+
+class Chunker:
+    """
+    Token-bounded document chunker for the embedding model.
+
+    Each document is encoded exactly once. Chunk ends are snapped back to the
+    nearest paragraph marker, blank line or sentence end within `snap_window`
+    tokens of the limit, consecutive chunks share `overlap_tokens` tokens, and
+    chunk text is sliced from the original bytes (at character boundaries) rather
+    than decoded token by token.
+    """
+
+    def __init__(self, max_tokens: int = 6000, overlap_tokens: int = 0, snap_window: Optional[int] = None,
+                 encoding_name: str = "cl100k_base"):
+        """
+        Args:
+            max_tokens: Upper bound on tokens per chunk
+            overlap_tokens: Tokens repeated at the start of the next chunk
+            snap_window: How far back from `max_tokens` a chunk may end to land on a
+                boundary, defaults to a quarter of `max_tokens`
+            encoding_name: tiktoken encoding of the embedding model
+        """
+        if overlap_tokens >= max_tokens:
+            raise ValueError("overlap_tokens must be smaller than max_tokens")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.snap_window = snap_window if snap_window is not None else max_tokens // 4
+        self.encoder = get_encoder(encoding_name)
+
+    def encode(self, text: str) -> list[int]:
+        return self.encoder.encode(text, disallowed_special=())
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.encode(text))
+
+    def chunk(self, text: str) -> list[str]:
+        """Split one document; documents within the limit come back unchanged."""
+        return self.chunk_tokens(text, self.encode(text))
+
+    def chunk_many(self, texts: list[str], num_threads: int = 8) -> list[list[str]]:
+        """Split many documents, encoding them in one multi-threaded batch."""
+        token_lists = self.encoder.encode_batch(texts, num_threads=num_threads, disallowed_special=())
+        return [self.chunk_tokens(text, tokens) for text, tokens in zip(texts, token_lists)]
+
+    def chunk_tokens(self, text: str, tokens: list[int]) -> list[str]:
+        """Split a document whose tokens are already known."""
+        total = len(tokens)
+        if total <= self.max_tokens:
+            return [text]
+
+        # token_ends[i] is the byte offset just past token i within the document.
+        token_ends = list(accumulate(map(len, self.encoder.decode_tokens_bytes(tokens))))
+        text_bytes = text.encode("utf-8")
+        boundaries = [self._boundary_tokens(pattern, text_bytes, token_ends) for pattern in BOUNDARY_PATTERNS]
+
+        chunks = []
+        start = 0
+        while start < total:
+            end = min(start + self.max_tokens, total)
+            if end < total:
+                end = self._snap(end, start, boundaries)
+            byte_start = self._char_boundary(text_bytes, token_ends[start - 1]) if start else 0
+            byte_end = self._char_boundary(text_bytes, token_ends[end - 1])
+            chunks.append(text_bytes[byte_start:byte_end].decode("utf-8"))
+            if end >= total:
+                break
+            start = max(end - self.overlap_tokens, start + 1)
+        return chunks
+
+    @staticmethod
+    def _char_boundary(text_bytes: bytes, offset: int) -> int:
+        """
+        Move a byte offset forward past any UTF-8 continuation bytes.
+
+        Token boundaries can fall inside a multi-byte character ("§", "’"). Chunk
+        ends and the next chunk's start go through the same snap, so the character
+        lands whole in exactly one side of the cut instead of being dropped.
+        """
+        while offset < len(text_bytes) and text_bytes[offset] & 0xC0 == 0x80:
+            offset += 1
+        return offset
+
+    @staticmethod
+    def _boundary_tokens(pattern: re.Pattern, text_bytes: bytes, token_ends: list[int]) -> list[int]:
+        """Token counts that end exactly at or before each match of `pattern`."""
+        return sorted({bisect_right(token_ends, match.end()) for match in pattern.finditer(text_bytes)})
+
+    def _snap(self, end: int, start: int, boundaries: list[list[int]]) -> int:
+        """Move a chunk end back to the best boundary inside the snap window."""
+        lowest = max(start + self.overlap_tokens + 1, end - self.snap_window)
+        for candidates in boundaries:
+            index = bisect_right(candidates, end) - 1
+            if index >= 0 and candidates[index] >= lowest:
+                return candidates[index]
+        return end
@@ -0,0 +1,132 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Optional
+
+import httpx
+
+
+class TokenBucket:
+    """Async token-bucket rate limiter shared by every crawl worker."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate: Tokens added per second (sustained requests per second)
+            capacity: Maximum burst size, defaults to one second's worth of tokens
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0):
+        """Wait until `tokens` are available and take them."""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+@dataclass
+class CrawlResult:
+    index: int
+    url: str
+    output: Any = None
+    error: Optional[BaseException] = None
+    fetch_seconds: float = 0.0
+    extract_seconds: float = 0.0
+
+
+def make_http_client(jina_api_key: Optional[str], concurrency: int, timeout: float = 60.0) -> httpx.AsyncClient:
+    """Create a pooled HTTP client sized for the crawl concurrency."""
+    headers = {}
+    if jina_api_key:
+        headers["Authorization"] = "Bearer " + jina_api_key
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    return httpx.AsyncClient(headers=headers, limits=limits, timeout=timeout)
+
+
+async def fetch_text(client: httpx.AsyncClient, url: str, limiter: Optional[TokenBucket] = None) -> str:
+    """Fetch a page through the shared client, honouring the rate limiter."""
+    if limiter is not None:
+        await limiter.acquire()
+    response = await client.get(url)
+    response.raise_for_status()
+    return response.text
+
+
+async def crawl(
+    urls: Iterable[str],
+    fetch: Callable[[str], Awaitable[str]],
+    extract: Callable[[str, str], Awaitable[Any]],
+    concurrency: int = 8,
+    extract_limiter: Optional[TokenBucket] = None,
+) -> AsyncIterator[CrawlResult]:
+    """
+    Fetch and extract every url with at most `concurrency` documents in flight.
+
+    Fetches and LLM extraction calls of different documents overlap; results are
+    yielded as soon as they finish, so they are not in input order (use
+    `CrawlResult.index` to recover it). A failure on one url is reported on its
+    result instead of aborting the crawl.
+
+    Args:
+        urls: Urls to crawl
+        fetch: Coroutine returning the page text for a url
+        extract: Coroutine turning (url, page text) into an extracted document
+        concurrency: Maximum number of documents being fetched/extracted at once
+        extract_limiter: Optional rate limiter applied before each extraction call
+
+    Yields:
+        One CrawlResult per url
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    pending: asyncio.Queue = asyncio.Queue()
+    for item in enumerate(urls):
+        pending.put_nowait(item)
+    total = pending.qsize()
+    # Bounded so workers stop pulling new urls while the consumer is busy.
+    results: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+
+    async def worker():
+        while True:
+            try:
+                index, url = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            result = CrawlResult(index=index, url=url)
+            try:
+                start = time.perf_counter()
+                text = await fetch(url)
+                result.fetch_seconds = time.perf_counter() - start
+                if extract_limiter is not None:
+                    await extract_limiter.acquire()
+                start = time.perf_counter()
+                result.output = await extract(url, text)
+                result.extract_seconds = time.perf_counter() - start
+            except Exception as e:
+                result.error = e
+            await results.put(result)
+
+    workers = [asyncio.create_task(worker()) for _ in range(min(concurrency, total))]
+    try:
+        for _ in range(total):
+            yield await results.get()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
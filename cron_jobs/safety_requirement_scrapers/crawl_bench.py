@@ -0,0 +1,118 @@
+"""
+Offline throughput harness for the OSHA crawl pipeline.
+
+Starts a local stub of the Jina reader that serves fake standard pages with a
+configurable latency, pairs it with a fake extraction agent that sleeps like an
+LLM round trip, and times the crawl at several concurrency levels.
+
+    python crawl_bench.py --documents 60 --fetch-latency 0.3 --extract-latency 1.5
+"""
+import argparse
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+from crawl import TokenBucket, crawl, fetch_text, make_http_client
+
+
+def start_stub_server(latency: float) -> ThreadingHTTPServer:
+    """Serve `/<anything>` as a markdown page after `latency` seconds."""
+
+    class StubReaderHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            body = (
+                f"Title: Stub standard {self.path}\n\n"
+                "Markdown Content:\n"
+                "Part Number: 1926\nSubpart: X\n"
+                + "(a) Stub paragraph text. " * 200
+            ).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubReaderHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class FakeDictAgent:
+    """Stands in for `osha_dict_agent`, sleeping instead of calling the model."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def run(self, prompt: str):
+        await asyncio.sleep(self.latency)
+        osha_dict = {
+            "part_number": "1926",
+            "subpart": "X",
+            "standard_number": str(abs(hash(prompt)) % 10000),
+            "title": "Stub standard",
+            "gpo_source": "stub",
+            "content": prompt[:200],
+        }
+        return SimpleNamespace(output=SimpleNamespace(osha_dict=osha_dict))
+
+
+async def run_crawl(base_url, urls, agent, concurrency, fetch_rate, extract_rate):
+    fetch_limiter = TokenBucket(fetch_rate) if fetch_rate else None
+    extract_limiter = TokenBucket(extract_rate) if extract_rate else None
+
+    async def extract(url, page_text):
+        result = await agent.run(page_text)
+        return result.output.osha_dict
+
+    async with make_http_client(None, concurrency) as client:
+        async def fetch(url):
+            return await fetch_text(client, base_url + url, fetch_limiter)
+
+        start = time.perf_counter()
+        completed = 0
+        async for result in crawl(urls, fetch, extract, concurrency=concurrency,
+                                  extract_limiter=extract_limiter):
+            if result.error is None:
+                completed += 1
+        return completed, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=40)
+    parser.add_argument("--fetch-latency", type=float, default=0.3)
+    parser.add_argument("--extract-latency", type=float, default=1.0)
+    parser.add_argument("--fetch-rate", type=float, default=0, help="0 disables fetch rate limiting")
+    parser.add_argument("--extract-rate", type=float, default=0, help="0 disables extraction rate limiting")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    server = start_stub_server(args.fetch_latency)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/"
+    urls = [f"standard/1926.{i}" for i in range(args.documents)]
+    agent = FakeDictAgent(args.extract_latency)
+
+    # The old loop slept randint(2, 8) seconds (5s on average) per url on top of the work.
+    legacy = args.documents * (args.fetch_latency + args.extract_latency + 5)
+    print(f"Legacy serial loop (estimated): {legacy:.1f}s for {args.documents} documents")
+
+    try:
+        baseline = None
+        for concurrency in args.concurrency:
+            completed, elapsed = asyncio.run(run_crawl(
+                base_url, urls, agent, concurrency, args.fetch_rate, args.extract_rate))
+            baseline = baseline or elapsed
+            print(f"concurrency={concurrency:>3}: {completed}/{args.documents} documents "
+                  f"in {elapsed:.2f}s ({completed / elapsed:.2f} docs/s, {baseline / elapsed:.1f}x)")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
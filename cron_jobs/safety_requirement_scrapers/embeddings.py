@@ -0,0 +1,200 @@
+import hashlib
+import re
+import sys
+from pathlib import Path
+from typing import Callable, Optional, Protocol
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import metrics
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIMENSIONS = 1536
+# Order in which the collection's text2vec_openai vectorizer reads the properties.
+VECTORIZED_PROPERTIES = ("part_number", "subpart", "standard_number", "title", "gpo_source", "content")
+
+
+class Embedder(Protocol):
+    model: str
+    dimensions: int
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """Return one float32 row per text."""
+        ...
+
+
+class OpenAIEmbedder:
+    """Embeds batches of texts with the OpenAI embeddings endpoint."""
+
+    def __init__(self, api_key: Optional[str] = None, model: str = EMBEDDING_MODEL,
+                 dimensions: int = EMBEDDING_DIMENSIONS, client=None):
+        """
+        Args:
+            api_key: OpenAI API key, used when no client is given
+            client: An existing `openai.OpenAI` client whose connection pool is reused
+        """
+        if client is None:
+            from openai import OpenAI
+
+            client = OpenAI(api_key=api_key)
+        self.client = client
+        self.model = model
+        self.dimensions = dimensions
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        response = self.client.embeddings.create(model=self.model, input=texts)
+        rows = sorted(response.data, key=lambda item: item.index)
+        return np.asarray([row.embedding for row in rows], dtype=np.float32)
+
+
+class FakeEmbedder:
+    """
+    Deterministic offline stand-in for the embeddings endpoint.
+
+    Words are hashed into a fixed number of buckets and the counts normalised, so
+    texts sharing vocabulary still end up close together.
+    """
+
+    def __init__(self, dimensions: int = 256, model: str = "fake-hashing"):
+        self.model = f"{model}-{dimensions}"
+        self.dimensions = dimensions
+        self.calls = 0
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        self.calls += 1
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in re.findall(r"\w+", text.lower()):
+                bucket = int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest(), "big")
+                vectors[row, bucket % self.dimensions] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+def embedding_text(properties: dict) -> str:
+    """Text embedded for an object, mirroring the collection's vectorizer source properties."""
+    return " ".join(str(properties.get(name, "")) for name in VECTORIZED_PROPERTIES)
+
+
+class VectorCache:
+    """
+    Append-only float32 vector store keyed by (model, text hash).
+
+    Each model gets its own directory holding `vectors.f32` (rows of `dimensions`
+    float32 values) and `keys.txt` (one text hash per row), so cached vectors are
+    read back through a memory map without parsing.
+    """
+
+    def __init__(self, directory: Path, model: str, dimensions: int):
+        self.directory = Path(directory) / re.sub(r"[^A-Za-z0-9_.-]", "_", model)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.dimensions = dimensions
+        self.vectors_path = self.directory / "vectors.f32"
+        self.keys_path = self.directory / "keys.txt"
+        self.rows = {}
+        keys = self.keys_path.read_text().split() if self.keys_path.exists() else []
+        stored_rows = self.vectors_path.stat().st_size // (4 * dimensions) if self.vectors_path.exists() else 0
+        # A crash between the two appends leaves one file longer, vectors.f32 even without
+        # any keys.txt after the first put_many; ignore the tail.
+        for row, key in enumerate(keys[:stored_rows]):
+            self.rows[key] = row
+        if len(keys) != stored_rows:
+            self._truncate(min(len(keys), stored_rows))
+        self._vectors = None
+
+    def _truncate(self, rows: int):
+        with open(self.vectors_path, "ab") as f:
+            f.truncate(rows * 4 * self.dimensions)
+        keys = self.keys_path.read_text().split()[:rows] if self.keys_path.exists() else []
+        self.keys_path.write_text("".join(key + "\n" for key in keys))
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _matrix(self) -> np.ndarray:
+        if self._vectors is None or len(self._vectors) < len(self.rows):
+            if not self.rows:
+                return np.zeros((0, self.dimensions), dtype=np.float32)
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r",
+                                      shape=(len(self.rows), self.dimensions))
+        return self._vectors
+
+    def get_many(self, keys: list[str]) -> dict[str, np.ndarray]:
+        matrix = self._matrix()
+        return {key: np.array(matrix[self.rows[key]]) for key in keys if key in self.rows}
+
+    def put_many(self, keys: list[str], vectors: np.ndarray):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        new = [(key, vector) for key, vector in zip(keys, vectors) if key not in self.rows]
+        if not new:
+            return
+        with open(self.vectors_path, "ab") as f:
+            f.write(np.stack([vector for _, vector in new]).tobytes())
+        with open(self.keys_path, "a") as f:
+            f.write("".join(key + "\n" for key, _ in new))
+        for key, _ in new:
+            self.rows[key] = len(self.rows)
+        self._vectors = None
+
+    def __len__(self):
+        return len(self.rows)
+
+
+def embed_texts(texts: list[str], embedder: Embedder, cache: Optional[VectorCache] = None,
+                batch_size: int = 256, max_batch_tokens: int = 250_000,
+                count_tokens: Optional[Callable[[str], int]] = None) -> np.ndarray:
+    """
+    Embed texts in large batched requests, reusing cached vectors.
+
+    Args:
+        texts: Texts to embed
+        embedder: Embedding backend
+        cache: Optional vector cache consulted before and filled after each request
+        batch_size: Maximum texts per embeddings request
+        max_batch_tokens: Maximum tokens per embeddings request (the API caps requests at 300k)
+        count_tokens: Token counter for `max_batch_tokens`, defaults to a 4 characters per token estimate
+
+    Returns:
+        Array of shape (len(texts), embedder.dimensions)
+    """
+    count_tokens = count_tokens or (lambda text: len(text) // 4 + 1)
+    keys = [VectorCache.key(text) for text in texts]
+    found = cache.get_many(keys) if cache is not None else {}
+    metrics.count("embedding_cache_hits", len(found))
+
+    missing = []
+    seen = set()
+    for key, text in zip(keys, texts):
+        if key not in found and key not in seen:
+            seen.add(key)
+            missing.append((key, text))
+
+    batch = []
+    batch_tokens = 0
+
+    def flush():
+        with metrics.timer("embed"):
+            vectors = embedder.embed([text for _, text in batch])
+        metrics.count("embedded_texts", len(batch))
+        metrics.count("embedding_tokens", batch_tokens)
+        batch_keys = [key for key, _ in batch]
+        found.update(zip(batch_keys, vectors))
+        if cache is not None:
+            cache.put_many(batch_keys, vectors)
+
+    for key, text in missing:
+        tokens = count_tokens(text)
+        if batch and (len(batch) >= batch_size or batch_tokens + tokens > max_batch_tokens):
+            flush()
+            batch = []
+            batch_tokens = 0
+        batch.append((key, text))
+        batch_tokens += tokens
+    if batch:
+        flush()
+
+    if not texts:
+        return np.zeros((0, embedder.dimensions), dtype=np.float32)
+    return np.stack([found[key] for key in keys]).astype(np.float32)
@@ -0,0 +1,124 @@
+"""
+Offline stand-in for the parts of the Weaviate v4 client the scraper uses.
+
+    osha.main(["--embedder", "fake", ...], weaviate_client=FakeWeaviateClient())
+
+Collections live in memory. `batch.fixed_size` sends objects in requests of
+`batch_size`, each taking `insert_latency` seconds, and `iterator` returns the
+stored objects with their vectors, so ingestion (and `local_index.py export`) can
+be exercised without a cluster.
+"""
+import threading
+import time
+import uuid as uuid_module
+from types import SimpleNamespace
+
+
+class FakeBatch:
+    def __init__(self, collection, batch_size: int):
+        self.collection = collection
+        self.batch_size = batch_size
+        self._pending = []
+
+    def add_object(self, properties, uuid=None, vector=None, **kwargs):
+        self._pending.append((str(uuid or uuid_module.uuid4()), dict(properties), vector))
+        if len(self._pending) >= self.batch_size:
+            self._send()
+
+    def _send(self):
+        if not self._pending:
+            return
+        time.sleep(self.collection.client.insert_latency)
+        with self.collection.client._lock:
+            self.collection.client.batch_requests += 1
+            for object_uuid, properties, vector in self._pending:
+                self.collection.objects[object_uuid] = (properties, vector)
+        self._pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._send()
+        return False
+
+
+class FakeBatchManager:
+    def __init__(self, collection):
+        self.collection = collection
+        # Every object is accepted; kept for the ingestor's retry pass.
+        self.failed_objects = []
+
+    def fixed_size(self, batch_size: int = 100, **kwargs):
+        return FakeBatch(self.collection, batch_size)
+
+
+class FakeData:
+    def __init__(self, collection):
+        self.collection = collection
+
+    def delete_many(self, where=None, **kwargs):
+        """Delete the objects of a `Filter.by_id().contains_any(uuids)` filter."""
+        uuids = {str(value) for value in getattr(where, "value", None) or []}
+        with self.collection.client._lock:
+            for object_uuid in uuids:
+                self.collection.objects.pop(object_uuid, None)
+        return SimpleNamespace(matches=len(uuids), successful=len(uuids), failed=0)
+
+
+class FakeCollection:
+    def __init__(self, client, name: str):
+        self.client = client
+        self.name = name
+        # uuid -> (properties, {vector name: vector} or None)
+        self.objects = {}
+        self.batch = FakeBatchManager(self)
+        self.data = FakeData(self)
+
+    def iterator(self, include_vector: bool = False, return_properties=None, **kwargs):
+        with self.client._lock:
+            objects = list(self.objects.items())
+        for object_uuid, (properties, vector) in objects:
+            if return_properties is not None:
+                properties = {name: properties[name] for name in return_properties if name in properties}
+            yield SimpleNamespace(uuid=uuid_module.UUID(object_uuid), properties=properties,
+                                  vector=(vector or {}) if include_vector else {})
+
+    def __len__(self):
+        return len(self.objects)
+
+
+class FakeCollections:
+    def __init__(self, client):
+        self.client = client
+        self._collections = {}
+
+    def exists(self, name: str) -> bool:
+        return name in self._collections
+
+    def get(self, name: str) -> FakeCollection:
+        return self._collections[name]
+
+    def create(self, name: str, **kwargs) -> FakeCollection:
+        self._collections[name] = FakeCollection(self.client, name)
+        return self._collections[name]
+
+    def delete(self, name: str):
+        self._collections.pop(name, None)
+
+
+class FakeWeaviateClient:
+    """Client-like fake exposing `collections`, `is_ready` and `close`."""
+
+    def __init__(self, insert_latency: float = 0.0):
+        self.insert_latency = insert_latency
+        self.batch_requests = 0
+        self.collections = FakeCollections(self)
+        self._lock = threading.Lock()
+
+    def is_ready(self) -> bool:
+        return True
+
+    def close(self):
+        pass
+
@@ -0,0 +1,192 @@
+import json
+import queue
+import sys
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import metrics
+from chunking import Chunker
+from embeddings import Embedder, VectorCache, embed_texts, embedding_text
+from osha_manifest import object_uuid
+
+PROPERTY_NAMES = ("part_number", "subpart", "standard_number", "title", "gpo_source", "content")
+VECTOR_NAME = "oshaDocumentEmbedding"
+
+
+def prepare_objects(document: dict, content_chunks: list[str]) -> list[dict]:
+    """Turn one extracted standard into Weaviate objects, one per content chunk."""
+    if len(content_chunks) == 1:
+        # Document fits within token limit - use as is
+        return [{
+            "uuid": object_uuid(document["standard_number"]),
+            "properties": {name: document[name] for name in PROPERTY_NAMES},
+        }]
+    objects = []
+    for i, chunk in enumerate(content_chunks):
+        properties = {name: document[name] for name in PROPERTY_NAMES}
+        properties["content"] = chunk
+        # Modify title instead of standard_number as requested
+        properties["title"] = f"{document['title']} NOTE: CHUNK chunk_{i+1}"
+        objects.append({"uuid": object_uuid(document["standard_number"], i), "properties": properties})
+    return objects
+
+
+@dataclass
+class IngestReport:
+    documents: int = 0
+    objects: int = 0
+    retried: int = 0
+    dead_lettered: int = 0
+    # (source_url, standard_number, uuids) of documents whose objects all landed.
+    committed: list = field(default_factory=list)
+    failed_urls: list = field(default_factory=list)
+
+
+class StreamingIngestor:
+    """
+    Producer/consumer ingestion into one long-lived Weaviate batch.
+
+    Extracted documents are handed over with `put()` as the crawl produces them;
+    a background thread chunks them, embeds them in groups of `embed_batch_size`
+    objects and adds them to a single `collection.batch.fixed_size()` batcher.
+    The hand-over queue is bounded, so memory stays flat however large the corpus
+    is. On `close()` objects Weaviate rejected are retried, and whatever still
+    fails is appended to a dead-letter JSONL file.
+    """
+
+    def __init__(self, collection, chunker: Chunker, embedder: Optional[Embedder] = None,
+                 vector_cache: Optional[VectorCache] = None, batch_size: int = 200,
+                 embed_batch_size: int = 256, queue_size: int = 64, max_retries: int = 2,
+                 dead_letter_path: Optional[Path] = None):
+        self.collection = collection
+        self.chunker = chunker
+        self.embedder = embedder
+        self.vector_cache = vector_cache
+        self.batch_size = batch_size
+        self.embed_batch_size = embed_batch_size
+        self.max_retries = max_retries
+        self.dead_letter_path = dead_letter_path
+        self.report = IngestReport()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._pending_objects = []
+        # source_url -> (standard_number, uuids) for documents already handed to the batcher
+        self._documents = {}
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="osha-ingest", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def put(self, document: dict):
+        """Queue an extracted document, blocking while the consumer is behind."""
+        if self._error is not None:
+            raise RuntimeError("Ingestion thread failed") from self._error
+        self._queue.put(document)
+
+    def _run(self):
+        done = False
+        try:
+            with self.collection.batch.fixed_size(batch_size=self.batch_size) as batch:
+                while True:
+                    document = self._queue.get()
+                    if document is None:
+                        done = True
+                        break
+                    self._add_document(batch, document)
+                self._add_pending(batch)
+        except Exception as e:
+            self._error = e
+            # Keep draining so producers blocked on put() are released.
+            while not done:
+                done = self._queue.get() is None
+
+    def _add_document(self, batch, document: dict):
+        with metrics.timer("chunk"):
+            objects = prepare_objects(document, self.chunker.chunk(document["content"]))
+        metrics.count("chunks", len(objects))
+        if len(objects) > 1:
+            print(f"Split {document['standard_number']} into {len(objects)} chunks")
+        self._documents[document["source_url"]] = (document["standard_number"], [obj["uuid"] for obj in objects])
+        self.report.documents += 1
+        self._pending_objects.extend(objects)
+        if len(self._pending_objects) >= self.embed_batch_size:
+            self._add_pending(batch)
+
+    def _add_pending(self, batch):
+        objects, self._pending_objects = self._pending_objects, []
+        if not objects:
+            return
+        vectors = None
+        if self.embedder is not None:
+            vectors = embed_texts([embedding_text(obj["properties"]) for obj in objects], self.embedder,
+                                  self.vector_cache, batch_size=self.embed_batch_size,
+                                  count_tokens=self.chunker.count_tokens)
+        # add_object blocks while the batch's send queue is full, so this includes waiting on Weaviate.
+        with metrics.timer("insert"):
+            for i, obj in enumerate(objects):
+                batch.add_object(
+                    properties=obj["properties"],
+                    uuid=obj["uuid"],
+                    vector={VECTOR_NAME: vectors[i].tolist()} if vectors is not None else None,
+                )
+        metrics.count("objects_inserted", len(objects))
+        self.report.objects += len(objects)
+
+    def _retry_failed(self) -> list:
+        """Re-send rejected objects, returning the ones that still failed."""
+        failed = list(self.collection.batch.failed_objects)
+        for attempt in range(self.max_retries):
+            if not failed:
+                break
+            print(f"Retrying {len(failed)} failed objects (attempt {attempt + 1}/{self.max_retries})")
+            self.report.retried += len(failed)
+            metrics.count("objects_retried", len(failed))
+            with self.collection.batch.fixed_size(batch_size=self.batch_size) as batch:
+                for error in failed:
+                    batch.add_object(
+                        properties=error.object_.properties,
+                        uuid=error.object_.uuid,
+                        vector=error.object_.vector,
+                    )
+            failed = list(self.collection.batch.failed_objects)
+        return failed
+
+    def _dead_letter(self, failed: list):
+        if not failed or self.dead_letter_path is None:
+            return
+        self.dead_letter_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.dead_letter_path, "a") as f:
+            for error in failed:
+                # Vectors are left out; they are in the vector cache and would bloat the file.
+                f.write(json.dumps({
+                    "uuid": str(error.object_.uuid),
+                    "properties": error.object_.properties,
+                    "message": error.message,
+                }) + "\n")
+        print(f"Wrote {len(failed)} failed objects to {self.dead_letter_path}")
+
+    def close(self) -> IngestReport:
+        """Flush everything, retry or dead-letter failures and report what landed."""
+        # Sending what the batch still queues happens here, when the ingestion thread leaves it.
+        with metrics.timer("insert_flush"):
+            self._queue.put(None)
+            self._thread.join()
+        if self._error is not None:
+            raise RuntimeError("Ingestion thread failed") from self._error
+
+        failed = self._retry_failed()
+        self.report.dead_lettered = len(failed)
+        metrics.count("objects_dead_lettered", len(failed))
+        self._dead_letter(failed)
+
+        failed_uuids = {str(error.object_.uuid) for error in failed}
+        for url, (standard_number, uuids) in self._documents.items():
+            if failed_uuids.intersection(uuids):
+                self.report.failed_urls.append(url)
+            else:
+                self.report.committed.append((url, standard_number, uuids))
+        return self.report
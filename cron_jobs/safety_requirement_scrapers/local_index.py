@@ -0,0 +1,507 @@
+"""
+Offline snapshot of the `osha_standards` collection, searched in-process.
+
+`export` copies every object and its vector out of Weaviate into a snapshot
+directory: `vectors.f32` (unit-normalised float32 rows, read back through a
+memory map), `objects.jsonl` (the properties of each row, in row order) and
+`manifest.json`. With `--ivf-lists` the vectors are also clustered with k-means
+into an inverted-file index, so vector search only scores the `nprobe` closest
+lists; the Part 1926 corpus is small enough that exact brute force is the default.
+
+LocalOshaRetriever answers the same `search()` calls as OshaRetriever (prefilters,
+hybrid/bm25/vector modes, chunk re-assembly, caching) without a network round
+trip. BM25 runs over the same content and title text Weaviate indexes. Hybrid
+search needs the question embedded with the model the snapshot was built with;
+when no embedder is configured, or it cannot be reached, it falls back to BM25.
+
+    python local_index.py export --weaviate-mode cloud --ivf-lists 32
+    python local_index.py search "guardrail height" --embedder none
+    python local_index.py info
+    python local_index.py compare --weaviate-mode cloud   # prefilters must match Weaviate's
+
+Prefilters match tokens the way Weaviate filters the word-tokenized properties, so
+"subpart M" finds subpart "1926 Subpart M"; `compare` runs the question set's
+filters against both and fails when they select different standards.
+"""
+import argparse
+import json
+import re
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import cron_runtime
+
+from embeddings import EMBEDDING_MODEL, Embedder, FakeEmbedder, OpenAIEmbedder
+from ingest import PROPERTY_NAMES, VECTOR_NAME
+from osha_cache import ResponseCache
+from retrieval import SEARCH_MODES, OshaRetriever, QueryFilters
+
+DEFAULT_SNAPSHOT = Path(__file__).resolve().parent / "osha_snapshot"
+# Keeps "1926.451" and "1926.1053(b)" style identifiers whole, like Weaviate's LOWERCASE tokenization.
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:\.[a-z0-9]+)*")
+# Weaviate's WORD tokenization, the default of the filter properties: alphanumeric runs, lowercased.
+WORD_TOKEN_RE = re.compile(r"[^\W_]+")
+FILTER_PROPERTIES = ("part_number", "subpart", "standard_number")
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+def word_tokens(text: str) -> set[str]:
+    return set(WORD_TOKEN_RE.findall(text.lower()))
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return (vectors / np.maximum(norms, 1e-12)).astype(np.float32)
+
+
+def _object_vector(obj) -> Optional[list]:
+    """The named vector of an exported object; older collections return a single unnamed one."""
+    vector = obj.vector
+    if isinstance(vector, dict):
+        vector = vector.get(VECTOR_NAME) or vector.get("default")
+    return vector or None
+
+
+def kmeans(vectors: np.ndarray, lists: int, iterations: int = 20, seed: int = 0,
+           batch_size: int = 4096) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Spherical k-means over unit rows.
+
+    Returns:
+        (centroids of shape (lists, dims), list assignment of every row)
+    """
+    rng = np.random.default_rng(seed)
+    lists = min(lists, len(vectors))
+    centroids = np.array(vectors[rng.choice(len(vectors), lists, replace=False)])
+    assignments = np.zeros(len(vectors), dtype=np.int32)
+    for _ in range(iterations):
+        for start in range(0, len(vectors), batch_size):
+            block = vectors[start:start + batch_size]
+            assignments[start:start + batch_size] = np.argmax(block @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        counts = np.bincount(assignments, minlength=lists)
+        empty = counts == 0
+        # An empty list is re-seeded with a random row rather than left to collapse.
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+        centroids = normalize_rows(sums)
+    return centroids, assignments
+
+
+def export_snapshot(collection, directory: Path = DEFAULT_SNAPSHOT, model: str = EMBEDDING_MODEL,
+                    ivf_lists: int = 0) -> dict:
+    """
+    Write every object and vector of `collection` to a snapshot directory.
+
+    The snapshot is built next to `directory` and swapped in when complete, so a
+    failed export leaves the previous snapshot usable.
+
+    Args:
+        collection: The `osha_standards` Weaviate collection
+        directory: Snapshot directory, replaced if it exists
+        model: Embedding model the collection's vectors come from, recorded in the manifest
+        ivf_lists: Number of k-means lists of the IVF index, 0 for brute force only
+
+    Returns:
+        The snapshot manifest
+    """
+    directory = Path(directory)
+    staging = directory.with_name(directory.name + ".tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+
+    count = 0
+    dimensions = None
+    # Objects without a vector get a zero row (never returned by vector search); rows are
+    # fixed width, so the ones seen before the first vector wait until its width is known.
+    waiting = []
+    missing_vectors = 0
+    with open(staging / "vectors.f32", "wb") as vectors_file, open(staging / "objects.jsonl", "w") as objects_file:
+        for obj in collection.iterator(include_vector=True, return_properties=list(PROPERTY_NAMES)):
+            properties = {"uuid": str(obj.uuid), **obj.properties}
+            vector = _object_vector(obj)
+            if vector is None:
+                missing_vectors += 1
+                if dimensions is None:
+                    waiting.append(properties)
+                    continue
+                vector = np.zeros((1, dimensions), dtype=np.float32)
+            else:
+                vector = normalize_rows(np.asarray([vector], dtype=np.float32))
+            if dimensions is None:
+                dimensions = vector.shape[1]
+                for waiting_properties in waiting:
+                    vectors_file.write(np.zeros(dimensions, dtype=np.float32).tobytes())
+                    objects_file.write(json.dumps(waiting_properties) + "\n")
+                count += len(waiting)
+            elif vector.shape[1] != dimensions:
+                raise ValueError(f"Object {obj.uuid} has a {vector.shape[1]}-dimensional vector, expected {dimensions}")
+            vectors_file.write(vector.tobytes())
+            objects_file.write(json.dumps(properties) + "\n")
+            count += 1
+    if dimensions is None:
+        shutil.rmtree(staging)
+        raise ValueError(f"No object of the collection has a {VECTOR_NAME} vector, nothing to export")
+
+    manifest = {
+        "vector_name": VECTOR_NAME,
+        "model": model,
+        "dimensions": dimensions,
+        "count": count,
+        "missing_vectors": missing_vectors,
+        "ivf_lists": 0,
+        "created_at": time.time(),
+    }
+    if ivf_lists:
+        vectors = np.memmap(staging / "vectors.f32", dtype=np.float32, mode="r", shape=(count, dimensions))
+        centroids, assignments = kmeans(vectors, ivf_lists)
+        # Rows grouped by list: rows of list i are ivf_rows[ivf_offsets[i]:ivf_offsets[i + 1]].
+        order = np.argsort(assignments, kind="stable").astype(np.int32)
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=len(centroids)))])
+        centroids.tofile(staging / "ivf_centroids.f32")
+        order.tofile(staging / "ivf_rows.i32")
+        offsets.astype(np.int64).tofile(staging / "ivf_offsets.i64")
+        manifest["ivf_lists"] = len(centroids)
+    # Written last: a snapshot without a manifest is incomplete.
+    with open(staging / "manifest.json", "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    shutil.rmtree(directory, ignore_errors=True)
+    staging.rename(directory)
+    return manifest
+
+
+class BM25Index:
+    """Okapi BM25 over tokenized documents, stored as a CSR postings matrix."""
+
+    def __init__(self, documents: list[str], k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        vocabulary = {}
+        postings = {}
+        lengths = np.zeros(len(documents), dtype=np.float32)
+        for row, text in enumerate(documents):
+            tokens = tokenize(text)
+            lengths[row] = len(tokens)
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                postings.setdefault(vocabulary.setdefault(token, len(vocabulary)), []).append((row, tf))
+
+        self.vocabulary = vocabulary
+        self.offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        for term, entries in postings.items():
+            self.offsets[term + 1] = len(entries)
+        self.offsets = np.cumsum(self.offsets)
+        self.rows = np.zeros(self.offsets[-1], dtype=np.int32)
+        term_frequencies = np.zeros(self.offsets[-1], dtype=np.float32)
+        for term, entries in postings.items():
+            start = self.offsets[term]
+            self.rows[start:start + len(entries)] = [row for row, _ in entries]
+            term_frequencies[start:start + len(entries)] = [tf for _, tf in entries]
+
+        self.documents = len(documents)
+        self.idf = np.log1p((self.documents - np.diff(self.offsets) + 0.5) / (np.diff(self.offsets) + 0.5))
+        # Length normalisation does not depend on the query, so each posting's weight is precomputed.
+        average_length = max(float(lengths.mean()) if len(lengths) else 0.0, 1.0)
+        norm = k1 * (1 - b + b * lengths[self.rows] / average_length)
+        self.weights = (term_frequencies * (k1 + 1) / (term_frequencies + norm)).astype(np.float32)
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document; 0 for documents sharing no term with the query."""
+        scores = np.zeros(self.documents, dtype=np.float32)
+        for token in set(tokenize(query)):
+            term = self.vocabulary.get(token)
+            if term is None:
+                continue
+            start, end = self.offsets[term], self.offsets[term + 1]
+            scores[self.rows[start:end]] += self.idf[term] * self.weights[start:end]
+        return scores
+
+
+def _top(scores: np.ndarray, rows: np.ndarray, limit: int) -> tuple[np.ndarray, np.ndarray]:
+    """The `limit` best (rows, scores), best first."""
+    if len(rows) > limit:
+        best = np.argpartition(-scores, limit - 1)[:limit]
+        rows, scores = rows[best], scores[best]
+    order = np.argsort(-scores, kind="stable")
+    return rows[order], scores[order]
+
+
+def _relative_scores(scores: np.ndarray) -> np.ndarray:
+    """Min-max scaled to [0, 1], as in Weaviate's relativeScoreFusion."""
+    if not len(scores):
+        return scores
+    low, high = scores.min(), scores.max()
+    if high - low < 1e-12:
+        return np.ones_like(scores)
+    return (scores - low) / (high - low)
+
+
+class LocalIndex:
+    """A loaded snapshot: memory-mapped vectors, object properties and a BM25 index."""
+
+    def __init__(self, directory: Path = DEFAULT_SNAPSHOT, nprobe: int = 8):
+        """
+        Args:
+            directory: Snapshot directory written by `export_snapshot`
+            nprobe: IVF lists scored per vector query; ignored for snapshots without an IVF index
+        """
+        self.directory = Path(directory)
+        manifest_path = self.directory / "manifest.json"
+        if not manifest_path.exists():
+            raise FileNotFoundError(f"No snapshot at {self.directory}, run `python local_index.py export` first")
+        with open(manifest_path) as f:
+            self.manifest = json.load(f)
+        self.count = self.manifest["count"]
+        self.dimensions = self.manifest["dimensions"]
+        self.vectors = np.memmap(self.directory / "vectors.f32", dtype=np.float32, mode="r",
+                                 shape=(self.count, self.dimensions))
+        with open(self.directory / "objects.jsonl") as f:
+            self.objects = [json.loads(line) for line in f]
+        if len(self.objects) != self.count:
+            raise ValueError(f"{self.directory} has {len(self.objects)} objects for {self.count} vectors")
+        self.columns = {name: np.array([obj.get(name) or "" for obj in self.objects]) for name in FILTER_PROPERTIES}
+        # property -> word token -> rows whose value has that token, for the prefilters.
+        self.filter_postings = {name: {} for name in FILTER_PROPERTIES}
+        for row, obj in enumerate(self.objects):
+            for name in FILTER_PROPERTIES:
+                for token in word_tokens(obj.get(name) or ""):
+                    self.filter_postings[name].setdefault(token, []).append(row)
+        self.bm25 = BM25Index([f"{obj.get('content', '')} {obj.get('title', '')}" for obj in self.objects])
+
+        self.nprobe = nprobe
+        self.ivf_lists = self.manifest.get("ivf_lists", 0)
+        if self.ivf_lists:
+            self.centroids = np.fromfile(self.directory / "ivf_centroids.f32", dtype=np.float32).reshape(
+                self.ivf_lists, self.dimensions)
+            self.ivf_rows = np.fromfile(self.directory / "ivf_rows.i32", dtype=np.int32)
+            self.ivf_offsets = np.fromfile(self.directory / "ivf_offsets.i64", dtype=np.int64)
+
+    def mask(self, filters: QueryFilters) -> Optional[np.ndarray]:
+        """
+        Rows matching every field of `filters`, or None when it has no fields.
+
+        Matches like Weaviate's `Filter.equal` on the WORD-tokenized filter properties:
+        a row matches when its value has every token of the filter value, so subpart
+        "M" finds "1926 Subpart M" (and not "1926 Subpart CC").
+        """
+        mask = None
+        for name in FILTER_PROPERTIES:
+            value = getattr(filters, name)
+            if not value:
+                continue
+            matches = np.ones(self.count, dtype=bool)
+            for token in word_tokens(value):
+                token_rows = np.zeros(self.count, dtype=bool)
+                token_rows[self.filter_postings[name].get(token, [])] = True
+                matches &= token_rows
+            mask = matches if mask is None else mask & matches
+        return mask
+
+    def _candidates(self, query_vector: np.ndarray, mask: Optional[np.ndarray]) -> np.ndarray:
+        if not self.ivf_lists or self.nprobe >= self.ivf_lists:
+            return np.flatnonzero(mask) if mask is not None else np.arange(self.count)
+        probed = np.argpartition(-(self.centroids @ query_vector), self.nprobe - 1)[:self.nprobe]
+        rows = np.concatenate([self.ivf_rows[self.ivf_offsets[i]:self.ivf_offsets[i + 1]] for i in probed])
+        return rows[mask[rows]] if mask is not None else rows
+
+    def vector_search(self, query_vector: np.ndarray, limit: int,
+                      mask: Optional[np.ndarray] = None) -> tuple[np.ndarray, np.ndarray]:
+        """(rows, cosine similarities) of the nearest objects, best first."""
+        query_vector = normalize_rows(np.asarray(query_vector, dtype=np.float32).reshape(1, -1))[0]
+        rows = self._candidates(query_vector, mask)
+        if mask is not None and len(rows) == 0 and mask.any():
+            # The probed lists missed every filtered row; a prefiltered set is small enough to scan.
+            rows = np.flatnonzero(mask)
+        return _top(self.vectors[rows] @ query_vector, rows, limit)
+
+    def bm25_search(self, question: str, limit: int,
+                    mask: Optional[np.ndarray] = None) -> tuple[np.ndarray, np.ndarray]:
+        """(rows, BM25 scores) of the objects sharing terms with the question, best first."""
+        scores = self.bm25.scores(question)
+        matching = scores > 0
+        rows = np.flatnonzero(matching & mask if mask is not None else matching)
+        return _top(scores[rows], rows, limit)
+
+    def hybrid_search(self, question: str, query_vector: np.ndarray, limit: int, alpha: float,
+                      mask: Optional[np.ndarray] = None) -> tuple[np.ndarray, np.ndarray]:
+        """Relative score fusion of vector and BM25 results: alpha * vector + (1 - alpha) * bm25."""
+        fused = {}
+        for weight, (rows, scores) in ((alpha, self.vector_search(query_vector, limit, mask)),
+                                       (1 - alpha, self.bm25_search(question, limit, mask))):
+            for row, score in zip(rows.tolist(), _relative_scores(scores).tolist()):
+                fused[row] = fused.get(row, 0.0) + weight * score
+        rows = np.fromiter(fused, dtype=np.int64, count=len(fused))
+        return _top(np.fromiter(fused.values(), dtype=np.float32, count=len(fused)), rows, limit)
+
+    def by_standard(self, standard_numbers: list[str]) -> list[dict]:
+        rows = np.flatnonzero(np.isin(self.columns["standard_number"], standard_numbers))
+        return [self.objects[row] for row in rows.tolist()]
+
+
+class LocalOshaRetriever(OshaRetriever):
+    """
+    OshaRetriever over a LocalIndex instead of a Weaviate collection.
+
+    Vector and hybrid search need `embedder` to produce vectors of the snapshot's
+    model. Hybrid search falls back to BM25 when there is no embedder or the
+    embedder fails, e.g. because the OpenAI API is unreachable.
+    """
+
+    cache_namespace = "retrieval-local"
+
+    def __init__(self, index: LocalIndex, embedder: Optional[Embedder] = None, alpha: float = 0.5,
+                 cache_size: int = 256, cache_ttl: float = 6 * 3600,
+                 persistent_cache: Optional[ResponseCache] = None):
+        if embedder is not None and embedder.dimensions != index.dimensions:
+            raise ValueError(f"{embedder.model} embeds into {embedder.dimensions} dimensions, "
+                             f"the snapshot has {index.dimensions}")
+        if embedder is not None and embedder.model != index.manifest["model"]:
+            print(f"Warning: questions are embedded with {embedder.model}, "
+                  f"the snapshot was built with {index.manifest['model']}")
+        super().__init__(None, embedder=embedder, alpha=alpha, cache_size=cache_size, cache_ttl=cache_ttl,
+                         persistent_cache=persistent_cache)
+        self.index = index
+
+    def _question_vector(self, question: str) -> Optional[np.ndarray]:
+        if self.embedder is None:
+            return None
+        try:
+            return self.embedder.embed([question])[0]
+        except Exception as e:
+            print(f"Embedding the question failed ({e}), using BM25 only")
+            return None
+
+    def _ranked_objects(self, question: str, limit: int, mode: str,
+                        filters: QueryFilters) -> list[tuple[float, dict]]:
+        mask = self.index.mask(filters)
+        vector = self._question_vector(question) if mode != "bm25" else None
+        if mode == "vector" and vector is None:
+            raise ValueError("Vector search over a local snapshot needs a working embedder")
+        if mode == "vector":
+            rows, scores = self.index.vector_search(vector, limit, mask)
+        elif mode == "hybrid" and vector is not None:
+            rows, scores = self.index.hybrid_search(question, vector, limit, self.alpha, mask)
+        else:
+            rows, scores = self.index.bm25_search(question, limit, mask)
+        return [(score, self.index.objects[row]) for row, score in zip(rows.tolist(), scores.tolist())]
+
+    def _document_chunks(self, standard_numbers: list[str]) -> list[dict]:
+        return self.index.by_standard(standard_numbers)
+
+
+def make_embedder(name: str) -> Optional[Embedder]:
+    """Question embedder for `--embedder`: "openai", "fake" or "none"."""
+    if name == "openai":
+        return OpenAIEmbedder(client=cron_runtime.openai_client())
+    if name == "fake":
+        return FakeEmbedder()
+    return None
+
+
+def compare_filters(index: LocalIndex, collection, questions: list[str], limit: int = 5) -> int:
+    """
+    Run the prefilters of every question against Weaviate and the snapshot and print where they differ.
+
+    The standards each filter matches must be identical; the top `limit` BM25 results
+    are shown side by side, since the two BM25 implementations can rank ties differently.
+
+    Returns:
+        Number of questions whose filters matched different standards
+    """
+    from retrieval import build_filter, question_filters
+
+    weaviate_retriever = OshaRetriever(collection)
+    local_retriever = LocalOshaRetriever(index)
+    mismatches = 0
+    for question in questions:
+        filters = question_filters(question)
+        where = build_filter(filters)
+        if where is None:
+            continue
+        response = collection.query.fetch_objects(filters=where, limit=10000, return_properties=["standard_number"])
+        remote = {obj.properties["standard_number"] for obj in response.objects}
+        mask = index.mask(filters)
+        local = {index.objects[row]["standard_number"] for row in np.flatnonzero(mask).tolist()}
+        remote_top = [result.standard_number for result in weaviate_retriever.search(
+            question, limit, mode="bm25", filters=filters, use_cache=False)]
+        local_top = [result.standard_number for result in local_retriever.search(
+            question, limit, mode="bm25", filters=filters, use_cache=False)]
+        same = remote == local
+        mismatches += not same
+        print(f"{'ok  ' if same else 'DIFF'}  {question}\n      filters {filters}: Weaviate {len(remote)} "
+              f"standards, snapshot {len(local)}; top {limit} {remote_top} vs {local_top}")
+        if not same:
+            print(f"      only in Weaviate: {sorted(remote - local)[:10]}, only in the snapshot: "
+                  f"{sorted(local - remote)[:10]}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["export", "search", "info", "compare"])
+    parser.add_argument("question", nargs="?", help="Question to search for")
+    parser.add_argument("--snapshot", type=Path, default=DEFAULT_SNAPSHOT, help="Snapshot directory")
+    parser.add_argument("--weaviate-mode", choices=["cloud", "local", "embedded"],
+                        help="Weaviate to export from, defaults to WEAVIATE_MODE")
+    parser.add_argument("--model", default=EMBEDDING_MODEL,
+                        help="Embedding model the collection's vectors come from, checked against --embedder")
+    parser.add_argument("--ivf-lists", type=int, default=0,
+                        help="Also build an IVF index with this many k-means lists (0 for brute force only)")
+    parser.add_argument("--nprobe", type=int, default=8, help="IVF lists scored per vector query")
+    parser.add_argument("--embedder", choices=["openai", "fake", "none"], default="none",
+                        help="Embeds questions for vector and hybrid search; none searches with BM25 only")
+    parser.add_argument("--mode", choices=SEARCH_MODES, default="hybrid")
+    parser.add_argument("--limit", type=int, default=5, help="Standards returned")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        start = time.perf_counter()
+        collection = cron_runtime.weaviate_client(args.weaviate_mode).collections.get("osha_standards")
+        manifest = export_snapshot(collection, args.snapshot, model=args.model, ivf_lists=args.ivf_lists)
+        print(f"Exported {manifest['count']} objects ({manifest['dimensions']} dimensions, "
+              f"{manifest['ivf_lists']} IVF lists) to {args.snapshot} in {time.perf_counter() - start:.1f} seconds")
+        if manifest["missing_vectors"]:
+            print(f"{manifest['missing_vectors']} objects had no vector and are only found by BM25")
+        return
+
+    start = time.perf_counter()
+    index = LocalIndex(args.snapshot, nprobe=args.nprobe)
+    load_seconds = time.perf_counter() - start
+    if args.command == "info":
+        print(json.dumps(index.manifest, indent=2))
+        print(f"Loaded in {load_seconds * 1000:.0f} ms, {len(index.bm25.vocabulary)} BM25 terms")
+        return
+    if args.command == "compare":
+        from retrieval_bench import QUESTIONS
+
+        collection = cron_runtime.weaviate_client(args.weaviate_mode).collections.get("osha_standards")
+        questions = [args.question] if args.question else [question for question, _ in QUESTIONS]
+        mismatches = compare_filters(index, collection, questions, args.limit)
+        print(f"{mismatches} of {len(questions)} questions filtered differently")
+        sys.exit(1 if mismatches else 0)
+
+    if not args.question:
+        parser.error("search needs a question")
+    retriever = LocalOshaRetriever(index, embedder=make_embedder(args.embedder))
+    start = time.perf_counter()
+    results = retriever.search(args.question, limit=args.limit, mode=args.mode)
+    print(f"Search took {(time.perf_counter() - start) * 1000:.1f} ms (snapshot loaded in {load_seconds * 1000:.0f} ms)")
+    for result in results:
+        print(f"{result.score:6.3f}  {result.standard_number}  {result.title}  "
+              f"(subpart {result.subpart}, {result.matched_chunks}/{result.chunks} chunks matched)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,125 +1,45 @@
-import requests
-from pydantic_ai import Agent
-from pydantic_ai.models.openai import OpenAIModel
-from pydantic_ai.providers.openai import OpenAIProvider
 from pydantic import BaseModel, Field
 from pathlib import Path
-from dotenv import load_dotenv
-import os
-import weaviate
-from weaviate.classes.config import Property, DataType, Configure
-from weaviate.classes.config import Tokenization
-from weaviate.classes.init import Auth
-import weaviate.classes as wvc
-from weaviate.classes.query import Filter
-from weaviate.classes.config import Configure
+import functools
+import sys
 import json
-import time
-import random
-import tiktoken
-
-def main():
-    def count_tokens(text, model="text-embedding-3-large"):
-        """Count tokens using the appropriate tokenizer for the embedding model."""
-        # Use cl100k_base encoding for the newer embedding models
-        encoding_name = "cl100k_base"
-        encoder = tiktoken.get_encoding(encoding_name)
-        return len(encoder.encode(text))
-
-    def chunk_document(document, max_tokens=6000):
-        """Split a document into chunks of approximately max_tokens."""
-        encoder = tiktoken.get_encoding("cl100k_base")
-        tokens = encoder.encode(document)
-        
-        chunks = []
-        current_chunk = []
-        current_count = 0
-        
-        for token in tokens:
-            current_chunk.append(token)
-            current_count += 1
-            
-            if current_count >= max_tokens:
-                chunks.append(encoder.decode(current_chunk))
-                current_chunk = []
-                current_count = 0
-        
-        if current_chunk:
-            chunks.append(encoder.decode(current_chunk))
-        
-        return chunks
-
-    def insert_batch(collection, source_objects, max_tokens=6000):
-        """Insert documents into Weaviate, handling chunking for oversized documents."""
-        processed_objects = []
-        
-        # Process and chunk documents if needed
-        for obj in source_objects:
-            token_count = count_tokens(obj["content"])
-            
-            if token_count < max_tokens:
-                # Document fits within token limit - use as is
-                processed_objects.append(obj)
-            else:
-                # Document exceeds token limit - chunk it
-                print(f"Chunking document {obj['standard_number']} with {token_count} tokens")
-                content_chunks = chunk_document(obj["content"], max_tokens)
-                
-                for i, chunk in enumerate(content_chunks):
-                    # Create a new document object for each chunk
-                    chunked_obj = obj.copy()
-                    chunked_obj["content"] = chunk
-                    # Modify title instead of standard_number as requested
-                    chunked_obj["title"] = f"{obj['title']} NOTE: CHUNK chunk_{i+1}"
-                    processed_objects.append(chunked_obj)
-                
-                print(f"Split into {len(content_chunks)} chunks")
-        
-        # Now use your existing batch insertion logic
-        print(f"Inserting {len(processed_objects)} documents in batch")
-        
-        print(f"Processed objects: {processed_objects}")
-        with collection.batch.fixed_size(batch_size=200) as batch:
-            for src_obj in processed_objects:
-                batch.add_object(
-                    properties={
-                        "part_number": src_obj["part_number"],
-                        "subpart": src_obj["subpart"],
-                        "standard_number": src_obj["standard_number"],
-                        "title": src_obj["title"],
-                        "gpo_source": src_obj["gpo_source"],
-                        "content": src_obj["content"],
-                    },
-                    # vector=vector  # Optionally provide a pre-obtained vector
-                )
-        
-        if batch.number_errors > 1:
-            print("Batch import stopped due to excessive errors.")
-            raise Exception("Batch import stopped due to excessive errors.")
-        
-        return processed_objects
+import argparse
+import asyncio
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import cron_runtime
+import metrics
 
-    #load environment variables
-    env_path = (Path(__file__)
-            .resolve()
-            .parents[2]
-            / ".env")
-    load_dotenv(dotenv_path=env_path, override=False)
-    
-    openai_api_key = os.getenv("OPENAI_API_KEY")
-    jina_api_key = os.getenv("JINA_API_KEY")
-    weaviate_api_key = os.getenv("WEAVIATE_API_KEY")
-    weaviate_cluster_url = os.getenv("WEAVIATE_CLUSTER_URL")
-
-    #initialize agents
-    class OshaUrlsOutput(BaseModel):
-        osha_urls: list[str] = Field(description="A list of links to the osha standards documents")
-
-    class OshaDictOutput(BaseModel):
-        osha_dict: dict = Field(description="A dictionary of the osha standards documents")
-
-    model = OpenAIModel('o3-mini', provider=OpenAIProvider(api_key=openai_api_key))
+from crawl import TokenBucket, crawl, fetch_text, make_http_client
+from osha_manifest import Manifest, content_hash, settings_hash
+from osha_cache import ResponseCache, cache_key
+from osha_parser import parse_standard_links, parse_standard_page
+from chunking import Chunker
+from embeddings import EMBEDDING_MODEL, FakeEmbedder, OpenAIEmbedder, VectorCache
+from ingest import PROPERTY_NAMES, StreamingIngestor
+
+AGENT_MODEL_NAME = 'o3-mini'
+# A few standards disappearing from the index page is normal and never trips the drop check.
+MIN_REMOVALS_CHECKED = 3
+
+class OshaUrlsOutput(BaseModel):
+    osha_urls: list[str] = Field(description="A list of links to the osha standards documents")
+
+class OshaDictOutput(BaseModel):
+    osha_dict: dict = Field(description="A dictionary of the osha standards documents")
+
+@functools.cache
+def build_agents(openai_api_key):
+    """
+    Create the LLM agents used when the rule-based parser cannot handle a page.
+
+    pydantic_ai is only imported here, so runs the parser handles on its own never load it.
+    """
+    from pydantic_ai import Agent
+    from pydantic_ai.models.openai import OpenAIModel
+    from pydantic_ai.providers.openai import OpenAIProvider
+
+    model = OpenAIModel(AGENT_MODEL_NAME, provider=OpenAIProvider(api_key=openai_api_key))
     url_agent = Agent(model,
                       system_prompt='You are a helpful assistant that will return links in a python list from a marked down version of a webpage from osha.org that the user has given you. Only respond back with a python list of links and nothing else.',
                       output_type=OshaUrlsOutput,
@@ -130,28 +50,139 @@ def main():
                       output_type=OshaDictOutput,
                       retries=5
                       )
+    return url_agent, osha_dict_agent
+
+def osha_urls_prompt(index_page):
+    return f"What are all the links in this webpage that containt documents to Standards 1926, do not return links to a Subpart or the Table of Contents {index_page}"
+
+def osha_dict_prompt(page_text):
+    return f"Return to me the part number, subpart, standard number, title, gpo source, and the content of this document {page_text}. The part_number, subpart, standard_number, title, gpo_source, and content should be the keys of the dictionary and the values should be your answer to what each key relates to on the webpage. Content will be the content of the page that is located after the gpo source. Do not respond back with any links as a value in the dictionary."
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape OSHA Part 1926 standards into Weaviate.")
+    parser.add_argument("--concurrency", type=int, default=8,
+                        help="Maximum number of standards fetched/extracted at once")
+    parser.add_argument("--fetch-rate", type=float, default=2.0,
+                        help="Sustained Jina reader requests per second")
+    parser.add_argument("--fetch-burst", type=float, default=4.0,
+                        help="Maximum burst of Jina reader requests")
+    parser.add_argument("--extract-rate", type=float, default=4.0,
+                        help="Sustained LLM calls per second (cache hits and rule-based parses are not limited)")
+    parser.add_argument("--max-removed-fraction", type=float, default=0.1,
+                        help="Treat an index page listing fewer than this fraction of the ingested standards "
+                             "as misread: re-read it with the LLM and delete nothing")
+    parser.add_argument("--manifest", type=Path,
+                        default=Path(__file__).resolve().parent / "osha_manifest.json",
+                        help="Local manifest of ingested standards used for incremental runs")
+    parser.add_argument("--full-rebuild", action="store_true",
+                        help="Drop the collection and re-ingest every standard")
+    parser.add_argument("--cache", type=Path,
+                        default=Path(__file__).resolve().parent / "osha_cache.sqlite",
+                        help="On-disk cache of Jina pages and LLM extractions")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always call Jina and the model, ignoring the cache")
+    parser.add_argument("--fetch-cache-ttl", type=float, default=12 * 3600,
+                        help="Seconds a cached Jina page is reused (keep below the cron interval)")
+    parser.add_argument("--extract-cache-ttl", type=float, default=30 * 86400,
+                        help="Seconds a cached LLM extraction is reused")
+    parser.add_argument("--cache-max-mb", type=float, default=512,
+                        help="Evict least recently used cache entries above this size")
+    parser.add_argument("--llm-extraction", action="store_true",
+                        help="Always extract with the LLM agents instead of the rule-based parser")
+    parser.add_argument("--chunk-max-tokens", type=int, default=6000,
+                        help="Split documents longer than this many embedding tokens")
+    parser.add_argument("--chunk-overlap", type=int, default=200,
+                        help="Tokens shared between consecutive chunks of a document")
+    parser.add_argument("--embedder", choices=["openai", "fake", "server"], default="openai",
+                        help="Compute vectors client-side with OpenAI or the offline fake embedder, "
+                             "or leave vectorization to Weaviate")
+    parser.add_argument("--embedding-cache", type=Path,
+                        default=Path(__file__).resolve().parent / "embedding_cache",
+                        help="Directory of cached float32 vectors keyed by model and text hash")
+    parser.add_argument("--embedding-batch-size", type=int, default=256,
+                        help="Texts per embeddings request")
+    parser.add_argument("--batch-size", type=int, default=200,
+                        help="Objects per Weaviate batch request")
+    parser.add_argument("--weaviate-mode", choices=["cloud", "local", "embedded"],
+                        help="Weaviate Cloud, a local server or an embedded instance (default: WEAVIATE_MODE or cloud)")
+    parser.add_argument("--dead-letter", type=Path,
+                        default=Path(__file__).resolve().parent / "osha_dead_letter.jsonl",
+                        help="Where objects Weaviate still rejects after retries are written")
+    parser.add_argument("--reader-url", default="https://r.jina.ai/",
+                        help="Reader service the osha.gov pages are fetched through")
+    metrics.add_metrics_args(parser)
+    return parser.parse_args(argv)
+
+def llm_usage(result):
+    """(input, output) tokens of a pydantic_ai run, across the library's two usage field namings."""
+    usage = result.usage()
+    return (getattr(usage, "input_tokens", None) or getattr(usage, "request_tokens", None) or 0,
+            getattr(usage, "output_tokens", None) or getattr(usage, "response_tokens", None) or 0)
+
+def listing_dropped(manifest, urls, max_removed_fraction):
+    """Whether `urls` misses too many ingested standards for the index page to have been read completely."""
+    return len(manifest.removed(urls or [])) > max(MIN_REMOVALS_CHECKED, max_removed_fraction * len(manifest.entries))
+
+def main(argv=None, weaviate_client=None):
+    """
+    Args:
+        argv: Command line arguments, defaults to sys.argv
+        weaviate_client: Client to ingest into instead of the shared one for --weaviate-mode
+            (e.g. the offline fake used by pipeline_bench.py)
+    """
+    args = parse_args(argv)
+
+    chunker = Chunker(max_tokens=args.chunk_max_tokens, overlap_tokens=args.chunk_overlap)
+
+    from weaviate.classes.config import Property, DataType, Configure, Tokenization
+    from weaviate.classes.query import Filter
 
+    #load environment variables
+    openai_api_key = cron_runtime.env("OPENAI_API_KEY")
+    jina_api_key = cron_runtime.env("JINA_API_KEY")
+
+    #initialize embedder
+    embedder = None
+    if args.embedder == "openai":
+        embedder = OpenAIEmbedder(client=cron_runtime.openai_client())
+    elif args.embedder == "fake":
+        embedder = FakeEmbedder()
+    vector_cache = None
+    if embedder is not None:
+        vector_cache = VectorCache(args.embedding_cache, embedder.model, embedder.dimensions)
 
     #initilize weaviate client
-    weaviate_client = weaviate.connect_to_weaviate_cloud(
-        cluster_url=weaviate_cluster_url,
-        auth_credentials=Auth.api_key(weaviate_api_key),
-        headers={'X-OpenAI-Api-key': openai_api_key},
-    )
+    weaviate_client = weaviate_client or cron_runtime.weaviate_client(args.weaviate_mode)
+    status = "failed"
     try:
 
         #initialize weaviate collection
         collection_name = "osha_standards"
-        if weaviate_client.collections.exists(collection_name):
-            print("Collection (index) already exists. Deleting and making a new one...")
-            weaviate_client.collections.delete(collection_name)
+        manifest = Manifest(args.manifest, settings_hash(
+            chunk_max_tokens=chunker.max_tokens, chunk_overlap=chunker.overlap_tokens,
+            embedding_model=embedder.model if embedder is not None else f"server:{EMBEDDING_MODEL}",
+            embedding_dimensions=embedder.dimensions if embedder is not None else None,
+            extraction="llm" if args.llm_extraction else "parser",
+        ))
+        if args.full_rebuild:
+            manifest.clear()
+            if weaviate_client.collections.exists(collection_name):
+                print("Collection (index) already exists. Deleting and making a new one...")
+                weaviate_client.collections.delete(collection_name)
 
-        print("Creating a new collection (index) with some metadata as properties...")
-        osha_weaviate_collection = weaviate_client.collections.create(
+        if weaviate_client.collections.exists(collection_name):
+            print("Collection (index) already exists. Updating it incrementally...")
+            osha_weaviate_collection = weaviate_client.collections.get(collection_name)
+        else:
+            print("Creating a new collection (index) with some metadata as properties...")
+            # Nothing is ingested, so anything the manifest remembers is stale.
+            manifest.clear()
+            osha_weaviate_collection = weaviate_client.collections.create(
                                                     collection_name,
                                                     vectorizer_config=[
                                                         Configure.NamedVectors.text2vec_openai(
                                                             name="oshaDocumentEmbedding",
+                                                            model=EMBEDDING_MODEL,
                                                             source_properties=[
                                                                 "part_number", "subpart", "standard_number",
                                                                 "title", "gpo_source", "content"
@@ -198,34 +229,157 @@ def main():
                                                             name="content",
                                                             data_type=DataType.TEXT,
                                                             vectorize_property_name=True,
-                                                            tokenization=wvc.config.Tokenization.LOWERCASE,
+                                                            tokenization=Tokenization.LOWERCASE,
                                                         ),
                                                     ]
                                                 )
 
-        jina_url = "https://r.jina.ai/"
+        jina_url = args.reader_url
         osha_url = "https://www.osha.gov/laws-regs/regulations/standardnumber/1926"
-        headers = {
-        "Authorization": "Bearer " + jina_api_key
-        }
-
-        url_response = requests.get(jina_url + osha_url, headers=headers)
-
-        osha_urls = url_agent.run_sync(f"What are all the links in this webpage that containt documents to Standards 1926, do not return links to a Subpart or the Table of Contents {url_response.text}")
-
-        source_objects = []
-        for i, url in enumerate(osha_urls.output.osha_urls):
-            print(f"This is the url: {url}")
-            if i % 20 == 0 or i == len(osha_urls.output.osha_urls) - 1:
-                insert_batch(osha_weaviate_collection, source_objects)
-                source_objects = []
-            time.sleep(random.randint(2, 8))    
-            osha_documents_response = requests.get(jina_url + url, headers=headers)
-            osha_dict = osha_dict_agent.run_sync(f"Return to me the part number, subpart, standard number, title, gpo source, and the content of this document {osha_documents_response.text}. The part_number, subpart, standard_number, title, gpo_source, and content should be the keys of the dictionary and the values should be your answer to what each key relates to on the webpage. Content will be the content of the page that is located after the gpo source. Do not respond back with any links as a value in the dictionary.")
-            print(f"This is the dictionary: {osha_dict.output.osha_dict}")
-            source_objects.append(osha_dict.output.osha_dict)
+        fetch_limiter = TokenBucket(args.fetch_rate, args.fetch_burst)
+        extract_limiter = TokenBucket(args.extract_rate)
+
+        page_hashes = {}
+        cache = None
+        if not args.no_cache:
+            cache = ResponseCache(args.cache, max_bytes=int(args.cache_max_mb * 1024 * 1024))
+
+        async def cached_agent_run(agent_label, prompt, get_output):
+            """Run an agent, reusing a stored answer for the same model and prompt."""
+            key = cache_key("agent", AGENT_MODEL_NAME, agent_label, prompt)
+            if cache is not None:
+                cached = cache.get(key)
+                if cached is not None:
+                    return json.loads(cached)
+            url_agent, osha_dict_agent = build_agents(openai_api_key)
+            agent = {"osha_urls": url_agent, "osha_dict": osha_dict_agent}[agent_label]
+            # Only real model calls count against the LLM quota, not parses, unchanged pages or cache hits.
+            await extract_limiter.acquire()
+            with metrics.timer("llm_call"):
+                result = await agent.run(prompt)
+            tokens_in, tokens_out = llm_usage(result)
+            metrics.count("llm_tokens_in", tokens_in)
+            metrics.count("llm_tokens_out", tokens_out)
+            output = get_output(result)
+            if cache is not None:
+                cache.set(key, json.dumps(output), args.extract_cache_ttl)
+            return output
+
+        def delete_objects(uuids):
+            if uuids:
+                osha_weaviate_collection.data.delete_many(where=Filter.by_id().contains_any(uuids))
+
+        async def extract_standard(url, page_text):
+            page_hash = content_hash(page_text)
+            if manifest.is_unchanged(url, page_hash):
+                metrics.count("standards_unchanged")
+                return None
+            page_hashes[url] = page_hash
+            with metrics.timer("extract"):
+                osha_dict = None if args.llm_extraction else parse_standard_page(page_text)
+                if osha_dict is None:
+                    metrics.count("llm_extractions")
+                    if not args.llm_extraction:
+                        print(f"Parser confidence low for {url}, falling back to LLM extraction")
+                    osha_dict = await cached_agent_run("osha_dict", osha_dict_prompt(page_text),
+                                                       lambda result: result.output.osha_dict)
+            # Fail this url here; a KeyError in the ingestor's thread would stop the whole crawl.
+            missing = [name for name in PROPERTY_NAMES if name not in osha_dict]
+            if missing:
+                raise ValueError(f"extracted standard has no {', '.join(missing)}")
+            osha_dict["source_url"] = url
+            return osha_dict
+
+        async def scrape():
+            async with make_http_client(jina_api_key, args.concurrency) as http_client:
+                async def fetch(url):
+                    key = cache_key("jina", jina_url + url)
+                    if cache is not None:
+                        cached = cache.get(key)
+                        if cached is not None:
+                            metrics.count("fetch_cache_hits")
+                            return cached
+                    with metrics.timer("fetch"):
+                        page_text = await fetch_text(http_client, jina_url + url, fetch_limiter)
+                    metrics.count("pages_fetched")
+                    metrics.count("fetched_bytes", len(page_text.encode("utf-8")))
+                    if cache is not None:
+                        cache.set(key, page_text, args.fetch_cache_ttl)
+                    return page_text
+
+                index_page = await fetch(osha_url)
+                urls = None if args.llm_extraction else parse_standard_links(index_page)
+                if urls is not None and listing_dropped(manifest, urls, args.max_removed_fraction):
+                    print(f"Parsed {len(urls)} standard links but {len(manifest.entries)} standards are ingested, "
+                          f"falling back to LLM extraction")
+                    urls = None
+                elif urls is None and not args.llm_extraction:
+                    print("No standard links parsed from the index page, falling back to LLM extraction")
+                if urls is None:
+                    urls = await cached_agent_run("osha_urls", osha_urls_prompt(index_page),
+                                                  lambda result: result.output.osha_urls)
+                print(f"Found {len(urls)} standards, crawling with concurrency {args.concurrency}")
+
+                removed_urls = manifest.removed(urls) if urls else []
+                if listing_dropped(manifest, urls, args.max_removed_fraction):
+                    # A partially read index page must not wipe the standards it missed from Weaviate.
+                    print(f"{len(removed_urls)} of {len(manifest.entries)} ingested standards are not listed, "
+                          f"the index page looks incomplete; deleting none of them "
+                          f"(use --full-rebuild if they really are gone)")
+                    metrics.count("removals_refused", len(removed_urls))
+                    removed_urls = []
+                for url in removed_urls:
+                    print(f"Standard no longer listed, deleting: {url}")
+                    delete_objects(manifest.forget(url))
+                manifest.save()
+
+                ingestor = StreamingIngestor(osha_weaviate_collection, chunker, embedder, vector_cache,
+                                             batch_size=args.batch_size,
+                                             embed_batch_size=args.embedding_batch_size,
+                                             dead_letter_path=args.dead_letter).start()
+                unchanged = 0
+                scrape_failures = 0
+                try:
+                    async for result in crawl(urls, fetch, extract_standard, concurrency=args.concurrency):
+                        if result.error is not None:
+                            scrape_failures += 1
+                            metrics.count("scrape_failures")
+                            print(f"Failed to scrape {result.url}: {result.error}")
+                            continue
+                        if result.output is None:
+                            unchanged += 1
+                            continue
+                        metrics.count("standards_extracted")
+                        print(f"Extracted {result.output['standard_number']} from {result.url} "
+                              f"(fetch {result.fetch_seconds:.2f}s, extract {result.extract_seconds:.2f}s)")
+                        await asyncio.to_thread(ingestor.put, result.output)
+                finally:
+                    report = await asyncio.to_thread(ingestor.close)
+
+                # Only standards whose objects all landed are recorded, the rest are retried next run.
+                for url, standard_number, new_uuids in report.committed:
+                    # A standard that shrank to fewer chunks leaves orphaned objects behind.
+                    stale_uuids = [uuid for uuid in manifest.uuids(url) if uuid not in new_uuids]
+                    delete_objects(stale_uuids)
+                    manifest.record(url, standard_number, page_hashes[url], new_uuids)
+                manifest.save()
+
+                print(f"Ingested {report.objects} objects from {report.documents} standards, "
+                      f"{report.retried} retried, {report.dead_lettered} dead-lettered")
+                print(f"{unchanged} standards unchanged since the last run, {len(removed_urls)} removed, "
+                      f"{scrape_failures} failed to scrape, {len(report.failed_urls)} failed to ingest")
+                if cache is not None:
+                    print(f"Cache: {cache.hits} hits, {cache.misses} misses")
+
+        try:
+            asyncio.run(scrape())
+            status = "ok"
+        finally:
+            if cache is not None:
+                cache.close()
     finally:     
-        weaviate_client.close()
+        metrics.write_from_args(args, "osha", status)
+        cron_runtime.close_all()
 
 
 if __name__ == '__main__':
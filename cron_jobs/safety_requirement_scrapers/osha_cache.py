@@ -0,0 +1,95 @@
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional
+
+
+def cache_key(*parts: str) -> str:
+    """Content address for a cached value, e.g. cache_key("extract", model, prompt)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        encoded = part.encode("utf-8")
+        # Length-prefix each part so ("ab", "c") and ("a", "bc") never collide.
+        digest.update(len(encoded).to_bytes(8, "big"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite-backed cache for Jina reader pages and LLM extractions.
+
+    Every entry carries its own expiry so page fetches can go stale quickly while
+    extractions (a pure function of prompt and model) are kept much longer. Once
+    the stored values exceed `max_bytes` the least recently used entries are evicted.
+    """
+
+    def __init__(self, path: Path, max_bytes: int = 512 * 1024 * 1024, evict_every: int = 100):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.evict_every = evict_every
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed_at_idx ON cache (accessed_at)")
+        self.conn.commit()
+        self.evict()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        row = self.conn.execute(
+            "SELECT value FROM cache WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        self.conn.commit()
+        self.hits += 1
+        return row[0]
+
+    def set(self, key: str, value: str, ttl_seconds: float):
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, size, created_at, accessed_at, expires_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, value, len(value.encode("utf-8")), now, now, now + ttl_seconds),
+        )
+        self.conn.commit()
+        self._writes += 1
+        if self._writes % self.evict_every == 0:
+            self.evict()
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until under `max_bytes`."""
+        self.conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total > self.max_bytes:
+            rows = self.conn.execute("SELECT key, size FROM cache ORDER BY accessed_at").fetchall()
+            doomed = []
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                doomed.append((key,))
+                total -= size
+            self.conn.executemany("DELETE FROM cache WHERE key = ?", doomed)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,84 @@
+import datetime
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Iterable, Optional
+
+from weaviate.util import generate_uuid5
+
+
+def content_hash(text: str) -> str:
+    """Hash of a fetched source page, used to detect changed standards."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def settings_hash(**settings) -> str:
+    """Hash of the settings documents are chunked and embedded with, e.g. chunk size and embedding model."""
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def object_uuid(standard_number: str, chunk_index: int = 0) -> str:
+    """Deterministic Weaviate UUID for one chunk of a standard, so re-ingests upsert in place."""
+    return str(generate_uuid5(f"{standard_number}#chunk_{chunk_index}"))
+
+
+class Manifest:
+    """
+    Local record of what is currently ingested in the `osha_standards` collection.
+
+    Entries are keyed by source url and hold the standard number, the hash of the
+    page it was extracted from, the hash of the ingest settings it was chunked and
+    embedded with, when it was fetched and the UUIDs of its objects. A standard
+    is only unchanged when both hashes match, so new chunking or embedding
+    settings re-ingest every standard without a --full-rebuild.
+    """
+
+    def __init__(self, path: Path, ingest_settings_hash: Optional[str] = None):
+        self.path = Path(path)
+        self.ingest_settings_hash = ingest_settings_hash
+        if self.path.exists():
+            with open(self.path) as f:
+                self.entries = json.load(f)
+        else:
+            self.entries = {}
+
+    def is_unchanged(self, url: str, page_hash: str) -> bool:
+        entry = self.entries.get(url)
+        return (entry is not None and entry["content_hash"] == page_hash
+                and entry.get("settings_hash") == self.ingest_settings_hash)
+
+    def uuids(self, url: str) -> list[str]:
+        entry = self.entries.get(url)
+        return list(entry["uuids"]) if entry else []
+
+    def record(self, url: str, standard_number: str, page_hash: str, uuids: list[str],
+               fetched_at: Optional[str] = None):
+        self.entries[url] = {
+            "standard_number": standard_number,
+            "content_hash": page_hash,
+            "settings_hash": self.ingest_settings_hash,
+            "fetched_at": fetched_at or datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "uuids": list(uuids),
+        }
+
+    def forget(self, url: str) -> list[str]:
+        """Drop a url from the manifest and return the UUIDs it owned."""
+        entry = self.entries.pop(url, None)
+        return list(entry["uuids"]) if entry else []
+
+    def removed(self, current_urls: Iterable[str]) -> list[str]:
+        """Urls that are in the manifest but no longer listed on the index page."""
+        current = set(current_urls)
+        return [url for url in self.entries if url not in current]
+
+    def clear(self):
+        self.entries = {}
+
+    def save(self):
+        """Write the manifest atomically so a crash never leaves it half written."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
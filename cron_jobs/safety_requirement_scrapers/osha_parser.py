@@ -0,0 +1,134 @@
+"""
+Rule-based extraction for the Jina reader markdown of osha.gov Part 1926 pages.
+
+The standard pages all share the same header block (Part Number, Subpart,
+Standard Number, Title, GPO Source) followed by the regulation text, so the
+fields can be pulled out with a few regular expressions in milliseconds instead
+of a model round trip. Both parsers return None when the page does not look
+like what they expect, which is the caller's cue to fall back to the LLM agents.
+"""
+import re
+from typing import Optional
+from urllib.parse import urlparse
+
+OSHA_STANDARD_PREFIX = "https://www.osha.gov/laws-regs/regulations/standardnumber/1926/"
+
+# Header labels in page order, mapped to the keys of the extracted dictionary.
+FIELD_LABELS = {
+    "Part Number": "part_number",
+    "Part Number Title": "part_number_title",
+    "Subpart": "subpart",
+    "Subpart Title": "subpart_title",
+    "Standard Number": "standard_number",
+    "Title": "title",
+    "GPO Source": "gpo_source",
+}
+REQUIRED_FIELDS = ("part_number", "subpart", "standard_number", "title", "gpo_source", "content")
+
+MARKDOWN_LINK_RE = re.compile(r"!?\[([^\]]*)\]\(([^)\s]+)(?:\s+\"[^\"]*\")?\)")
+LABEL_RE = re.compile(
+    r"^\s*(?:[*+-]\s+)?(?:\*\*)?(" + "|".join(sorted(map(re.escape, FIELD_LABELS), key=len, reverse=True))
+    + r")(?:\*\*)?\s*:\s*(?:\*\*)?\s*(.*)$"
+)
+STANDARD_PATH_RE = re.compile(r"/standardnumber/1926/(1926\.\d+[A-Za-z0-9]*)/?$")
+STANDARD_NUMBER_RE = re.compile(r"^1926\.\d+")
+# Page chrome that follows the regulation text on osha.gov.
+FOOTER_MARKERS = (
+    "[Next Standard",
+    "[Previous Standard",
+    "UNITED STATES DEPARTMENT OF LABOR",
+    "Occupational Safety and Health Administration\n200 Constitution",
+)
+
+MIN_CONTENT_CHARS = 20
+
+
+def strip_links(text: str) -> str:
+    """Replace markdown links and images with their text."""
+    return MARKDOWN_LINK_RE.sub(lambda match: match.group(1), text)
+
+
+def _markdown_body(page_text: str) -> str:
+    """Drop the Title/URL Source preamble the Jina reader puts before the page."""
+    marker = "Markdown Content:"
+    index = page_text.find(marker)
+    return page_text[index + len(marker):] if index != -1 else page_text
+
+
+def parse_standard_links(index_page: str) -> Optional[list[str]]:
+    """
+    Extract the links to individual 1926 standards from the Part 1926 index page.
+
+    Subpart and table of contents pages are skipped, duplicates are dropped and
+    page order is kept.
+
+    Returns:
+        The list of standard urls, or None if the page contained none
+    """
+    urls = []
+    seen = set()
+    for match in MARKDOWN_LINK_RE.finditer(index_page):
+        href = match.group(2)
+        path = urlparse(href).path
+        standard = STANDARD_PATH_RE.search(path)
+        if standard is None or "subpart" in path.lower() or "toc" in path.lower():
+            continue
+        url = OSHA_STANDARD_PREFIX + standard.group(1)
+        if url not in seen:
+            seen.add(url)
+            urls.append(url)
+    return urls or None
+
+
+def parse_standard_page(page_text: str) -> Optional[dict]:
+    """
+    Split a standard page into part_number, subpart, standard_number, title,
+    gpo_source and content.
+
+    Returns:
+        The extracted dictionary, or None when parsing confidence is low (a
+        header field is missing, the standard number is malformed or there is
+        no regulation text)
+    """
+    lines = _markdown_body(page_text).splitlines()
+    fields = {}
+    current = None
+    content_start = None
+
+    for index, line in enumerate(lines):
+        label = LABEL_RE.match(line)
+        if label and FIELD_LABELS[label.group(1)] not in fields:
+            current = FIELD_LABELS[label.group(1)]
+            fields[current] = strip_links(label.group(2)).strip()
+            continue
+        if current is None:
+            continue
+        stripped = strip_links(line).strip().lstrip("*+- ").strip()
+        if not stripped:
+            continue
+        if fields[current]:
+            # The value is complete; the first other line after GPO Source starts the text.
+            if current == "gpo_source":
+                content_start = index
+                break
+            current = None
+            continue
+        fields[current] = stripped
+
+    if content_start is None:
+        return None
+
+    content = "\n".join(lines[content_start:])
+    for marker in FOOTER_MARKERS:
+        footer = content.find(marker)
+        if footer != -1:
+            content = content[:footer]
+    fields["content"] = re.sub(r"\n{3,}", "\n\n", strip_links(content)).strip()
+
+    if any(not fields.get(key) for key in REQUIRED_FIELDS):
+        return None
+    if not STANDARD_NUMBER_RE.match(fields["standard_number"]):
+        return None
+    if len(fields["content"]) < MIN_CONTENT_CHARS:
+        return None
+    return {key: fields[key] for key in REQUIRED_FIELDS}
@@ -0,0 +1,136 @@
+"""
+Regression fixtures for the rule-based OSHA parser.
+
+`record` saves Jina reader pages together with what the LLM agents extract from
+them; `check` runs the rule-based parser over the saved pages and compares the
+result with the recorded LLM output, so parser changes can be validated offline.
+The committed fixtures are excerpts of the index page and four standards in the
+reader's markdown layout (including non-ASCII text and a two-letter subpart),
+with the expected fields; `record` replaces them with full live captures.
+
+    python parser_regression.py record --limit 40
+    python parser_regression.py check
+"""
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+from osha_parser import REQUIRED_FIELDS, parse_standard_links, parse_standard_page
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "parser_fixtures"
+INDEX_FIXTURE = "index"
+METADATA_FIELDS = [field for field in REQUIRED_FIELDS if field != "content"]
+
+
+def normalize(value) -> str:
+    return re.sub(r"\s+", " ", str(value)).strip().lower()
+
+
+def content_similarity(expected: str, actual: str) -> float:
+    """Word-level Jaccard similarity; the LLM tends to reflow or trim the text."""
+    expected_words = set(normalize(expected).split())
+    actual_words = set(normalize(actual).split())
+    if not expected_words and not actual_words:
+        return 1.0
+    return len(expected_words & actual_words) / len(expected_words | actual_words)
+
+
+def fixture_name(url: str) -> str:
+    return url.rstrip("/").rsplit("/", 1)[-1]
+
+
+def record(args):
+    """Fetch pages through the Jina reader and store them with the LLM extraction."""
+    from osha import build_agents, cron_runtime, osha_dict_prompt, osha_urls_prompt
+
+    url_agent, osha_dict_agent = build_agents(cron_runtime.env("OPENAI_API_KEY"))
+    session = cron_runtime.http_session()
+    session.headers["Authorization"] = "Bearer " + cron_runtime.env("JINA_API_KEY")
+    jina_url = "https://r.jina.ai/"
+    osha_url = "https://www.osha.gov/laws-regs/regulations/standardnumber/1926"
+
+    FIXTURES_DIR.mkdir(exist_ok=True)
+    index_page = session.get(jina_url + osha_url).text
+    urls = url_agent.run_sync(osha_urls_prompt(index_page)).output.osha_urls
+    (FIXTURES_DIR / f"{INDEX_FIXTURE}.md").write_text(index_page)
+    (FIXTURES_DIR / f"{INDEX_FIXTURE}.json").write_text(json.dumps(urls, indent=2))
+    print(f"Recorded index page with {len(urls)} links")
+
+    for url in urls[:args.limit]:
+        page_text = session.get(jina_url + url).text
+        osha_dict = osha_dict_agent.run_sync(osha_dict_prompt(page_text)).output.osha_dict
+        name = fixture_name(url)
+        (FIXTURES_DIR / f"{name}.md").write_text(page_text)
+        (FIXTURES_DIR / f"{name}.json").write_text(json.dumps(osha_dict, indent=2))
+        print(f"Recorded {name}")
+
+
+def check(args):
+    """Compare the rule-based parser against every recorded fixture."""
+    pages = sorted(FIXTURES_DIR.glob("*.md"))
+    if not pages:
+        print(f"No fixtures in {FIXTURES_DIR}, run `record` first")
+        return 1
+
+    failures = 0
+    fallbacks = 0
+    parse_seconds = 0.0
+    for page_path in pages:
+        expected = json.loads(page_path.with_suffix(".json").read_text())
+        page_text = page_path.read_text()
+        start = time.perf_counter()
+        if page_path.stem == INDEX_FIXTURE:
+            actual = parse_standard_links(page_text)
+        else:
+            actual = parse_standard_page(page_text)
+        parse_seconds += time.perf_counter() - start
+
+        if actual is None:
+            fallbacks += 1
+            print(f"FALLBACK {page_path.stem}: parser declined the page")
+            continue
+
+        problems = []
+        if page_path.stem == INDEX_FIXTURE:
+            missing = set(expected) - set(actual)
+            extra = set(actual) - set(expected)
+            if missing or extra:
+                problems.append(f"{len(missing)} links missing, {len(extra)} unexpected")
+        else:
+            for field in METADATA_FIELDS:
+                if normalize(expected.get(field, "")) not in normalize(actual[field]) \
+                        and normalize(actual[field]) not in normalize(expected.get(field, "")):
+                    problems.append(f"{field}: expected {expected.get(field)!r}, got {actual[field]!r}")
+            similarity = content_similarity(expected.get("content", ""), actual["content"])
+            if similarity < args.min_similarity:
+                problems.append(f"content similarity {similarity:.2f}")
+
+        if problems:
+            failures += 1
+            print(f"FAIL {page_path.stem}: " + "; ".join(problems))
+
+    print(f"{len(pages)} fixtures, {failures} mismatches, {fallbacks} LLM fallbacks, "
+          f"{parse_seconds * 1000 / len(pages):.2f} ms per page")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    record_parser = subparsers.add_parser("record", help="Record fixtures from osha.gov (needs API keys)")
+    record_parser.add_argument("--limit", type=int, default=40, help="Number of standard pages to record")
+    check_parser = subparsers.add_parser("check", help="Validate the parser against recorded fixtures")
+    check_parser.add_argument("--min-similarity", type=float, default=0.85,
+                              help="Minimum word overlap between parsed and LLM-extracted content")
+    args = parser.parse_args()
+    if args.command == "record":
+        record(args)
+        return 0
+    return check(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
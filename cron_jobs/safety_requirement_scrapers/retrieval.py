@@ -0,0 +1,297 @@
+"""
+Retrieval over the `osha_standards` collection.
+
+A question is first scanned for the Part 1926 identifiers it names ("subpart CC",
+"1926.451"), which become `Filter` prefilters on `part_number`, `subpart` and
+`standard_number`, so Weaviate only ranks the matching objects. Ranking is hybrid
+by default: BM25 on the LOWERCASE-tokenized `content` fused with vector search,
+which keeps exact regulatory wording ("guardrail", "toeboard") from being drowned
+out by loosely similar text. Chunked standards (titles ending in
+"NOTE: CHUNK chunk_N") are re-assembled into whole standards before they are
+returned, and results for repeated questions come from an LRU cache.
+"""
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from embeddings import Embedder
+from ingest import VECTOR_NAME
+from osha_cache import ResponseCache, cache_key
+
+CHUNK_TITLE_RE = re.compile(r"\s*NOTE: CHUNK chunk_(\d+)\s*$")
+# Subpart letters are capitals (Part 1926 runs A to Z, then AA to DD), so "the subpart on
+# scaffolds" or "which subpart is" does not become a prefilter.
+SUBPART_RE = re.compile(r"\b(?i:subpart)\s+([A-Z]|AA|BB|CC|DD)\b")
+STANDARD_NUMBER_RE = re.compile(r"\b(1926\.\d+[a-z]?)\b", re.IGNORECASE)
+PART_NUMBER_RE = re.compile(r"\b(?:part\s+)?(19(?:10|26))\b", re.IGNORECASE)
+
+SEARCH_MODES = ("hybrid", "bm25", "vector")
+
+
+@dataclass(frozen=True)
+class QueryFilters:
+    part_number: Optional[str] = None
+    subpart: Optional[str] = None
+    standard_number: Optional[str] = None
+
+
+@dataclass
+class RetrievedStandard:
+    standard_number: str
+    title: str
+    part_number: str
+    subpart: str
+    gpo_source: str
+    content: str
+    score: float
+    # Chunks the standard was stored as, and how many of them matched the question.
+    chunks: int = 1
+    matched_chunks: int = 1
+
+
+def question_filters(question: str) -> QueryFilters:
+    """Prefilters for the Part 1926 identifiers a question names, e.g. "1926 subpart CC"."""
+    standard = STANDARD_NUMBER_RE.search(question)
+    subpart = SUBPART_RE.search(question)
+    part = PART_NUMBER_RE.search(question)
+    return QueryFilters(
+        part_number=part.group(1) if part else None,
+        subpart=subpart.group(1) if subpart else None,
+        standard_number=standard.group(1) if standard else None,
+    )
+
+
+def build_filter(filters: QueryFilters):
+    """Weaviate filter for `filters`, or None when it has no fields."""
+    from weaviate.classes.query import Filter
+
+    conditions = [Filter.by_property(name).equal(value) for name, value in asdict(filters).items() if value]
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else Filter.all_of(conditions)
+
+
+def chunk_index(title: str) -> tuple[str, int]:
+    """Base title and 1-based chunk number of a stored object (0 for an unchunked standard)."""
+    match = CHUNK_TITLE_RE.search(title)
+    if match is None:
+        return title, 0
+    return title[:match.start()], int(match.group(1))
+
+
+def merge_chunks(chunks: list[str], probe_chars: int = 64) -> str:
+    """
+    Join consecutive chunks of one document, dropping the text they overlap on.
+
+    The chunker repeats the tail of each chunk at the start of the next one, so
+    the start of every chunk is looked up near the end of the text so far.
+    """
+    if not chunks:
+        return ""
+    merged = chunks[0]
+    for chunk in chunks[1:]:
+        probe = chunk[:probe_chars]
+        position = merged.rfind(probe) if probe else -1
+        if position != -1 and chunk.startswith(merged[position:]):
+            merged += chunk[len(merged) - position:]
+        else:
+            merged += "\n" + chunk
+    return merged
+
+
+class LRUCache:
+    """Thread-safe in-memory LRU with an optional time to live per entry."""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (self.ttl_seconds is not None and time.monotonic() - entry[1] > self.ttl_seconds):
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class OshaRetriever:
+    """
+    Question -> whole OSHA standards, ranked.
+
+    Results are cached in memory (LRU) and, when `persistent_cache` is given, in
+    the scraper's SQLite response cache, so a repeated question in a later run
+    does not touch Weaviate either. Cached results expire after `cache_ttl` seconds
+    because a re-ingest can change them.
+    """
+
+    # Prefix of the cache keys, so backends sharing a persistent cache keep their results apart.
+    cache_namespace = "retrieval"
+
+    def __init__(self, collection, embedder: Optional[Embedder] = None, alpha: float = 0.5,
+                 cache_size: int = 256, cache_ttl: float = 6 * 3600,
+                 persistent_cache: Optional[ResponseCache] = None):
+        """
+        Args:
+            collection: The `osha_standards` Weaviate collection
+            embedder: Embeds questions client-side, for collections ingested with client-side
+                vectors; None leaves vectorization to the collection's vectorizer
+            alpha: Hybrid weight, 0 is pure BM25 and 1 pure vector search
+            cache_size: Questions kept in the in-memory LRU
+            cache_ttl: Seconds a cached result is reused
+            persistent_cache: Optional ResponseCache shared across runs
+        """
+        self.collection = collection
+        self.embedder = embedder
+        self.alpha = alpha
+        self.cache_ttl = cache_ttl
+        self.cache = LRUCache(cache_size, cache_ttl)
+        self.persistent_cache = persistent_cache
+
+    def search(self, question: str, limit: int = 5, mode: str = "hybrid",
+               filters: Optional[QueryFilters] = None, use_cache: bool = True) -> list[RetrievedStandard]:
+        """
+        The `limit` best standards for a question.
+
+        Args:
+            question: Natural language question
+            limit: Number of standards returned
+            mode: "hybrid", "bm25" or "vector"
+            filters: Prefilters, defaults to the identifiers named in the question
+            use_cache: Whether cached results may be returned
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode {mode!r}, expected one of {SEARCH_MODES}")
+        filters = question_filters(question) if filters is None else filters
+        key = cache_key(self.cache_namespace, mode, str(self.alpha), str(limit), json.dumps(asdict(filters)),
+                        " ".join(question.lower().split()))
+        if use_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+            if self.persistent_cache is not None:
+                stored = self.persistent_cache.get(key)
+                if stored is not None:
+                    results = [RetrievedStandard(**item) for item in json.loads(stored)]
+                    self.cache.set(key, results)
+                    return results
+
+        results = self._search(question, limit, mode, filters)
+        self.cache.set(key, results)
+        if self.persistent_cache is not None:
+            self.persistent_cache.set(key, json.dumps([asdict(result) for result in results]), self.cache_ttl)
+        return results
+
+    def _ranked_objects(self, question: str, limit: int, mode: str,
+                        filters: QueryFilters) -> list[tuple[float, dict]]:
+        """(score, properties) of the best matching objects, best first."""
+        from weaviate.classes.query import MetadataQuery
+
+        where = build_filter(filters)
+        if mode == "bm25":
+            response = self.collection.query.bm25(query=question, query_properties=["content", "title"],
+                                                  filters=where, limit=limit,
+                                                  return_metadata=MetadataQuery(score=True))
+        else:
+            vector = self.embedder.embed([question])[0].tolist() if self.embedder is not None else None
+            if mode == "vector" and vector is not None:
+                response = self.collection.query.near_vector(near_vector=vector, target_vector=VECTOR_NAME,
+                                                             filters=where, limit=limit,
+                                                             return_metadata=MetadataQuery(distance=True))
+            elif mode == "vector":
+                response = self.collection.query.near_text(query=question, target_vector=VECTOR_NAME,
+                                                           filters=where, limit=limit,
+                                                           return_metadata=MetadataQuery(distance=True))
+            else:
+                response = self.collection.query.hybrid(query=question, alpha=self.alpha, vector=vector,
+                                                        target_vector=VECTOR_NAME,
+                                                        query_properties=["content", "title"],
+                                                        filters=where, limit=limit,
+                                                        return_metadata=MetadataQuery(score=True))
+        return [
+            (obj.metadata.score if obj.metadata.score is not None else 1.0 - (obj.metadata.distance or 0.0),
+             obj.properties)
+            for obj in response.objects
+        ]
+
+    def _document_chunks(self, standard_numbers: list[str]) -> list[dict]:
+        """Properties of every stored chunk of the given standards."""
+        from weaviate.classes.query import Filter
+
+        # `standard_number` is word-tokenized, so contains_any would match on the shared "1926"
+        # token; equal needs every token of one number. Near misses are dropped client-side.
+        wanted = set(standard_numbers)
+        response = self.collection.query.fetch_objects(
+            filters=Filter.any_of([Filter.by_property("standard_number").equal(number) for number in wanted]),
+            return_properties=["standard_number", "title", "content"],
+            limit=1000,
+        )
+        return [obj.properties for obj in response.objects if obj.properties["standard_number"] in wanted]
+
+    def _search(self, question: str, limit: int, mode: str, filters: QueryFilters) -> list[RetrievedStandard]:
+        # Several chunks of one standard can match, so over-fetch before grouping.
+        ranked_objects = self._ranked_objects(question, limit * 3, mode, filters)
+        if not ranked_objects and filters.part_number and (filters.subpart or filters.standard_number):
+            # "1926" in a question is almost always redundant; retry without it before giving up.
+            filters = QueryFilters(subpart=filters.subpart, standard_number=filters.standard_number)
+            ranked_objects = self._ranked_objects(question, limit * 3, mode, filters)
+        if not ranked_objects and filters != QueryFilters():
+            # A misread identifier should not leave the question unanswered.
+            ranked_objects = self._ranked_objects(question, limit * 3, mode, QueryFilters())
+
+        best = {}
+        matched = {}
+        for score, properties in ranked_objects:
+            number = properties["standard_number"]
+            matched[number] = matched.get(number, 0) + 1
+            if number not in best or score > best[number][0]:
+                best[number] = (score, properties)
+        ranked = sorted(best.items(), key=lambda item: item[1][0], reverse=True)[:limit]
+        documents = self._whole_documents([number for number, _ in ranked])
+
+        results = []
+        for number, (score, properties) in ranked:
+            title, content, chunks = documents.get(number, (chunk_index(properties["title"])[0],
+                                                            properties["content"], 1))
+            results.append(RetrievedStandard(
+                standard_number=number, title=title, part_number=properties["part_number"],
+                subpart=properties["subpart"], gpo_source=properties["gpo_source"], content=content,
+                score=float(score), chunks=chunks, matched_chunks=matched[number],
+            ))
+        return results
+
+    def _whole_documents(self, standard_numbers: list[str]) -> dict:
+        """standard_number -> (title, re-assembled content, chunk count) for the given standards."""
+        if not standard_numbers:
+            return {}
+        parts = {}
+        for properties in self._document_chunks(standard_numbers):
+            title, index = chunk_index(properties["title"])
+            parts.setdefault(properties["standard_number"], []).append((index, title, properties["content"]))
+        documents = {}
+        for number, chunks in parts.items():
+            chunks.sort()
+            documents[number] = (chunks[0][1], merge_chunks([content for _, _, content in chunks]), len(chunks))
+        return documents
@@ -0,0 +1,102 @@
+"""
+Latency and recall of OSHA retrieval modes over a fixed question set.
+
+Every question has the standards a correct answer must cite. Each mode (vector
+only, BM25, hybrid, each with and without the question prefilters) answers every
+question once uncached; recall@k is the share of expected standards among the
+top k results. A second, cached pass shows what repeated questions cost.
+
+    python retrieval_bench.py --limit 5
+    python retrieval_bench.py --weaviate-mode embedded
+    python retrieval_bench.py --local-index --embedder fake   # the offline snapshot instead
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import cron_runtime
+
+from local_index import DEFAULT_SNAPSHOT, LocalIndex, LocalOshaRetriever, make_embedder
+from retrieval import OshaRetriever, QueryFilters
+
+# (question, standard numbers a correct answer cites)
+QUESTIONS = [
+    ("What are the guardrail height requirements for fall protection?", {"1926.502"}),
+    ("When does an employer have a duty to provide fall protection under Subpart M?", {"1926.501"}),
+    ("What are the general requirements for scaffolds?", {"1926.451"}),
+    ("What does 1926.1053 say about ladder side rails?", {"1926.1053"}),
+    ("What protective systems are required for excavations?", {"1926.652"}),
+    ("When must workers wear hard hats for head protection?", {"1926.100"}),
+    ("What eye and face protection is required on a construction site?", {"1926.102"}),
+    ("When is hearing protection required?", {"1926.101"}),
+    ("How many fire extinguishers are required on a construction site?", {"1926.150"}),
+    ("When are ground-fault circuit interrupters required for temporary wiring?", {"1926.404"}),
+    ("What are the requirements for stairways on construction sites?", {"1926.1052"}),
+    ("What does 1926 subpart CC require before assembling a crane?", {"1926.1403", "1926.1404"}),
+    ("What are the respirable crystalline silica exposure controls in Table 1?", {"1926.1153"}),
+    ("What fire prevention is required for welding and cutting?", {"1926.352"}),
+    ("What permits are required to enter a confined space in construction?", {"1926.1203"}),
+    ("What must be on a hazard communication label?", {"1926.59"}),
+]
+
+MODES = [
+    ("vector", "vector", False),
+    ("bm25", "bm25", False),
+    ("hybrid", "hybrid", False),
+    ("vector + prefilter", "vector", True),
+    ("bm25 + prefilter", "bm25", True),
+    ("hybrid + prefilter", "hybrid", True),
+]
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=5, help="k of recall@k")
+    parser.add_argument("--alpha", type=float, default=0.5, help="Hybrid weight of vector search")
+    parser.add_argument("--weaviate-mode", choices=["cloud", "local", "embedded"])
+    parser.add_argument("--local-index", nargs="?", type=Path, const=DEFAULT_SNAPSHOT,
+                        help="Benchmark a snapshot written by `local_index.py export` instead of Weaviate")
+    parser.add_argument("--nprobe", type=int, default=8, help="IVF lists scored per query with --local-index")
+    parser.add_argument("--embedder", choices=["openai", "fake", "none"], default="openai",
+                        help="Embeds questions with --local-index; vector modes are skipped with none")
+    args = parser.parse_args()
+
+    if args.local_index is not None:
+        index = LocalIndex(args.local_index, nprobe=args.nprobe)
+        embedder = make_embedder(args.embedder)
+        new_retriever = lambda: LocalOshaRetriever(index, embedder=embedder, alpha=args.alpha)
+        modes = [mode for mode in MODES if embedder is not None or mode[1] != "vector"]
+    else:
+        collection = cron_runtime.weaviate_client(args.weaviate_mode).collections.get("osha_standards")
+        new_retriever = lambda: OshaRetriever(collection, alpha=args.alpha)
+        modes = MODES
+    print(f"{len(QUESTIONS)} questions, recall@{args.limit}\n")
+    print(f"{'mode':<20} {'recall':>7} {'p50 ms':>8} {'p95 ms':>8} {'cached p50 ms':>14}")
+    for label, mode, prefilter in modes:
+        retriever = new_retriever()
+        latencies, cached_latencies, recalls = [], [], []
+        for question, expected in QUESTIONS:
+            filters = None if prefilter else QueryFilters()
+            start = time.perf_counter()
+            results = retriever.search(question, limit=args.limit, mode=mode, filters=filters, use_cache=False)
+            latencies.append((time.perf_counter() - start) * 1000)
+            found = {result.standard_number for result in results}
+            recalls.append(len(found & expected) / len(expected))
+
+            start = time.perf_counter()
+            retriever.search(question, limit=args.limit, mode=mode, filters=filters)
+            cached_latencies.append((time.perf_counter() - start) * 1000)
+        print(f"{label:<20} {statistics.mean(recalls):>7.2f} {percentile(latencies, 0.5):>8.1f} "
+              f"{percentile(latencies, 0.95):>8.1f} {percentile(cached_latencies, 0.5):>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
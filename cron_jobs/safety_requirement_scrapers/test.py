@@ -1,65 +1,61 @@
-import requests
-from pydantic_ai import Agent
-from pydantic_ai.models.openai import OpenAIModel
-from pydantic_ai.providers.openai import OpenAIProvider
-from pydantic import BaseModel, Field
+import argparse
+import sys
 from pathlib import Path
-from dotenv import load_dotenv
-import os
-import weaviate
-from weaviate.classes.config import Property, DataType, Configure
-from weaviate.classes.config import Tokenization
-from weaviate.classes.init import Auth
-import weaviate.classes as wvc
-from weaviate.classes.query import Filter
-from weaviate.classes.config import Configure
-import json
-import time
-import random
-import tiktoken
-from weaviate.agents.query import QueryAgent
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import cron_runtime
+
+from local_index import DEFAULT_SNAPSHOT, LocalIndex, LocalOshaRetriever, make_embedder
+from retrieval import SEARCH_MODES, OshaRetriever
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Ask a question against the osha_standards collection.")
+    parser.add_argument("question", nargs="?",
+                        default="what should workers of subcontractors we hired be wearing on a construction site?")
+    parser.add_argument("--mode", choices=SEARCH_MODES, default="hybrid",
+                        help="Retrieval ranking (filters on subpart/standard numbers named in the question apply to all)")
+    parser.add_argument("--limit", type=int, default=5, help="Standards returned")
+    parser.add_argument("--agent", action="store_true",
+                        help="Answer with Weaviate's QueryAgent instead of listing the retrieved standards")
+    parser.add_argument("--local-index", nargs="?", type=Path, const=DEFAULT_SNAPSHOT,
+                        help="Search a snapshot written by `local_index.py export` instead of Weaviate")
+    parser.add_argument("--embedder", choices=["openai", "fake", "none"], default="openai",
+                        help="Embeds questions for --local-index; none (or an unreachable API) falls back to BM25")
+    return parser.parse_args()
+
+def print_results(results):
+    for result in results:
+        print(f"{result.score:6.3f}  {result.standard_number}  {result.title}  "
+              f"(subpart {result.subpart}, {result.matched_chunks}/{result.chunks} chunks matched)")
 
 def main():
-    #load environment variables
-    env_path = (Path(__file__)
-            .resolve()
-            .parents[2]
-            / ".env")
-    load_dotenv(dotenv_path=env_path, override=False)
-    
-    openai_api_key = os.getenv("OPENAI_API_KEY")
-    weaviate_api_key = os.getenv("WEAVIATE_API_KEY")
-    weaviate_cluster_url = os.getenv("WEAVIATE_CLUSTER_URL")
+    args = parse_args()
+
+    if args.local_index is not None:
+        retriever = LocalOshaRetriever(LocalIndex(args.local_index), embedder=make_embedder(args.embedder))
+        print_results(retriever.search(args.question, limit=args.limit, mode=args.mode))
+        return
 
     #initilize weaviate client
-    weaviate_client = weaviate.connect_to_weaviate_cloud(
-        cluster_url=weaviate_cluster_url,
-        auth_credentials=Auth.api_key(weaviate_api_key),
-        headers={'X-OpenAI-Api-key': openai_api_key},
-    )
+    weaviate_client = cron_runtime.weaviate_client()
 
     print(f"client is ready: {weaviate_client.is_ready()}")
 
-    # collection = weaviate_client.collections.get("osha_standards")
-    # response = collection.query.near_text(
-    #     query="return to me everything for subpart 1926 subpart CC",
-    #     limit=30
-    # )
-
-    # for obj in response.objects:
-    #     print(json.dumps(obj.properties, indent=2))
-
-    #     weaviate_client.close()  # Free up resources
+    if args.agent:
+        from weaviate.agents.query import QueryAgent
 
-    qa = QueryAgent(
-        client=weaviate_client, collections=["osha_standards"]
-    )
+        qa = QueryAgent(
+            client=weaviate_client, collections=["osha_standards"]
+        )
 
-    response = qa.run("what should workers of subcontractors we hired be wearing on a construction site?")
+        response = qa.run(args.question)
 
-    response.display()
+        response.display()
+    else:
+        retriever = OshaRetriever(weaviate_client.collections.get("osha_standards"))
+        print_results(retriever.search(args.question, limit=args.limit, mode=args.mode))
 
-    weaviate_client.close()
+    cron_runtime.close_all()
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,65 @@
+import re
+
+import pytest
+import tiktoken
+
+import chunking
+from chunking import Chunker
+
+# Pieces of CFR text with multi-byte characters: section signs, pilcrows, smart quotes, dashes.
+PARAGRAPHS = [
+    "**1926.451(a)(1)** Except as provided in paragraphs (a)(2) and (g) of this section, each scaffold "
+    "shall support “at least 4 times the maximum intended load” — see § 1926.452 ¶ 3.",
+    "(b) The employer’s competent person shall inspect scaffolds for visible defects before each shift; "
+    "платформа, 足場 and échafaudage are the same thing.",
+    "(c) Guardrail systems: top edge height 42 inches ± 3 inches (1.1 m ± 8 cm), see §§ 1926.502(b)(1)–(4).",
+]
+TEXT = "\n\n".join(PARAGRAPHS[i % len(PARAGRAPHS)] for i in range(12))
+
+
+@pytest.fixture
+def byte_encoder(monkeypatch):
+    """A byte-level BPE, so token boundaries fall inside every multi-byte character (no download needed)."""
+    ranks = {bytes([byte]): byte for byte in range(256)}
+    for word in ("scaffold", "shall", "the", " 1926.", "inches"):
+        ranks[word.encode()] = len(ranks)
+    encoding = tiktoken.Encoding(name="test-bytes", pat_str=r"\S+|\s+", mergeable_ranks=ranks, special_tokens={})
+    monkeypatch.setattr(chunking, "get_encoder", lambda encoding_name="cl100k_base": encoding)
+    return encoding
+
+
+def merge_overlapping(chunks: list[str]) -> str:
+    """Join chunks, dropping the longest prefix of each chunk that repeats the end of the previous one."""
+    merged = chunks[0]
+    for previous, chunk in zip(chunks, chunks[1:]):
+        overlap = max(size for size in range(min(len(previous), len(chunk)) + 1)
+                      if previous.endswith(chunk[:size]))
+        merged += chunk[overlap:]
+    return merged
+
+
+@pytest.mark.parametrize("max_tokens,overlap_tokens", [(64, 0), (97, 0), (64, 17), (150, 40)])
+def test_non_ascii_chunks_rejoin_to_original(byte_encoder, max_tokens, overlap_tokens):
+    chunker = Chunker(max_tokens=max_tokens, overlap_tokens=overlap_tokens)
+    chunks = chunker.chunk(TEXT)
+
+    assert len(chunks) > 1
+    assert all(chunk in TEXT for chunk in chunks)
+    if overlap_tokens == 0:
+        assert "".join(chunks) == TEXT
+    else:
+        assert merge_overlapping(chunks) == TEXT
+    for character in "§¶“”’—±–足":
+        assert sum(chunk.count(character) for chunk in chunks) >= TEXT.count(character)
+
+
+def test_chunks_stay_within_token_limit(byte_encoder):
+    chunker = Chunker(max_tokens=80, overlap_tokens=10)
+    for chunk in chunker.chunk(TEXT):
+        # Snapping to a character end adds at most the rest of one character.
+        assert chunker.count_tokens(chunk) <= 80 + 3
+
+
+def test_short_document_unchanged(byte_encoder):
+    text = re.sub(r"\s+", " ", PARAGRAPHS[0])
+    assert Chunker(max_tokens=len(text.encode()) + 1).chunk(text) == [text]
@@ -0,0 +1,23 @@
+import numpy as np
+
+from embeddings import VectorCache
+
+
+def test_orphan_vectors_without_keys_are_dropped(tmp_path):
+    cache = VectorCache(tmp_path, "model", 2)
+    # The first put_many crashed after appending its vectors but before writing keys.txt.
+    cache.vectors_path.write_bytes(np.ones((3, 2), dtype=np.float32).tobytes())
+
+    cache = VectorCache(tmp_path, "model", 2)
+    cache.put_many(["a"], np.array([[1.0, 2.0]]))
+    assert np.array_equal(VectorCache(tmp_path, "model", 2).get_many(["a"])["a"], [1.0, 2.0])
+
+
+def test_keys_without_vectors_are_dropped(tmp_path):
+    cache = VectorCache(tmp_path, "model", 2)
+    cache.put_many(["a"], np.array([[1.0, 2.0]]))
+    with open(cache.keys_path, "a") as f:
+        f.write("b\n")
+
+    cache = VectorCache(tmp_path, "model", 2)
+    assert len(cache) == 1 and cache.keys_path.read_text() == "a\n"
@@ -0,0 +1,70 @@
+import pytest
+
+from embeddings import FakeEmbedder
+from fake_weaviate import FakeWeaviateClient
+from ingest import PROPERTY_NAMES, VECTOR_NAME
+from local_index import LocalIndex, LocalOshaRetriever, export_snapshot
+from osha_manifest import object_uuid
+from osha_parser import parse_standard_page
+from parser_regression import FIXTURES_DIR
+from retrieval import QueryFilters, question_filters
+
+
+@pytest.fixture(scope="module")
+def index(tmp_path_factory):
+    """A snapshot of the parser fixtures, stored the way osha.py ingests them ("1926 Subpart M")."""
+    embedder = FakeEmbedder()
+    collection = FakeWeaviateClient().collections.create("osha_standards")
+    for page_path in sorted(FIXTURES_DIR.glob("1926.*.md")):
+        document = parse_standard_page(page_path.read_text())
+        vector = embedder.embed([document["content"]])[0].tolist()
+        collection.objects[object_uuid(document["standard_number"])] = (
+            {name: document[name] for name in PROPERTY_NAMES}, {VECTOR_NAME: vector})
+    directory = tmp_path_factory.mktemp("snapshot") / "osha_snapshot"
+    export_snapshot(collection, directory, model=embedder.model)
+    return LocalIndex(directory)
+
+
+def standards(index, filters):
+    return sorted(index.objects[row]["standard_number"] for row in index.mask(filters).nonzero()[0])
+
+
+def test_fixture_subparts_are_stored_unnormalised(index):
+    assert "1926 Subpart M" in index.columns["subpart"]
+
+
+@pytest.mark.parametrize("question,expected", [
+    ("What does subpart M say about guardrail height?", ["1926.502"]),
+    ("Crane scope under 1926 subpart CC", ["1926.1400"]),
+    ("General safety provisions in subpart C", ["1926.20"]),
+    ("What does 1926.451 require for scaffold platforms?", ["1926.451"]),
+])
+def test_question_prefilters_match_stored_values(index, question, expected):
+    assert standards(index, question_filters(question)) == expected
+
+
+def test_subpart_filter_matches_whole_tokens(index):
+    # "C" is not a token of "1926 Subpart CC", as in Weaviate's word-tokenized filters.
+    assert "1926.1400" not in standards(index, QueryFilters(subpart="C"))
+    assert standards(index, QueryFilters(part_number="1926")) == sorted(index.columns["standard_number"])
+
+
+def test_prefiltered_search_finds_the_standard(index):
+    results = LocalOshaRetriever(index).search("subpart M guardrail top rail height", mode="bm25")
+    assert [result.standard_number for result in results] == ["1926.502"]
+    assert results[0].subpart == "1926 Subpart M"
+
+
+@pytest.mark.parametrize("question", [
+    "What does the subpart on scaffolds require?",
+    "Which subpart is about ladders?",
+])
+def test_words_after_subpart_are_not_prefilters(index, question):
+    assert question_filters(question).subpart is None
+    assert LocalOshaRetriever(index).search(question, mode="bm25")
+
+
+def test_search_drops_prefilters_that_match_nothing(index):
+    results = LocalOshaRetriever(index).search("guardrail top rail height", mode="bm25",
+                                               filters=QueryFilters(subpart="Z"))
+    assert results and results[0].standard_number == "1926.502"
@@ -0,0 +1,39 @@
+-- CreateTable
+CREATE TABLE "ReportDailySummary" (
+    "projectId" TEXT NOT NULL,
+    "day" TEXT NOT NULL,
+    "subcontractorId" TEXT NOT NULL,
+    "reportCount" INTEGER NOT NULL,
+    "workerCount" INTEGER NOT NULL,
+    "totalFileSize" INTEGER NOT NULL,
+    "firstReportAt" DATETIME NOT NULL,
+    "lastReportAt" DATETIME NOT NULL,
+    "updatedAt" DATETIME NOT NULL,
+
+    PRIMARY KEY ("projectId", "day", "subcontractorId"),
+    CONSTRAINT "ReportDailySummary_projectId_fkey" FOREIGN KEY ("projectId") REFERENCES "Project" ("id") ON DELETE CASCADE ON UPDATE CASCADE,
+    CONSTRAINT "ReportDailySummary_subcontractorId_fkey" FOREIGN KEY ("subcontractorId") REFERENCES "Subcontractor" ("id") ON DELETE CASCADE ON UPDATE CASCADE
+);
+
+-- CreateTable
+CREATE TABLE "AggregationWatermark" (
+    "name" TEXT NOT NULL PRIMARY KEY,
+    "lastCreatedAt" DATETIME NOT NULL,
+    "lastReportId" TEXT NOT NULL,
+    "updatedAt" DATETIME NOT NULL
+);
+
+-- CreateIndex
+CREATE INDEX "ReportDailySummary_subcontractorId_day_idx" ON "ReportDailySummary"("subcontractorId", "day");
+
+-- CreateIndex
+CREATE INDEX "Report_projectId_reportDate_idx" ON "Report"("projectId", "reportDate");
+
+-- CreateIndex
+CREATE INDEX "Report_workerId_reportDate_idx" ON "Report"("workerId", "reportDate");
+
+-- CreateIndex
+CREATE INDEX "Report_createdAt_id_idx" ON "Report"("createdAt", "id");
+
+-- CreateIndex
+CREATE INDEX "Report_filePath_idx" ON "Report"("filePath");